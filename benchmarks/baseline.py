@@ -0,0 +1,96 @@
+"""Saves benchmark runs as baselines and compares later runs against them.
+
+A benchmark counts as slower than its baseline only if its median is more than
+a threshold slower and every one of its timings is slower than every timing of
+the baseline, so that noise in a few repeats isn't mistaken for a regression.
+"""
+import json
+import platform
+import statistics
+
+from herbert import constants
+
+
+DEFAULT_THRESHOLD = 0.05
+
+# The outcomes of a comparison
+SLOWER = 'slower'
+FASTER = 'faster'
+UNCHANGED = 'unchanged'
+NEW = 'new'
+
+
+def save(measurements, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(dump(measurements), file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def dump(measurements):
+    return {
+        'herbert': constants.VERSION,
+        'python': platform.python_version(),
+        'benchmarks': {
+            m.benchmark.name: {
+                'unit': m.benchmark.unit,
+                'count': m.count,
+                'timings': m.timings,
+                'peak': m.peak
+            }
+            for m in measurements
+        }
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class Comparison:
+    def __init__(self, name, outcome, baseline, timings):
+        self.name = name
+        self.outcome = outcome
+        self.baseline = baseline    # the baseline's timings, None if it's new
+        self.timings = timings
+
+    @property
+    def change(self):
+        """The relative change in the median, positive when slower."""
+        if self.baseline is None:
+            return None
+        return statistics.median(self.timings) / statistics.median(self.baseline) - 1
+
+
+def compare(baseline, measurements, threshold=DEFAULT_THRESHOLD):
+    benchmarks = baseline['benchmarks']
+    comparisons = []
+
+    for m in measurements:
+        try:
+            before = benchmarks[m.benchmark.name]['timings']
+        except KeyError:
+            comparisons.append(Comparison(m.benchmark.name, NEW, None, m.timings))
+            continue
+
+        comparisons.append(Comparison(m.benchmark.name, _outcome(before, m.timings, threshold), before, m.timings))
+
+    return comparisons
+
+
+def _outcome(before, after, threshold):
+    change = statistics.median(after) / statistics.median(before) - 1
+
+    if change > threshold and min(after) > max(before):
+        return SLOWER
+
+    if change < -threshold and max(after) < min(before):
+        return FASTER
+
+    return UNCHANGED
+
+
+def spread(timings):
+    """The median absolute deviation relative to the median."""
+    median = statistics.median(timings)
+    return statistics.median(abs(t - median) for t in timings) / median
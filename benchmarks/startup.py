@@ -0,0 +1,43 @@
+"""Measures how long it takes to start herbert.
+
+Each measurement runs in a fresh interpreter so that nothing is already
+imported or built. Run it from the root of the repository:
+
+    $ python -m benchmarks.startup
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+
+REPEAT = 10
+
+CASES = [
+    ('python (baseline)', 'pass'),
+    ('import herbert.parser', 'import herbert.parser'),
+    ('first parse (prebuilt)', 'from herbert import parser; parser.parse("a:sa\\na")'),
+    ('first parse (built)', 'from herbert import parser; parser.PREBUILT_PATH = ""; parser.parse("a:sa\\na")'),
+    ('python -m herbert --help', 'import runpy, sys; sys.argv = ["herbert", "--help"]; runpy.run_module("herbert", run_name="__main__")')
+]
+
+
+def measure(code, repeat=REPEAT):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main():
+    for name, code in CASES:
+        timings = measure(code)
+        print('%-28s median %7.1f ms    min %7.1f ms' % (name, 1000 * statistics.median(timings), 1000 * min(timings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+"""Measures the throughput of parsing, interpreting, simulating and judging.
+
+Each benchmark is timed a few times in this interpreter and its peak memory is
+measured separately, with tracemalloc, so that tracing doesn't skew the
+timings. Run it from the root of the repository:
+
+    $ python -m benchmarks.suite
+
+or run some of the benchmarks by giving a part of their names:
+
+    $ python -m benchmarks.suite machine step
+
+Save a run as a baseline and compare a later run, of a new version say, against
+it. The comparison exits with a non-zero status if any benchmark got slower,
+see benchmarks.baseline.
+
+    $ python -m benchmarks.suite --save baseline.json
+    $ python -m benchmarks.suite --compare baseline.json
+"""
+import argparse
+import glob
+import importlib.util
+import io
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from herbert import cache, compiler, judge, parser, simulation
+from herbert.generator import generate_level, generate_program
+from herbert.interpreter import Interpreter
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.profiler import ProfilingMachine
+
+from . import baseline
+
+
+REPEAT = 5
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+SMALL_PROGRAM = 'a(A):sa(A-1)\na(4)'
+
+# The interpreter nests a generator for every call so its programs are kept
+# within Python's recursion limit. The machine's deep recursion runs a couple
+# of instructions per call before its first command, so it's kept within
+# machine.MAX_IDLE.
+COUNTING = 'a(A):sa(A-1)\na(%d)'
+RECURSION = 'a(A):a(A-1)s\na(%d)'
+DEFERRED = 'a(A,B):Aa(AA,B-1)\na(s,%d)'
+INFINITE = 'a:sa\na'
+UNBOUNDED = 'a(A):slla(A+1)\na(1)'  # never repeats a state, so it runs to max_steps
+
+
+class Benchmark:
+    def __init__(self, name, unit, setup):
+        self.name = name
+        self.unit = unit        # what the count returned by each run counts
+        self.setup = setup      # returns a function that does one run and returns a count
+
+
+def benchmarks():
+    yield Benchmark('parse small program', 'programs', lambda: _repeat(parser.parse, SMALL_PROGRAM, 1000))
+    yield Benchmark('parse large program', 'programs', lambda: _repeat(parser.parse, large_program(), 10))
+    yield Benchmark('compile small program', 'programs', lambda: _repeat(compiler.compile, SMALL_PROGRAM, 1000))
+    yield Benchmark('compile large program', 'programs', lambda: _repeat(compiler.compile, large_program(), 10))
+
+    for name, source_code, n in [
+        ('counting loop', COUNTING % 300, None),
+        ('deep recursion', RECURSION % 300, None),
+        ('nested deferred', DEFERRED % 14, None),
+        ('infinite', INFINITE, 250)
+    ]:
+        yield Benchmark('interpreter %s' % name, 'commands', _interpret(source_code, n))
+
+    for name, source_code, n in [
+        ('counting loop', COUNTING % 100000, None),
+        ('deep recursion', RECURSION % 40000, None),
+        ('nested deferred', DEFERRED % 17, None),
+        ('infinite', INFINITE, 100000)
+    ]:
+        yield Benchmark('machine %s' % name, 'commands', _execute(source_code, n))
+
+    for depth, nesting in [(10, 0), (100, 0), (100, 5)]:
+        source_code = generate_program(1000000, depth=depth, nesting=nesting, seed=0)
+        yield Benchmark('machine generated %d/%d' % (depth, nesting), 'commands', _execute(source_code, None))
+        yield Benchmark('profiled generated %d/%d' % (depth, nesting), 'commands', _execute(source_code, None, ProfilingMachine))
+
+    for path in sorted(glob.glob(os.path.join(DATA, 'levels', '*.txt'))):
+        yield Benchmark('step %s' % os.path.basename(path), 'commands', _step(path, 100000))
+        yield Benchmark('simulate %s' % os.path.basename(path), 'commands', _simulate(path, 100000))
+
+    if importlib.util.find_spec('numpy') is not None:
+        for path in sorted(glob.glob(os.path.join(DATA, 'levels', '*.txt')))[:1]:
+            yield Benchmark('batch %s' % os.path.basename(path), 'commands', _batch(path, 1000, 100))
+
+    for size in (100, 400):
+        yield Benchmark('fromfile %dx%d' % (size, size), 'levels', _fromfile(size))
+
+    for path, program in [
+        (os.path.join(DATA, 'example', 'level3.txt'), os.path.join(DATA, 'example', 'sol3c.h')),
+        (os.path.join(DATA, 'levels', 'level1.txt'), None)
+    ]:
+        yield Benchmark('judge %s' % os.path.basename(program or path), 'commands', _judge(path, program))
+
+
+def large_program():
+    # One procedure per name, each calling the next, with sequence and
+    # numeric arguments.
+    names = sorted(compiler.PNAMES)
+    lines = []
+
+    for name, next in zip(names, names[1:]):
+        lines.append('%s(A,B,C):sAlB%s(A-1,BsrC,C+1)rC' % (name, next))
+    lines.append('%s(A,B,C):ssrA' % names[-1])
+    lines.append('a(10,sl,3)' * 20)
+
+    return '\n'.join(lines)
+
+
+def _repeat(f, arg, n):
+    def run():
+        for _ in range(n):
+            f(arg)
+        return n
+    return run
+
+
+def _interpret(source_code, n):
+    def setup():
+        tree = parser.parse(source_code)
+
+        def run():
+            return _count(Interpreter()(tree), n)
+        return run
+    return setup
+
+
+def _execute(source_code, n, machine=Machine):
+    def setup():
+        program = compiler.compile(source_code)
+
+        def run():
+            return _count(machine(program), n)
+        return run
+    return setup
+
+
+def _count(commands, n):
+    if n is not None:
+        commands = itertools.islice(commands, n)
+
+    count = 0
+    for _ in commands:
+        count += 1
+    return count
+
+
+def _step(path, n):
+    def setup():
+        with open(path, encoding='utf-8') as file:
+            level = Level.fromfile(file)
+
+        commands = random.Random(0).choices('sslr', k=n)
+
+        def run():
+            step = level(10).step
+            for command in commands:
+                step(command)
+            return n
+        return run
+    return setup
+
+
+def _simulate(path, n):
+    def setup():
+        with open(path, encoding='utf-8') as file:
+            level = Level.fromfile(file)
+
+        commands = ''.join(random.Random(0).choices('sslr', k=n))
+
+        def run():
+            simulation.simulate(level, commands, bytes=10)
+            return n
+        return run
+    return setup
+
+
+def _batch(path, n, length):
+    def setup():
+        from herbert import batch
+
+        with open(path, encoding='utf-8') as file:
+            level = Level.fromfile(file)
+
+        rng = random.Random(0)
+        streams = [''.join(rng.choices('sslr', k=length)) for _ in range(n)]
+
+        def run():
+            batch.simulate(level, streams)
+            return n * length
+        return run
+    return setup
+
+
+def _fromfile(size):
+    def setup():
+        text = generate_level(size, size, white_buttons=size * size // 20, gray_buttons=size * size // 400, walls=0.2, seed=0)
+
+        def run():
+            Level.fromfile(io.StringIO(text), nrows=size, ncols=size)
+            return 1
+        return run
+    return setup
+
+
+def _judge(path, program):
+    def setup():
+        with open(path, encoding='utf-8') as file:
+            level = Level.fromfile(file)
+
+        if program is None:
+            source_code = UNBOUNDED
+        else:
+            with open(program, encoding='utf-8') as file:
+                source_code = file.read()
+
+        def run():
+            return judge.judge(level, source_code, max_steps=100000).result.steps
+        return run
+    return setup
+
+
+class Measurement:
+    def __init__(self, benchmark, count, timings, peak):
+        self.benchmark = benchmark
+        self.count = count
+        self.timings = timings
+        self.peak = peak
+
+    @property
+    def median(self):
+        return statistics.median(self.timings)
+
+    @property
+    def rate(self):
+        return self.count / self.median
+
+
+def measure(benchmark, repeat=REPEAT):
+    run = benchmark.setup()
+    count = run()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(benchmark, count, timings, peak)
+
+
+def main(args=None):
+    ns = _argument_parser().parse_args(args)
+
+    if ns.compare is not None:
+        before = baseline.load(ns.compare)
+
+    # Judging compiles through the program cache, whose use is reported at the end
+    cache.programs.clear()
+
+    measurements = []
+    for benchmark in benchmarks():
+        if ns.names and not any(name in benchmark.name for name in ns.names):
+            continue
+
+        m = measure(benchmark, ns.repeat)
+        measurements.append(m)
+
+        if ns.compare is None:
+            print('%-28s %12.0f %-12s median %s    peak %9.1f KiB' % (
+                benchmark.name, m.rate, benchmark.unit + '/s', _format_timings(m.timings), m.peak / 1024
+            ))
+
+    if ns.save is not None:
+        baseline.save(measurements, ns.save)
+
+    if ns.compare is None:
+        info = cache.programs.info()
+        print('program cache: %d hits, %d misses, %d evictions, %d of %d programs' % (
+            info.hits, info.misses, info.evictions, info.currsize, info.maxsize
+        ))
+        return 0
+
+    slower = 0
+    for c in baseline.compare(before, measurements, ns.threshold):
+        if c.baseline is None:
+            print('%-28s %19s    %19s    %7s    %s' % (c.name, '', _format_timings(c.timings), '', c.outcome))
+        else:
+            print('%-28s %19s -> %19s    %+6.1f%%    %s' % (
+                c.name, _format_timings(c.baseline), _format_timings(c.timings), 100 * c.change, c.outcome
+            ))
+
+        if c.outcome == baseline.SLOWER:
+            slower += 1
+
+    if slower:
+        print('%d %s slower than the baseline' % (slower, 'benchmark is' if slower == 1 else 'benchmarks are'))
+        return 1
+
+    return 0
+
+
+def _format_timings(timings):
+    return '%9.2f ms \u00b1%4.1f%%' % (1000 * statistics.median(timings), 100 * baseline.spread(timings))
+
+
+def _argument_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+
+    parser.add_argument('names',
+        nargs='*',
+        help='run only the benchmarks whose names contain one of these'
+    )
+
+    parser.add_argument('--repeat',
+        type=int,
+        default=REPEAT,
+        help='the number of times to time each benchmark (default: %(default)s)'
+    )
+
+    parser.add_argument('--save',
+        metavar='PATH',
+        help='save the run as a baseline'
+    )
+
+    parser.add_argument('--compare',
+        metavar='PATH',
+        help='compare the run against a baseline'
+    )
+
+    parser.add_argument('--threshold',
+        type=float,
+        default=baseline.DEFAULT_THRESHOLD,
+        help='the relative change in the median below which a benchmark is unchanged (default: %(default)s)'
+    )
+
+    return parser
+
+
+if __name__ == '__main__':
+    sys.exit(main())
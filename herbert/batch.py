@@ -0,0 +1,211 @@
+"""Simulates many command streams on one level in lockstep, with NumPy.
+
+The robots of all the runs are held as arrays, one element per run, and each
+step applies one command to every run at once, looking up what the robots
+move onto in an array of the level's spots. It ends in the same state as
+stepping a RuntimeEnvironment through each stream, except for the robot's
+trail, which isn't kept.
+
+NumPy is optional for the rest of the package, so this module is only
+importable when it's installed.
+"""
+import numpy as np
+
+from .level import ROBOT_DIRECTIONS, calculate_score
+
+
+# The code of each command, as in a trace, and of no command, for the runs
+# whose streams have ended
+CODES = {'s': 0, 'l': 1, 'r': 2}
+NOOP = 3
+
+# The number of steps encoded at a time
+BLOCK = 1024
+
+# What a spot holds. The level is surrounded by a border of BLOCKED spots, so
+# that moving off an edge is like moving into a wall.
+OPEN, BLOCKED, GRAY, WHITE = range(4)
+
+# The change in heading for each command code
+TURNS = np.array([0, 3, 1, 0], dtype=np.uint8)
+
+# Every byte -> its command code, or 255 if it isn't a command
+_ENCODE = np.full(256, 255, dtype=np.uint8)
+for _command, _code in CODES.items():
+    _ENCODE[ord(_command)] = _code
+
+
+def simulate(level, streams):
+    """Steps a run of level through each of the strings of commands in
+    streams and returns the Batch of runs.
+    """
+    batch = Batch(level, len(streams))
+    batch.run(streams)
+    return batch
+
+
+class Batch:
+    """n runs of a level, as arrays with an element per run.
+
+    The white buttons pressed in each run are a bitset, in words of 64 bits,
+    where bit i stands for the i-th of the level's white buttons.
+    """
+
+    def __init__(self, level, n):
+        self.level = level
+        self.n = n
+        self.total_buttons = len(level.white_buttons)
+
+        self._spots, self._buttons, width = layout(level)
+        self._width = width
+        self._deltas = deltas(width)
+
+        row, col, direction = level.robot
+        self.position = np.full(n, (row + 1) * width + col + 1, dtype=np.int32)
+        self.heading = np.full(n, ROBOT_DIRECTIONS.index(direction), dtype=np.uint8)
+        self.pressed = np.zeros((n, (self.total_buttons + 63) // 64), dtype=np.uint64)
+        self.npressed = np.zeros(n, dtype=np.int32)
+        self.max_npressed = np.zeros(n, dtype=np.int32)
+        self.completed = np.zeros(n, dtype=bool)
+        self.nblocked = np.zeros(n, dtype=np.int64)
+        self.nwhite_presses = np.zeros(n, dtype=np.int64)
+        self.ngray_presses = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+    @property
+    def row(self):
+        return self.position // self._width - 1
+
+    @property
+    def col(self):
+        return self.position % self._width - 1
+
+    def step(self, codes):
+        """Applies a command, given by its code, to each run."""
+        heading = self.heading
+        self.steps += codes != NOOP
+        heading += TURNS[codes]
+        heading &= 3
+
+        moving = np.flatnonzero(codes == CODES['s'])
+        if len(moving) == 0:
+            return
+
+        targets = self.position[moving] + self._deltas[heading[moving]]
+        spots = self._spots[targets]
+        open = spots != BLOCKED
+
+        self.nblocked[moving[~open]] += 1
+
+        moved = moving[open]
+        targets = targets[open]
+        spots = spots[open]
+        self.position[moved] = targets
+
+        on_gray = spots == GRAY
+        if on_gray.any():
+            gray = moved[on_gray]
+            self.pressed[gray] = 0
+            self.npressed[gray] = 0
+            self.ngray_presses[gray] += 1
+
+        on_white = spots == WHITE
+        if on_white.any():
+            white = moved[on_white]
+            self.nwhite_presses[white] += 1
+
+            buttons = self._buttons[targets[on_white]]
+            words = buttons >> 6
+            bits = np.left_shift(np.uint64(1), (buttons & 63).astype(np.uint64))
+            unpressed = (self.pressed[white, words] & bits) == 0
+
+            white = white[unpressed]
+            self.pressed[white, words[unpressed]] |= bits[unpressed]
+            self.npressed[white] += 1
+            np.maximum(self.max_npressed, self.npressed, out=self.max_npressed)
+
+            if self.total_buttons:
+                self.completed[white] |= self.npressed[white] == self.total_buttons
+
+    def run(self, streams, block=BLOCK):
+        """Steps each run through the string of commands at the same index in
+        streams until they have all ended.
+        """
+        if len(streams) != self.n:
+            raise ValueError('expected %d streams but got %d' % (self.n, len(streams)))
+
+        length = max(map(len, streams), default=0)
+
+        for start in range(0, length, block):
+            stop = min(start + block, length)
+            codes = np.full((stop - start, self.n), NOOP, dtype=np.uint8)
+
+            for i, stream in enumerate(streams):
+                commands = stream[start:stop]
+
+                if commands:
+                    codes[:len(commands), i] = encode(commands)
+
+            for t in range(stop - start):
+                self.step(codes[t])
+
+    def pressed_buttons(self, i):
+        """Returns whether each white button is pressed in the i-th run, in the
+        order of the level's white buttons.
+        """
+        words = self.pressed[i]
+        return tuple(bool(words[b >> 6] >> np.uint64(b & 63) & np.uint64(1)) for b in range(self.total_buttons))
+
+    def points(self, bytes):
+        """Returns the maximum points earned by each run, as a list, for
+        programs of the given sizes, a number or a sequence with one per run.
+
+        The points only ever go up with the number of white buttons pressed,
+        so they are the points for the most pressed at once.
+        """
+        if isinstance(bytes, int):
+            bytes = [bytes] * self.n
+
+        level = self.level
+        return [
+            calculate_score(level.points, level.max_bytes, self.total_buttons, int(npressed), b)
+            for npressed, b in zip(self.max_npressed, bytes)
+        ]
+
+
+def layout(level):
+    """Returns what each spot of level holds, the index of the white button on
+    each spot or -1, and the width of a row. The spots are numbered row by
+    row, border included.
+    """
+    width = level.ncols + 2
+    spots = np.full((level.nrows + 2, width), BLOCKED, dtype=np.uint8)
+    spots[1:-1, 1:-1] = OPEN
+    buttons = np.full(spots.shape, -1, dtype=np.int32)
+
+    for r, c in level.inaccessible_spots:
+        spots[r + 1, c + 1] = BLOCKED
+
+    for r, c in level.gray_buttons:
+        spots[r + 1, c + 1] = GRAY
+
+    for i, (r, c) in enumerate(level.white_buttons):
+        spots[r + 1, c + 1] = WHITE
+        buttons[r + 1, c + 1] = i
+
+    return spots.ravel(), buttons.ravel(), width
+
+
+def deltas(width):
+    """Returns the change in spot number of a move in each heading."""
+    return np.array([-width, 1, width, -1], dtype=np.int32)
+
+
+def encode(commands):
+    """Returns the array of codes of a string of commands."""
+    codes = _ENCODE[np.frombuffer(commands.encode('ascii'), dtype=np.uint8)]
+
+    if (codes == 255).any():
+        raise ValueError('not a command: %s' % commands[int(np.argmax(codes == 255))])
+
+    return codes
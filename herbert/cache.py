@@ -0,0 +1,78 @@
+import collections
+import threading
+
+from . import compiler
+from .constants import DEFAULT_CACHE_SIZE
+
+
+DEFAULT_SIZE = DEFAULT_CACHE_SIZE
+
+CacheInfo = collections.namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class ProgramCache:
+    """A least recently used cache of compiled programs keyed on their source
+    code.
+
+    Compiled programs are never modified by the machines that run them so the
+    same one can be shared by every run of the same source code.
+    """
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self._programs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.resize(maxsize)
+        self.clear()
+
+    def compile(self, source_code):
+        key = source_code.strip()
+
+        with self._lock:
+            try:
+                program = self._programs[key]
+            except KeyError:
+                pass
+            else:
+                self._programs.move_to_end(key)
+                self._hits += 1
+                return program
+
+        program = compiler.compile(key)
+
+        with self._lock:
+            self._misses += 1
+
+            if self.maxsize > 0:
+                self._programs[key] = program
+                self._evict()
+
+        return program
+
+    def resize(self, maxsize):
+        if maxsize < 0:
+            raise ValueError('the size of the cache must be greater than or equal to 0: %s' % maxsize)
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._programs))
+
+    def _evict(self):
+        while len(self._programs) > self.maxsize:
+            self._programs.popitem(last=False)
+            self._evictions += 1
+
+
+programs = ProgramCache()
+
+
+def compile(source_code):
+    return programs.compile(source_code)
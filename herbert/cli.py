@@ -1,18 +1,28 @@
 import argparse
 import logging
+import sys
 
-from . import constants, ui
+from . import constants
 from .error import HerbertError
 
 
-DEFAULT_FPS = 4
+# N.B. Each command imports what it needs when it runs so that, for example,
+# judging a program never imports curses and serving never imports the user
+# interface. See tests/test_cli.py.
 
 
 def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    # For backwards compatibility, "herbert level program" means "herbert play level program"
+    if args and args[0] not in _COMMANDS and args[0] not in ('-h', '--help'):
+        args = ['play'] + list(args)
+
     ns = _argument_parser().parse_args(args)
 
     try:
-        ui.main(ns.level, ns.program, DEFAULT_FPS)
+        return ns.command(ns)
     except HerbertError:
         logging.exception('Sorry, exiting the program due to an error.')
         return 1
@@ -20,15 +30,559 @@ def main(args=None):
         logging.exception('Sorry, an unexpected error occurred.')
         return 1
 
+
+def play(ns):
+    from . import ui
+
+    ui.main(ns.level, ns.program, ns.fps,
+        checkpoint_interval=ns.checkpoint_interval,
+        checkpoint_budget=ns.checkpoint_budget
+    )
+    return 0
+
+
+def check(ns):
+    from .loader import load_level
+
+    status = 0
+    for file in ns.levels:
+        with file:
+            try:
+                level = load_level(file)
+            except HerbertError as e:
+                print('%s: %s' % (file.name, e))
+                status = 1
+            else:
+                print('%s: OK    Buttons %d    Points %d    Max bytes %d' % (file.name, len(level.white_buttons), level.points, level.max_bytes))
+
+    return status
+
+
+def judge_program(ns):
+    from . import judge
+    from .error import ProgramError, SyntaxError
+    from .instrumentation import Stats
+    from .loader import SYNTAX_ERROR_MESSAGE, load_level, read_program
+
+    stats = Stats()
+
+    with stats.phase('load'):
+        level = load_level(ns.level)
+        source_code = read_program(ns.program)
+
+    profile = None
+    if ns.profile:
+        from .profiler import Profile
+        profile = Profile()
+
+    try:
+        judgement = judge.judge(level, source_code, max_steps=ns.max_steps, profile=profile, stats=stats, record=ns.record is not None)
+    except SyntaxError as e:
+        raise ProgramError(SYNTAX_ERROR_MESSAGE) from e
+
+    _print_judgement(level, judgement)
+
+    if ns.record is not None:
+        with open(ns.record, 'wb') as file:
+            judgement.trace.tofile(file)
+
+    if profile is not None:
+        print()
+        print(profile.report(ns.sort))
+
+    if ns.stats:
+        print()
+        print(stats.report())
+
+    if ns.store is not None:
+        from .store import Store
+
+        with Store(ns.store) as store:
+            store.record(ns.user, level.name, judgement.program_hash, judgement.points, judgement.bytes)
+
+            best = store.best(ns.user, level.name)
+            print('Best %d    Total %d    Rank %d' % (best.score, store.total(ns.user), store.rank(ns.user)))
+
+    return 0
+
+
+def replay(ns):
+    from .loader import load_level, load_trace
+
+    level = load_level(ns.level)
+    trace = load_trace(ns.trace)
+    trace.check(level)
+
+    if ns.ui:
+        from . import ui
+
+        ui.replay(level, trace, ns.fps,
+            checkpoint_interval=ns.checkpoint_interval,
+            checkpoint_budget=ns.checkpoint_budget
+        )
+    else:
+        from .judge import Judgement
+        from .trace import replay
+
+        _print_judgement(level, Judgement(trace.program_hash, trace.bytes, replay(level, trace)))
+
+    return 0
+
+
+def export_run(ns):
+    from . import export
+    from .loader import load_level, load_trace
+
+    level = load_level(ns.level)
+
+    if ns.trace:
+        with open(ns.program, 'rb') as file:
+            trace = load_trace(file)
+    else:
+        from . import judge
+        from .error import ProgramError, SyntaxError
+        from .loader import SYNTAX_ERROR_MESSAGE, read_program
+
+        with open(ns.program, encoding='utf-8') as file:
+            source_code = read_program(file)
+
+        try:
+            trace = judge.judge(level, source_code, max_steps=ns.max_steps, record=True).trace
+        except SyntaxError as e:
+            raise ProgramError(SYNTAX_ERROR_MESSAGE) from e
+
+    speed = ns.speed
+    if ns.duration is not None:
+        speed = max(trace.count, 1) / ns.duration
+
+    frames = export.frames(level, trace, speed=speed, fps=ns.fps)
+
+    if ns.format == 'cast':
+        width, height = export.size(level)
+
+        with open(ns.output, 'w', encoding='utf-8') as file:
+            n = export.write_asciicast(file, frames, width=width, height=height, title=level.name)
+    else:
+        n = export.write_frames(ns.output, frames, fps=ns.fps)
+
+    print('Exported %d frames of %d commands to %s' % (n, trace.count, ns.output))
+    return 0
+
+
+def solve_level(ns):
+    from . import solver
+    from .loader import load_level
+    from .util import pluralize
+
+    level = load_level(ns.level)
+    max_bytes = level.max_bytes if ns.max_bytes is None else ns.max_bytes
+
+    def progress(nbytes, searched):
+        print('Searched %d %s of %d %s' % (
+            searched, pluralize(searched, 'program', 'programs'),
+            nbytes, pluralize(nbytes, 'byte', 'bytes')
+        ), file=sys.stderr, flush=True)
+
+    solution = solver.solve(level,
+        max_bytes=max_bytes,
+        max_procedures=ns.procedures,
+        max_steps=ns.max_steps,
+        workers=ns.workers,
+        progress=None if ns.quiet else progress
+    )
+
+    if solution is None:
+        print('No program of at most %d bytes solves %s' % (max_bytes, level.name))
+        return 1
+
+    print(solution.source_code)
+    print('Points %d/%d    Bytes %d    (Max %d)    Searched %d programs' % (
+        solution.points, level.points,
+        solution.bytes, level.max_bytes,
+        solution.searched
+    ))
+    return 0
+
+
+def golf_program(ns):
+    from . import golf
+    from .error import ProgramError, SyntaxError
+    from .loader import SYNTAX_ERROR_MESSAGE, load_level, read_program
+    from .util import pluralize
+
+    level = load_level(ns.level)
+    source_code = read_program(ns.program)
+
+    def progress(nbytes, searched):
+        print('Found a program of %d %s after running %d %s' % (
+            nbytes, pluralize(nbytes, 'byte', 'bytes'),
+            searched, pluralize(searched, 'candidate', 'candidates')
+        ), file=sys.stderr, flush=True)
+
+    try:
+        solution = golf.golf(level, source_code,
+            max_steps=ns.max_steps,
+            workers=ns.workers,
+            progress=None if ns.quiet else progress
+        )
+    except SyntaxError as e:
+        raise ProgramError(SYNTAX_ERROR_MESSAGE) from e
+
+    if solution is None:
+        print('The program doesn\'t solve %s' % level.name)
+        return 1
+
+    print(solution.source_code)
+    print('Points %d/%d    Bytes %d    (Max %d)    Ran %d candidates' % (
+        solution.points, level.points,
+        solution.bytes, level.max_bytes,
+        solution.searched
+    ))
+    return 0
+
+
+def _print_judgement(level, judgement):
+    solved_status = 'Solved' if judgement.completed else 'Unsolved'
+
+    print('Points %d/%d    Buttons %d/%d    Bytes: %d    (Max %d)    %s    %s' % (
+        judgement.points, level.points,
+        judgement.max_npressed, judgement.total_buttons,
+        judgement.bytes, level.max_bytes,
+        level.name, solved_status
+    ))
+
+
+def serve(ns):
+    from . import service
+    from .loader import load_level
+
+    levels = {}
+    for file in ns.levels:
+        with file:
+            level = load_level(file)
+        levels[level.name] = level
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    store = None
+    if ns.store is not None:
+        from .store import Store
+        store = Store(ns.store)
+
+    try:
+        service.serve(levels,
+            host=ns.host,
+            port=ns.port,
+            workers=ns.workers,
+            queue_size=ns.queue_size,
+            batch_size=ns.batch_size,
+            max_steps=ns.max_steps,
+            timeout=ns.timeout,
+            cache_size=ns.cache_size,
+            store=store
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
     return 0
 
 
+_COMMANDS = ('play', 'check', 'judge', 'replay', 'export', 'solve', 'golf', 'serve')
+
+
 def _argument_parser():
     parser = argparse.ArgumentParser(
         prog=constants.PROGRAM_NAME.lower(),
         description='%s is a game that requires you to write small programs to control a robot to solve various levels.' % constants.PROGRAM_NAME
     )
 
+    subparsers = parser.add_subparsers(title='commands', dest='command_name', metavar='command')
+    subparsers.required = True
+
+    play_parser = subparsers.add_parser('play',
+        help='run a program against a level in a user interface (the default)'
+    )
+    play_parser.set_defaults(command=play)
+    _add_level_and_program_arguments(play_parser)
+
+    _add_playback_arguments(play_parser)
+
+    check_parser = subparsers.add_parser('check',
+        help='check that levels are well formed'
+    )
+    check_parser.set_defaults(command=check)
+
+    check_parser.add_argument('levels',
+        nargs='+',
+        type=argparse.FileType('r', encoding='utf-8'),
+        help='the levels to check'
+    )
+
+    judge_parser = subparsers.add_parser('judge',
+        help='determine the points a program earns on a level without a user interface'
+    )
+    judge_parser.set_defaults(command=judge_program)
+    _add_level_and_program_arguments(judge_parser)
+
+    _add_max_steps_argument(judge_parser)
+
+    judge_parser.add_argument('--profile',
+        action='store_true',
+        help='report the calls and commands of each procedure'
+    )
+
+    judge_parser.add_argument('--sort',
+        choices=('calls', 'ignored', 'deferred', 'self', 'inclusive', 'depth'),
+        default='inclusive',
+        help='the column to sort the profile by (default: %(default)s)'
+    )
+
+    judge_parser.add_argument('--stats',
+        action='store_true',
+        help='report the time spent in each phase and the number of commands, blocked moves and button presses'
+    )
+
+    judge_parser.add_argument('--store',
+        metavar='PATH',
+        help='a database in which to record the solution'
+    )
+
+    judge_parser.add_argument('--user',
+        default='anonymous',
+        help='the user to record the solution for (default: %(default)s)'
+    )
+
+    judge_parser.add_argument('--record',
+        metavar='PATH',
+        help='a file in which to record a trace of the commands run, for herbert replay'
+    )
+
+    replay_parser = subparsers.add_parser('replay',
+        help='replay a trace of the commands a program ran against a level, without the program'
+    )
+    replay_parser.set_defaults(command=replay)
+
+    replay_parser.add_argument('level',
+        type=argparse.FileType('r', encoding='utf-8'),
+        help='the level the trace was recorded on'
+    )
+
+    replay_parser.add_argument('trace',
+        type=argparse.FileType('rb'),
+        help='a trace recorded with herbert judge --record'
+    )
+
+    replay_parser.add_argument('--ui',
+        action='store_true',
+        help='replay the trace in the user interface rather than only report the points'
+    )
+
+    _add_playback_arguments(replay_parser)
+
+    export_parser = subparsers.add_parser('export',
+        help='render a run as an asciicast or a directory of text frames, without a terminal'
+    )
+    export_parser.set_defaults(command=export_run)
+
+    export_parser.add_argument('level',
+        type=argparse.FileType('r', encoding='utf-8'),
+        help='a level to solve'
+    )
+
+    export_parser.add_argument('program',
+        help='a program to run against the level, or a trace with --trace'
+    )
+
+    export_parser.add_argument('output',
+        help='the asciicast file, or the directory of frames, to write'
+    )
+
+    export_parser.add_argument('--trace',
+        action='store_true',
+        help='replay a trace recorded with herbert judge --record instead of running a program'
+    )
+
+    export_parser.add_argument('--format',
+        choices=('cast', 'frames'),
+        default='cast',
+        help='an asciicast v2 file or a directory with a text file per frame (default: %(default)s)'
+    )
+
+    export_parser.add_argument('--fps',
+        type=_positive_float,
+        default=constants.DEFAULT_EXPORT_FPS,
+        help='the number of frames per second, commands in between are run but not rendered (default: %(default)s)'
+    )
+
+    speed_group = export_parser.add_mutually_exclusive_group()
+
+    speed_group.add_argument('--speed',
+        type=_positive_float,
+        default=constants.DEFAULT_FPS,
+        help='the number of commands to run per second (default: %(default)s)'
+    )
+
+    speed_group.add_argument('--duration',
+        type=_positive_float,
+        metavar='SECONDS',
+        help='run at the speed that makes the whole run take this long'
+    )
+
+    _add_max_steps_argument(export_parser)
+
+    solve_parser = subparsers.add_parser('solve',
+        help='search for one of the shortest programs that solve a level'
+    )
+    solve_parser.set_defaults(command=solve_level)
+
+    solve_parser.add_argument('level',
+        type=argparse.FileType('r', encoding='utf-8'),
+        help='a level to solve'
+    )
+
+    solve_parser.add_argument('--max-bytes',
+        type=_int_at_least(1),
+        metavar='N',
+        help='the size of the largest programs to search (default: the level\'s maximum)'
+    )
+
+    solve_parser.add_argument('--procedures',
+        type=_int_at_least(0),
+        default=constants.DEFAULT_SOLVE_MAX_PROCEDURES,
+        metavar='N',
+        help='the maximum number of procedures in a program (default: %(default)s)'
+    )
+
+    solve_parser.add_argument('--max-steps',
+        type=_int_at_least(0),
+        default=constants.DEFAULT_SOLVE_MAX_STEPS,
+        help='the maximum number of commands to run each program for (default: %(default)s)'
+    )
+
+    solve_parser.add_argument('--workers',
+        type=_int_at_least(1),
+        help='the number of processes to run programs in (default: the number of CPUs)'
+    )
+
+    solve_parser.add_argument('--quiet',
+        action='store_true',
+        help='don\'t report the number of programs searched of each size'
+    )
+
+    golf_parser = subparsers.add_parser('golf',
+        help='shrink a program that solves a level while it keeps solving it'
+    )
+    golf_parser.set_defaults(command=golf_program)
+
+    _add_level_and_program_arguments(golf_parser)
+    _add_max_steps_argument(golf_parser)
+
+    golf_parser.add_argument('--workers',
+        type=_int_at_least(1),
+        help='the number of processes to run candidates in (default: the number of CPUs)'
+    )
+
+    golf_parser.add_argument('--quiet',
+        action='store_true',
+        help='don\'t report the smaller programs found along the way'
+    )
+
+    serve_parser = subparsers.add_parser('serve',
+        help='judge programs submitted over HTTP'
+    )
+    serve_parser.set_defaults(command=serve)
+
+    serve_parser.add_argument('levels',
+        nargs='+',
+        type=argparse.FileType('r', encoding='utf-8'),
+        help='the levels programs can be judged against'
+    )
+
+    serve_parser.add_argument('--host',
+        default=constants.DEFAULT_HOST,
+        help='the address to listen on (default: %(default)s)'
+    )
+
+    serve_parser.add_argument('--port',
+        type=int,
+        default=constants.DEFAULT_PORT,
+        help='the port to listen on (default: %(default)s)'
+    )
+
+    serve_parser.add_argument('--workers',
+        type=_int_at_least(1),
+        help='the number of programs to judge at the same time (default: the number of CPUs)'
+    )
+
+    serve_parser.add_argument('--queue-size',
+        type=_int_at_least(1),
+        default=constants.DEFAULT_QUEUE_SIZE,
+        help='the number of programs that can wait to be judged before new ones are turned away (default: %(default)s)'
+    )
+
+    serve_parser.add_argument('--batch-size',
+        type=_int_at_least(1),
+        default=constants.DEFAULT_BATCH_SIZE,
+        help='the number of waiting programs a worker takes at once and judges by taking turns (default: %(default)s)'
+    )
+
+    _add_max_steps_argument(serve_parser)
+
+    serve_parser.add_argument('--timeout',
+        type=_positive_float,
+        default=constants.DEFAULT_TIMEOUT,
+        metavar='SECONDS',
+        help='the longest a program can run before it is turned away with an error (default: %(default)s)'
+    )
+
+    serve_parser.add_argument('--cache-size',
+        type=_int_at_least(0),
+        default=constants.DEFAULT_CACHE_SIZE,
+        help='the number of compiled programs each worker keeps for reuse (default: %(default)s)'
+    )
+
+    serve_parser.add_argument('--store',
+        metavar='PATH',
+        help='a database in which to record the solutions submitted with a user'
+    )
+
+    return parser
+
+
+def _add_playback_arguments(parser):
+    parser.add_argument('--fps',
+        type=_positive_float,
+        default=constants.DEFAULT_FPS,
+        help='the number of commands to run per second, which can be changed with + and - while playing (default: %(default)s)'
+    )
+
+    parser.add_argument('--checkpoint-interval',
+        type=_int_at_least(1),
+        default=constants.DEFAULT_CHECKPOINT_INTERVAL,
+        metavar='N',
+        help='the number of commands between the checkpoints that stepping back and jumping return to (default: %(default)s)'
+    )
+
+    parser.add_argument('--checkpoint-budget',
+        type=_int_at_least(2),
+        default=constants.DEFAULT_CHECKPOINT_BUDGET,
+        metavar='N',
+        help='the maximum number of checkpoints to keep, after which the interval doubles (default: %(default)s)'
+    )
+
+
+def _add_max_steps_argument(parser):
+    parser.add_argument('--max-steps',
+        type=_int_at_least(0),
+        default=constants.DEFAULT_MAX_STEPS,
+        help='the maximum number of commands to run (default: %(default)s)'
+    )
+
+
+def _add_level_and_program_arguments(parser):
     parser.add_argument('level',
         type=argparse.FileType('r', encoding='utf-8'),
         help='a level to solve'
@@ -38,4 +592,29 @@ def _argument_parser():
         type=argparse.FileType('r', encoding='utf-8'),
         help='a program to run against the level')
 
-    return parser
+
+def _positive_float(s):
+    try:
+        value = float(s)
+    except ValueError:
+        value = 0
+
+    if not value > 0:
+        raise argparse.ArgumentTypeError('expected a positive number: %s' % s)
+
+    return value
+
+
+def _int_at_least(minimum):
+    def convert(s):
+        try:
+            value = int(s)
+        except ValueError:
+            value = minimum - 1
+
+        if value < minimum:
+            raise argparse.ArgumentTypeError('expected an integer of at least %d: %s' % (minimum, s))
+
+        return value
+
+    return convert
@@ -0,0 +1,251 @@
+from .error import SyntaxError
+from .machine import CALL, COMMAND, EXPR, PARAM, SEXPR, VAR, Procedure, Program
+
+
+COMMANDS = frozenset('slr')
+PNAMES = frozenset('abcdefghijkmnopqtuvwxyz')
+PARAMS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+DIGITS = frozenset('0123456789')
+
+
+def compile(source_code):
+    """Compiles the source code of a program straight into a Program that a
+    Machine can execute, without building a parse tree.
+
+    It accepts exactly the programs that parser.parse accepts and compiles them
+    to the same Program as machine.compile(parser.parse(source_code)). The
+    bytes are counted along the way, one for each name, parameter, command and
+    term of an expression, just like counter.count_bytes.
+    """
+    compiler = _Compiler(source_code.strip())
+
+    try:
+        return compiler.program()
+    except RecursionError:
+        # Arguments are compiled recursively, so Python's own stack bounds how
+        # deeply they can nest
+        line, column = compiler._position()
+        raise SyntaxError('the program is nested too deeply at line %d, column %d' % (line, column)) from None
+
+
+class _Compiler:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.end = len(text)
+        self.bytes = 0
+
+    def program(self):
+        procedures = {}
+
+        while True:
+            procedure = self._line()
+
+            if procedure is None:
+                break
+
+            procedures.setdefault(procedure.name, procedure)
+
+        return Program(procedures, self._main, self.bytes)
+
+    def _line(self):
+        # Returns the procedure defined on the line or None if it's the last
+        # line, in which case self._main is set to its statements.
+        #
+        # N.B. To match the LALR parser, a line that starts with "x(A," or "x(A)"
+        # is always taken to be the start of a procedure definition.
+        text = self.text
+        start = self.pos
+
+        if start < self.end and text[start] in PNAMES:
+            next = self._peek(start + 1)
+
+            if next == ':':
+                self.pos = start + 2
+                self.bytes += 1
+                return self._pdef(text[start], ())
+
+            if next == '(' and self._peek(start + 2) in PARAMS and self._peek(start + 3) in (',', ')'):
+                self.pos = start + 2
+                self.bytes += 1
+                return self._pdef(text[start], self._params())
+
+        self._main = self._stmts()
+
+        if self.pos != self.end:
+            self._error()
+
+        return None
+
+    def _pdef(self, name, params):
+        body = self._seq()
+
+        if not body:
+            self._error()
+
+        self._expect('\n')
+
+        return Procedure(name, params, body)
+
+    def _params(self):
+        params = []
+
+        while True:
+            params.append(self._take(PARAMS))
+
+            if self._peek(self.pos) == ',':
+                self.pos += 1
+            else:
+                break
+
+        self._expect(')')
+        self._expect(':')
+        self.bytes += len(params)
+
+        return tuple(params)
+
+    def _stmts(self):
+        # stmt+
+        seq = []
+
+        while self._peek(self.pos) in COMMANDS or self._peek(self.pos) in PNAMES:
+            seq.append(self._stmt())
+
+        if not seq:
+            self._error()
+
+        return tuple(seq)
+
+    def _seq(self, seq=None):
+        # (stmt | PARAM)*
+        seq = [] if seq is None else seq
+
+        while True:
+            c = self._peek(self.pos)
+
+            if c in PARAMS:
+                self.pos += 1
+                self.bytes += 1
+                seq.append((PARAM, c))
+            elif c in COMMANDS or c in PNAMES:
+                seq.append(self._stmt())
+            else:
+                return tuple(seq)
+
+    def _stmt(self):
+        c = self.text[self.pos]
+        self.pos += 1
+        self.bytes += 1
+
+        if c in COMMANDS:
+            return (COMMAND, c)
+
+        if self._peek(self.pos) != '(':
+            return (CALL, c, ())
+
+        self.pos += 1
+        args = [self._arg()]
+
+        while self._peek(self.pos) == ',':
+            self.pos += 1
+            args.append(self._arg())
+
+        self._expect(')')
+
+        return (CALL, c, tuple(args))
+
+    def _arg(self):
+        c = self._peek(self.pos)
+
+        if c in PARAMS:
+            next = self._peek(self.pos + 1)
+
+            if next in (',', ')'):
+                self.pos += 1
+                self.bytes += 1
+                return (VAR, c)
+
+            if next in ('+', '-'):
+                return (EXPR, self._expr())
+
+            self.pos += 1
+            self.bytes += 1
+            seq = self._seq([(PARAM, c)])
+
+            if len(seq) == 1:
+                self._error()
+
+            return (SEXPR, seq)
+
+        if c in COMMANDS or c in PNAMES:
+            return (SEXPR, self._seq())
+
+        return (EXPR, self._expr())
+
+    def _expr(self):
+        # NEG PARAM | NEG? NUM | NEG? (NUM | PARAM) ((PLUS | MINUS) (NUM | PARAM))+
+        sign = 1
+
+        if self._peek(self.pos) == '-':
+            self.pos += 1
+            sign = -1
+
+        terms = [(sign, self._term())]
+
+        while self._peek(self.pos) in ('+', '-'):
+            sign = 1 if self.text[self.pos] == '+' else -1
+            self.pos += 1
+            terms.append((sign, self._term()))
+
+        return tuple(terms)
+
+    def _term(self):
+        self.bytes += 1
+        c = self._peek(self.pos)
+
+        if c in PARAMS:
+            self.pos += 1
+            return c
+
+        start = self.pos
+        while self._peek(self.pos) in DIGITS:
+            self.pos += 1
+
+        if self.pos == start:
+            self._error()
+
+        return int(self.text[start:self.pos])
+
+    def _peek(self, pos):
+        return self.text[pos] if pos < self.end else ''
+
+    def _take(self, chars):
+        c = self._peek(self.pos)
+
+        if c == '' or c not in chars:
+            self._error()
+
+        self.pos += 1
+        return c
+
+    def _expect(self, c):
+        if self._peek(self.pos) != c:
+            self._error()
+
+        self.pos += 1
+
+    def _position(self):
+        pos = self.pos
+        line = self.text.count('\n', 0, pos) + 1
+        column = pos - (self.text.rfind('\n', 0, pos) + 1) + 1
+
+        return line, column
+
+    def _error(self):
+        pos = self.pos
+        line, column = self._position()
+
+        if pos < self.end:
+            raise SyntaxError('unexpected character %r at line %d, column %d' % (self.text[pos], line, column))
+
+        raise SyntaxError('unexpected end of program at line %d, column %d' % (line, column))
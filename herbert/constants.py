@@ -1,2 +1,18 @@
 PROGRAM_NAME = 'Herbert'
 VERSION = '0.0.1-alpha.3'
+
+# Defaults shared by the command line interface and the modules it drives,
+# kept here so that building the argument parser imports nothing else.
+DEFAULT_FPS = 4
+DEFAULT_MAX_STEPS = 1000000
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8025
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_TIMEOUT = 10
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+DEFAULT_CHECKPOINT_BUDGET = 256
+DEFAULT_EXPORT_FPS = 10
+DEFAULT_SOLVE_MAX_STEPS = 10000
+DEFAULT_SOLVE_MAX_PROCEDURES = 2
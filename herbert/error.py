@@ -10,6 +10,10 @@ class ProgramError(HerbertError):
     pass
 
 
+class TraceError(HerbertError):
+    pass
+
+
 class SyntaxError(HerbertError):
     pass
 
@@ -24,3 +28,11 @@ class LookupError(RuntimeError):
 
 class TypeError(RuntimeError):
     pass
+
+
+class RecursionError(RuntimeError):
+    pass
+
+
+class TimeoutError(RuntimeError):
+    pass
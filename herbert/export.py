@@ -0,0 +1,120 @@
+"""Renders runs as animations without a terminal.
+
+A run, recorded as a trace.Trace, is replayed at a given speed and rendered
+only at the given frame rate, skipping the states in between, so exporting a
+long run takes about as long as replaying it and not its duration. Frames are
+written as an asciicast v2 file, which asciinema can play and embed, or as a
+directory of text files.
+"""
+import itertools
+import json
+import math
+import os
+
+from . import constants
+from .simulation import advance
+from .trace import CHUNK
+
+
+DEFAULT_FPS = constants.DEFAULT_EXPORT_FPS
+
+# The minimum width of the screen, so that the status lines fit
+MIN_WIDTH = 60
+
+# Clears the screen and moves the cursor to the top left
+CLEAR = '\x1b[2J\x1b[H'
+
+
+def frames(level, trace, *, speed, fps=DEFAULT_FPS):
+    """Replays trace on level at speed commands per second and yields the
+    number of seconds into the replay and the lines of the screen at fps
+    frames per second.
+
+    Frames in which no command ran are skipped, so the first frame is at 0
+    seconds and the last, after the last command, shows the end of the run.
+    """
+    if not speed > 0:
+        raise ValueError('the speed must be positive: %s' % speed)
+
+    if not fps > 0:
+        raise ValueError('the frame rate must be positive: %s' % fps)
+
+    trace.check(level)
+
+    runtime = level(trace.bytes)
+    steps = 0
+    level_name = trace.level_name or ''
+
+    yield 0.0, render(runtime, level_name, steps)
+
+    for k in itertools.count(1):
+        n = min(math.floor(k * speed / fps), trace.count)
+
+        if n > steps:
+            while steps < n:
+                commands = trace.decode(steps, min(n - steps, CHUNK))
+                advance(runtime, commands)
+                steps += len(commands)
+
+            yield k / fps, render(runtime, level_name, steps)
+
+        if steps == trace.count:
+            break
+
+
+def render(runtime, level_name, steps):
+    """Returns the lines of a screen showing a runtime environment."""
+    level = runtime.level
+    solved_status = 'Solved' if runtime.completed else 'Unsolved'
+
+    lines = [
+        '%s    %s    Steps %d' % (level_name, solved_status, steps),
+        'Points %d/%d    (%d now)    Bytes %d/%d' % (runtime.max_points, level.points, runtime.current_points, runtime.bytes, level.max_bytes),
+        ''
+    ]
+
+    for row in runtime.grid():
+        lines.append(' '.join(row))
+
+    return lines
+
+
+def size(level):
+    """Returns the width and height of the screens of a level."""
+    return max(2 * level.ncols - 1, MIN_WIDTH), 3 + level.nrows
+
+
+def write_asciicast(file, frames, *, width, height, title=None):
+    """Writes frames, as yielded by frames, to a text file in the asciicast v2
+    format and returns the number written.
+    """
+    header = {'version': 2, 'width': width, 'height': height}
+    if title is not None:
+        header['title'] = title
+
+    file.write(json.dumps(header) + '\n')
+
+    n = 0
+    for seconds, lines in frames:
+        file.write(json.dumps([round(seconds, 6), 'o', CLEAR + '\r\n'.join(lines)]) + '\n')
+        n += 1
+
+    return n
+
+
+def write_frames(directory, frames, *, fps=DEFAULT_FPS):
+    """Writes each frame, as yielded by frames at fps frames per second, to a
+    text file in directory named after the number of the frame, and returns
+    the number written.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    n = 0
+    for seconds, lines in frames:
+        path = os.path.join(directory, '%08d.txt' % round(seconds * fps))
+
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        n += 1
+
+    return n
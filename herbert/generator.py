@@ -0,0 +1,130 @@
+"""Generates random, valid levels and programs for benchmarks and scale tests.
+
+The same arguments and seed always generate the same level or program.
+"""
+import random
+
+from . import compiler
+from .level import EMPTY, GRAY_BUTTON, ROBOT_DIRECTIONS, WALL, WHITE_BUTTON
+from .machine import Machine
+
+
+def generate_level(nrows=25, ncols=25, *, white_buttons=10, gray_buttons=0, walls=0.1, max_wall=5, points=500, max_bytes=20, seed=None):
+    """Returns the text of a level, as read by Level.fromfile.
+
+    walls is the fraction of the spots, roughly, that are covered by walls.
+    Every wall runs horizontally or vertically for 2 to max_wall spots, so that
+    it's a proper wall.
+    """
+    if nrows < 1 or ncols < 1:
+        raise ValueError('a level must have at least one row and one column: %dx%d' % (nrows, ncols))
+
+    if not 0 <= walls < 1:
+        raise ValueError('the fraction of walls must be in the range [0, 1): %s' % walls)
+
+    if max_wall < 2:
+        raise ValueError('a wall must be at least 2 spots long: %d' % max_wall)
+
+    rng = random.Random(seed)
+    grid = [[EMPTY] * ncols for _ in range(nrows)]
+
+    orientations = [o for o, n in (('h', ncols), ('v', nrows)) if n >= 2]
+    nwalls = 0
+    attempts = 0
+
+    while orientations and nwalls < walls * nrows * ncols and attempts < 10 * nrows * ncols:
+        attempts += 1
+        orientation = rng.choice(orientations)
+
+        if orientation == 'h':
+            extent = rng.randint(2, min(max_wall, ncols))
+            r, c = rng.randrange(nrows), rng.randrange(ncols - extent + 1)
+            spots = [(r, c + i) for i in range(extent)]
+        else:
+            extent = rng.randint(2, min(max_wall, nrows))
+            r, c = rng.randrange(nrows - extent + 1), rng.randrange(ncols)
+            spots = [(r + i, c) for i in range(extent)]
+
+        for r, c in spots:
+            if grid[r][c] != WALL:
+                grid[r][c] = WALL
+                nwalls += 1
+
+    empty = [(r, c) for r in range(nrows) for c in range(ncols) if grid[r][c] == EMPTY]
+    needed = 1 + white_buttons + gray_buttons
+
+    if len(empty) < needed:
+        raise ValueError('there is only room for %d of the robot and %d buttons' % (len(empty), needed - 1))
+
+    spots = rng.sample(empty, needed)
+
+    r, c = spots[0]
+    grid[r][c] = rng.choice(ROBOT_DIRECTIONS)
+
+    for r, c in spots[1:1 + white_buttons]:
+        grid[r][c] = WHITE_BUTTON
+
+    for r, c in spots[1 + white_buttons:]:
+        grid[r][c] = GRAY_BUTTON
+
+    return ''.join(''.join(row) + '\n' for row in grid) + '%d\n%d' % (points, max_bytes)
+
+
+def generate_program(length=1000, *, depth=10, nesting=1, seed=None):
+    """Returns the source code of a program that outputs exactly length
+    commands.
+
+    The main procedure recurses depth times, not in tail position, so that
+    every call stays on the stack, and passes itself an argument that nests
+    nesting calls of other procedures. The main line calls it as many times as
+    fit in length and makes up the difference with commands.
+    """
+    if length < 1:
+        raise ValueError('the length must be at least 1: %d' % length)
+
+    if depth < 1:
+        raise ValueError('the depth must be at least 1: %d' % depth)
+
+    if not 0 <= nesting < len(compiler.PNAMES):
+        raise ValueError('the nesting must be in the range [0, %d): %d' % (len(compiler.PNAMES), nesting))
+
+    rng = random.Random(seed)
+    names = sorted(compiler.PNAMES)
+    main, helpers = names[0], names[1:nesting + 1]
+
+    # a(A,B):<commands>a(A-1,<argument>)B
+    #
+    # where the argument is <commands>B when nesting is 0 and otherwise nests
+    # calls of the helpers, e.g. <commands>b(<commands>c(<commands>B)).
+    argument = _commands(rng) + 'B'
+    for helper in reversed(helpers):
+        argument = '%s%s(%s)' % (_commands(rng), helper, argument)
+
+    lines = ['%s(A,B):%s%s(A-1,%s)B' % (main, _commands(rng), main, argument)]
+    for helper in helpers:
+        lines.append('%s(A):%sA' % (helper, _commands(rng)))
+
+    call = '%s(%d,%s)' % (main, depth, _commands(rng))
+    n = _count('\n'.join(lines + [call]), length)
+
+    if n > length:
+        raise ValueError('a call with a depth of %d outputs more than %d commands' % (depth, length))
+
+    rest = length - (length // n) * n
+    lines.append(call * (length // n) + ''.join(rng.choice(sorted(compiler.COMMANDS)) for _ in range(rest)))
+
+    return '\n'.join(lines)
+
+
+def _commands(rng, lo=1, hi=3):
+    return ''.join(rng.choice(sorted(compiler.COMMANDS)) for _ in range(rng.randint(lo, hi)))
+
+
+def _count(source_code, limit):
+    # The number of commands output by the program, up to limit + 1
+    n = 0
+    for _ in Machine(compiler.compile(source_code)):
+        n += 1
+        if n > limit:
+            break
+    return n
@@ -0,0 +1,643 @@
+"""Shrinks a program that solves a level while it keeps solving it.
+
+Since a solved level earns (points * max_bytes) // bytes, every byte saved is
+worth points. Starting from a solving program, the program is rewritten in
+each of the ways below that saves bytes:
+
+- delete: drop one or two instructions in a row, a procedure, or turns that
+  add up to fewer, like lll for r;
+- inline: replace the calls of a procedure without parameters by its body;
+- outline: move a sequence that's repeated into a new procedure, or replace
+  it by a call of a procedure that has it as its body;
+- merge: merge calls of a counting procedure in a row, like a(2)a(3) into
+  a(5), procedures that are the same but for their names, and counting
+  procedures into ones that go on forever, like a(A):sa(A-1) into a:sa;
+- parameterise: replace a sequence repeated in a row, like ssss, by a call of
+  a counting procedure, like a(4) with a(A):sa(A-1), or, when nothing comes
+  after it, of one that repeats it forever, like a with a:sa.
+
+A rewrite doesn't have to do the same as the program, only be likely to, since
+every candidate is run against the level, smallest first, in a pool of
+processes. The smallest that still solves it takes the program's place and
+the rewrites start over, until none does. Whether each candidate solves the
+level is cached, so a candidate reached again is never run twice.
+
+Only the top level sequences of the procedures and of the main line are
+rewritten, not those passed as arguments.
+"""
+import collections
+import concurrent.futures
+import os
+
+from . import compiler, solver
+from .constants import DEFAULT_MAX_STEPS
+from .error import SyntaxError
+from .level import calculate_score
+from .machine import CALL, COMMAND, EXPR, PARAM, SEXPR, VAR
+
+
+# The number of candidates a worker runs at a time
+BATCH_SIZE = 16
+
+NAMES = sorted(compiler.PNAMES)
+
+
+def golf(level, source_code, *, max_steps=DEFAULT_MAX_STEPS, workers=None, cache=None, progress=None):
+    """Returns a solver.Solution with the smallest program found that solves
+    level, in at most max_steps commands, by rewriting source_code, or None if
+    source_code doesn't solve level.
+
+    If workers is 1 then the candidates are run in this process, otherwise in
+    a pool of that many processes, by default one per CPU. cache, if given, is
+    a dict of source code to whether it solves level, which can be shared by
+    calls for the same level and max_steps. progress, if given, is called with
+    the number of bytes and the number of candidates run so far every time a
+    smaller program is found.
+    """
+    if cache is None:
+        cache = {}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    program = compiler.compile(source_code)
+    source_code = source_code.strip()
+
+    if not _solves_cached(level, source_code, max_steps, cache):
+        return None
+
+    current = parse(program)
+    nbytes = program.bytes
+    searched = 0
+
+    executor = None
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(level, max_steps))
+
+    try:
+        while True:
+            candidates = _candidates(current, nbytes, cache)
+
+            if executor is None:
+                found, n = _search(level, candidates, max_steps, cache)
+            else:
+                found, n = _search_in_parallel(executor, 2 * workers, candidates, cache)
+
+            searched += n
+
+            if found is None:
+                break
+
+            current = found
+            source_code = format(found)
+            nbytes = size(found)
+
+            if progress is not None:
+                progress(nbytes, searched)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    total_buttons = len(level.white_buttons)
+    points = calculate_score(level.points, level.max_bytes, total_buttons, total_buttons, nbytes)
+
+    return solver.Solution(source_code, nbytes, points, searched)
+
+
+def parse(program):
+    """Returns a compiled Program as the tuple of its procedures, each a tuple
+    of name, parameters and body, and its main line.
+    """
+    procedures = tuple((p.name, p.params, p.body) for p in program.procedures.values())
+    return procedures, program.main
+
+
+def format(program):
+    """Returns the source code of a program as returned by parse."""
+    procedures, main = program
+    lines = []
+
+    for name, params, body in procedures:
+        header = '%s(%s)' % (name, ','.join(params)) if params else name
+        lines.append('%s:%s' % (header, _format_seq(body)))
+
+    lines.append(_format_seq(main))
+
+    return '\n'.join(lines)
+
+
+def _format_seq(seq):
+    return ''.join(map(_format_instr, seq))
+
+
+def _format_instr(instr):
+    if instr[0] != CALL:
+        return instr[1]
+
+    _, name, args = instr
+
+    if not args:
+        return name
+
+    return '%s(%s)' % (name, ','.join(map(_format_arg, args)))
+
+
+def _format_arg(arg):
+    kind, value = arg
+
+    if kind == VAR:
+        return value
+
+    if kind == SEXPR:
+        return _format_seq(value)
+
+    text = ''
+    for i, (sign, term) in enumerate(value):
+        if sign < 0:
+            text += '-'
+        elif i:
+            text += '+'
+        text += str(term)
+
+    return text
+
+
+def size(program):
+    """Returns the number of bytes of a program as returned by parse, as the
+    compiler counts them.
+    """
+    procedures, main = program
+    return sum(1 + len(params) + _seq_size(body) for _, params, body in procedures) + _seq_size(main)
+
+
+def _seq_size(seq):
+    return sum(map(_instr_size, seq))
+
+
+def _instr_size(instr):
+    if instr[0] != CALL:
+        return 1
+    return 1 + sum(map(_arg_size, instr[2]))
+
+
+def _arg_size(arg):
+    kind, value = arg
+
+    if kind == VAR:
+        return 1
+
+    if kind == SEXPR:
+        return _seq_size(value)
+
+    return len(value)
+
+
+def rewrites(program):
+    """Yields the programs that a rewrite of program gives, which may be no
+    smaller.
+    """
+    yield from _deletions(program)
+    yield from _inlines(program)
+    yield from _outlines(program)
+    yield from _merges(program)
+    yield from _parameterisations(program)
+
+
+def _candidates(program, nbytes, cache):
+    # Returns the source code and program of the rewrites of program that are
+    # smaller than nbytes, smallest first, up to the first known to solve the
+    # level and leaving out those known not to
+    sizes = {}
+
+    for rewrite in rewrites(program):
+        n = size(rewrite)
+
+        if n < nbytes:
+            sizes.setdefault(format(rewrite), (n, rewrite))
+
+    candidates = []
+
+    for source_code, (_, rewrite) in sorted(sizes.items(), key=lambda item: item[1][0]):
+        solves = cache.get(source_code)
+
+        if solves is None:
+            candidates.append((source_code, rewrite))
+        elif solves:
+            candidates.append((source_code, rewrite))
+            break
+
+    return candidates
+
+
+# Sequences
+
+def _seqs(program):
+    # The top level sequences of program: the bodies, then the main line
+    procedures, main = program
+    return [body for _, _, body in procedures] + [main]
+
+
+def _with_seqs(program, seqs):
+    procedures, _ = program
+    return tuple((name, params, body) for (name, params, _), body in zip(procedures, seqs)), seqs[-1]
+
+
+def _with_seq(program, i, seq):
+    seqs = _seqs(program)
+    seqs[i] = seq
+    return _with_seqs(program, seqs)
+
+
+def _expand(seq, f):
+    # Returns seq, and the sequences passed in its calls, with every
+    # instruction replaced by the sequence f returns for it
+    result = []
+
+    for instr in seq:
+        if instr[0] == CALL:
+            _, name, args = instr
+            instr = (CALL, name, tuple((SEXPR, _expand(arg[1], f)) if arg[0] == SEXPR else arg for arg in args))
+
+        result.extend(f(instr))
+
+    return tuple(result)
+
+
+def _calls(seq, name):
+    # Returns True iff seq, or a sequence passed in it, calls the procedure
+    found = []
+
+    def f(instr):
+        if instr[0] == CALL and instr[1] == name:
+            found.append(instr)
+        return (instr,)
+
+    _expand(seq, f)
+    return bool(found)
+
+
+def _closed(instr):
+    # Returns True iff instr doesn't refer to parameters, so that it does the
+    # same wherever it is
+    if instr[0] == COMMAND:
+        return True
+
+    if instr[0] == PARAM:
+        return False
+
+    for kind, value in instr[2]:
+        if kind == VAR:
+            return False
+        if kind == SEXPR and not all(map(_closed, value)):
+            return False
+        if kind == EXPR and any(isinstance(term, str) for _, term in value):
+            return False
+
+    return True
+
+
+def _replace_runs(seq, pattern, replacement):
+    # Returns seq with every occurrence of pattern, taken from the left,
+    # replaced by replacement, and the number replaced
+    result = []
+    n = len(pattern)
+    i = count = 0
+
+    while i < len(seq):
+        if seq[i:i + n] == pattern:
+            result.extend(replacement)
+            i += n
+            count += 1
+        else:
+            result.append(seq[i])
+            i += 1
+
+    return tuple(result), count
+
+
+def _new_name(program):
+    used = {name for name, _, _ in program[0]}
+
+    for name in NAMES:
+        if name not in used:
+            return name
+
+    return None
+
+
+def _counter_body(name, seq):
+    # The body of a(A):Xa(A-1), for X the sequence
+    return tuple(seq) + ((CALL, name, ((EXPR, ((1, 'A'), (-1, 1))),)),)
+
+
+def _is_counter(name, params, body):
+    # Returns True iff the procedure is like a(A):Xa(A-1), which repeats X
+    # the number of times it's called with
+    pattern = body[:-1]
+    return params == ('A',) and len(body) > 1 and body == _counter_body(name, pattern) and all(map(_closed, pattern)) and not _calls(pattern, name)
+
+
+def _number(arg):
+    # Returns the positive number arg is, or None
+    if arg[0] == EXPR and len(arg[1]) == 1:
+        sign, term = arg[1][0]
+        if sign > 0 and isinstance(term, int) and term > 0:
+            return term
+    return None
+
+
+# Rewrites
+
+_TURNS = {'l': -1, 'r': 1}
+_CANONICAL_TURNS = ['', 'r', 'rr', 'l']
+
+
+def _deletions(program):
+    procedures, _ = program
+
+    for i, seq in enumerate(_seqs(program)):
+        for n in (1, 2):
+            if len(seq) > n:
+                for j in range(len(seq) - n + 1):
+                    yield _with_seq(program, i, seq[:j] + seq[j + n:])
+
+        # Turns in a row that add up to fewer
+        j = 0
+        while j < len(seq):
+            k = j
+            while k < len(seq) and seq[k][0] == COMMAND and seq[k][1] in _TURNS:
+                k += 1
+
+            if k > j:
+                turns = _CANONICAL_TURNS[sum(_TURNS[instr[1]] for instr in seq[j:k]) % 4]
+                replacement = tuple((COMMAND, turn) for turn in turns)
+
+                if len(replacement) < k - j and (replacement or len(seq) > k - j):
+                    yield _with_seq(program, i, seq[:j] + replacement + seq[k:])
+
+            j = k + 1
+
+    for k in range(len(procedures)):
+        yield procedures[:k] + procedures[k + 1:], program[1]
+
+
+def _inlines(program):
+    procedures, _ = program
+
+    for k, (name, params, body) in enumerate(procedures):
+        if not params and not _calls(body, name):
+            def f(instr):
+                if instr[0] == CALL and instr[1] == name and not instr[2]:
+                    return body
+                return (instr,)
+        elif _is_counter(name, params, body):
+            # A call with a number repeats the sequence that many times
+            def f(instr):
+                if instr[0] == CALL and instr[1] == name and _number(instr[2][0]) is not None:
+                    return body[:-1] * _number(instr[2][0])
+                return (instr,)
+        else:
+            continue
+
+        seqs = [_expand(seq, f) for seq in _seqs(program)]
+        rest = seqs[:k] + seqs[k + 1:]
+
+        if any(_calls(seq, name) for seq in rest):
+            yield _with_seqs(program, seqs[:k] + [body] + rest)
+        else:
+            yield _with_seqs((procedures[:k] + procedures[k + 1:], program[1]), rest)
+
+
+def _outlines(program):
+    procedures, _ = program
+    seqs = _seqs(program)
+
+    # Sequences that are the body of a procedure without parameters
+    for k, (name, params, body) in enumerate(procedures):
+        if not params and len(body) > 1:
+            replaced = [seq if i == k else _replace_runs(seq, body, ((CALL, name, ()),))[0] for i, seq in enumerate(seqs)]
+            yield _with_seqs(program, replaced)
+
+    name = _new_name(program)
+    if name is None:
+        return
+
+    # Every sequence of at least 2 instructions that don't refer to
+    # parameters, along with the number of times it occurs
+    counts = collections.Counter()
+
+    for seq in seqs:
+        for i in range(len(seq)):
+            j = i
+            while j < len(seq) and _closed(seq[j]):
+                j += 1
+                if j - i >= 2:
+                    counts[seq[i:j]] += 1
+
+    for pattern, count in counts.items():
+        if count < 2:
+            continue
+
+        n = _seq_size(pattern)
+        call = ((CALL, name, ()),)
+
+        replaced = []
+        total = 0
+        for seq in seqs:
+            seq, k = _replace_runs(seq, pattern, call)
+            replaced.append(seq)
+            total += k
+
+        if total >= 2 and total * n > 1 + n + total:
+            rewritten, main = _with_seqs(program, replaced)
+            yield rewritten + ((name, (), pattern),), main
+
+
+def _merges(program):
+    procedures, _ = program
+
+    # Calls of a procedure with a number in a row
+    for i, seq in enumerate(_seqs(program)):
+        for j in range(len(seq) - 1):
+            first, second = seq[j], seq[j + 1]
+
+            if first[0] == CALL and second[0] == CALL and first[1] == second[1] and len(first[2]) == len(second[2]) == 1:
+                m, n = _number(first[2][0]), _number(second[2][0])
+
+                if m is not None and n is not None:
+                    merged = (CALL, first[1], ((EXPR, ((1, m + n),)),))
+                    yield _with_seq(program, i, seq[:j] + (merged,) + seq[j + 2:])
+
+    # Counting procedures that can go on forever
+    for k, (name, params, body) in enumerate(procedures):
+        if not _is_counter(name, params, body):
+            continue
+
+        def f(instr):
+            if instr[0] == CALL and instr[1] == name:
+                return ((CALL, name, ()),)
+            return (instr,)
+
+        seqs = [_expand(seq, f) for seq in _seqs(program)]
+        rewritten, main = _with_seqs(program, seqs)
+        yield rewritten[:k] + ((name, (), seqs[k]),) + rewritten[k + 1:], main
+
+    # Procedures that are the same but for their names
+    for k, (name, params, body) in enumerate(procedures):
+        for other, other_params, other_body in procedures[:k]:
+            if params != other_params:
+                continue
+
+            def f(instr):
+                if instr[0] == CALL and instr[1] == name:
+                    return ((CALL, other, instr[2]),)
+                return (instr,)
+
+            if _expand(body, f) == other_body:
+                seqs = _seqs(program)
+                del seqs[k]
+                rest = procedures[:k] + procedures[k + 1:], program[1]
+
+                yield _with_seqs(rest, [_expand(seq, f) for seq in seqs])
+                break
+
+
+def _parameterisations(program):
+    procedures, _ = program
+    name = _new_name(program)
+
+    # The counting procedures, by the sequence they repeat
+    counters = {}
+    for other, params, body in procedures:
+        if _is_counter(other, params, body):
+            counters.setdefault(body[:-1], other)
+
+    for i, seq in enumerate(_seqs(program)):
+        for length in range(1, len(seq) // 2 + 1):
+            for j in range(len(seq) - 2 * length + 1):
+                pattern = seq[j:j + length]
+
+                if not all(map(_closed, pattern)) or seq[j + length:j + 2 * length] != pattern:
+                    continue
+
+                if j >= length and seq[j - length:j] == pattern:
+                    # Not the start of the run
+                    continue
+
+                n = 2
+                while seq[j + n * length:j + (n + 1) * length] == pattern:
+                    n += 1
+
+                rest = seq[j + n * length:]
+                counter = counters.get(pattern)
+
+                if counter is not None:
+                    yield _with_seq(program, i, seq[:j] + ((CALL, counter, ((EXPR, ((1, n),)),)),) + rest)
+
+                if name is None:
+                    continue
+
+                if counter is None:
+                    rewritten, main = _with_seq(program, i, seq[:j] + ((CALL, name, ((EXPR, ((1, n),)),)),) + rest)
+                    yield rewritten + ((name, ('A',), _counter_body(name, pattern)),), main
+
+                if not rest:
+                    # Nothing comes after the run, so it can go on forever
+                    rewritten, main = _with_seq(program, i, seq[:j] + ((CALL, name, ()),))
+                    yield rewritten + ((name, (), pattern + ((CALL, name, ()),)),), main
+
+
+# Running candidates
+
+def _solves(level, source_code, max_steps):
+    try:
+        return solver.solves(level, source_code, max_steps)
+    except SyntaxError:
+        return False
+
+
+def _solves_cached(level, source_code, max_steps, cache):
+    try:
+        return cache[source_code]
+    except KeyError:
+        result = cache[source_code] = _solves(level, source_code, max_steps)
+        return result
+
+
+def _search(level, candidates, max_steps, cache):
+    # Returns the first of the candidates, pairs of source code and program,
+    # that solves level, or None, and the number of candidates run
+    searched = 0
+
+    for source_code, program in candidates:
+        if source_code not in cache:
+            searched += 1
+
+        if _solves_cached(level, source_code, max_steps, cache):
+            return program, searched
+
+    return None, searched
+
+
+def _search_in_parallel(executor, limit, candidates, cache):
+    # Like _search, with batches of candidates run by the executor, at most
+    # limit at a time, and taken in order so that the same one is found
+    pending = collections.deque()
+    searched = 0
+    start = 0
+
+    def submit():
+        nonlocal start
+
+        batch = []
+        while start < len(candidates) and len(batch) < BATCH_SIZE:
+            source_code, program = candidates[start]
+            batch.append((source_code, program, cache.get(source_code)))
+            start += 1
+
+        if batch:
+            pending.append((batch, executor.submit(_run_batch, [source_code for source_code, _, solves in batch if solves is None])))
+
+    for _ in range(limit):
+        submit()
+
+    while pending:
+        batch, future = pending.popleft()
+        results = iter(future.result())
+
+        for source_code, program, solves in batch:
+            if solves is None:
+                # The worker stops at the first that solves the level, which
+                # is returned before the results run out
+                solves = next(results)
+                searched += 1
+                cache[source_code] = solves
+
+            if solves:
+                for _, future in pending:
+                    future.cancel()
+                return program, searched
+
+        submit()
+
+    return None, searched
+
+
+def _init_worker(level, max_steps):
+    global _level, _max_steps
+    _level = level
+    _max_steps = max_steps
+
+
+def _run_batch(batch):
+    # Returns whether each candidate solves the level, up to the first that
+    # does
+    results = []
+
+    for source_code in batch:
+        results.append(_solves(_level, source_code, _max_steps))
+
+        if results[-1]:
+            break
+
+    return results
@@ -0,0 +1,113 @@
+"""Phase timings and event counts of runs, for the applications that host them.
+
+judge.judge gathers a Stats for every program it judges and hands it to the
+hooks that have subscribed, in the process that judged the program:
+
+    @instrumentation.subscribe
+    def record(stats):
+        ...
+"""
+import contextlib
+import time
+
+
+# The phases of a run, in order. Programs are parsed and their bytes counted in
+# a single pass, so compile covers both.
+PHASES = ('load', 'compile', 'setup', 'simulate', 'hash')
+
+# The events counted during a run
+EVENTS = ('commands', 'blocked', 'white_presses', 'gray_presses')
+
+
+class Stats:
+    def __init__(self, timings=None, counters=None):
+        self.timings = {} if timings is None else timings      # phase -> seconds
+        self.counters = {} if counters is None else counters   # event -> count
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+    def count(self, event, n=1):
+        self.counters[event] = self.counters.get(event, 0) + n
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def asdict(self):
+        return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+    @classmethod
+    def fromdict(cls, d):
+        return cls(dict(d['timings']), dict(d['counters']))
+
+    def report(self):
+        lines = []
+
+        for name in _ordered(self.timings, PHASES):
+            lines.append('%-14s %10.3f ms' % (name, 1000 * self.timings[name]))
+        lines.append('%-14s %10.3f ms' % ('total', 1000 * self.total_time))
+
+        for name in _ordered(self.counters, EVENTS):
+            lines.append('%-14s %10d' % (name, self.counters[name]))
+
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Steps a level.RuntimeEnvironment in its place and counts the moves that
+    were blocked and the white and gray buttons stepped on, so that runs that
+    aren't counted don't pay for it.
+    """
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.nblocked = 0
+        self.nwhite_presses = 0
+        self.ngray_presses = 0
+
+    def step(self, command):
+        runtime = self.runtime
+        robot = runtime.robot
+        row, col = robot.row, robot.col
+
+        runtime.step(command)
+
+        if command == 's':
+            pos = robot.row, robot.col
+
+            if pos == (row, col):
+                self.nblocked += 1
+            elif pos in runtime.gray_buttons:
+                self.ngray_presses += 1
+            elif pos in runtime.white_buttons:
+                self.nwhite_presses += 1
+
+
+def _ordered(d, names):
+    return [name for name in names if name in d] + sorted(name for name in d if name not in names)
+
+
+_hooks = []
+
+
+def subscribe(hook):
+    """Calls hook with the Stats of every run from now on. Returns the hook so
+    that it can be used as a decorator.
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def unsubscribe(hook):
+    _hooks.remove(hook)
+
+
+def publish(stats):
+    for hook in list(_hooks):
+        hook(stats)
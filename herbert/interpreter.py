@@ -109,7 +109,7 @@ class Interpreter:
             terms = expr
 
         sum = 0
-        for term in expr:
+        for term in terms:
             if term.type == 'PLUS':
                 sign = 1
             elif term.type == 'MINUS':
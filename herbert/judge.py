@@ -0,0 +1,148 @@
+import hashlib
+import time
+
+from . import cache, instrumentation, runner
+from .error import HerbertError, TimeoutError
+from .scheduler import Scheduler
+
+
+# The number of machine instructions run between checks of the time limit
+TIMEOUT_INSTRUCTIONS = 10000
+
+
+def judge(level, source_code, *, max_steps=runner.DEFAULT_MAX_STEPS, timeout=None, profile=None, stats=None, record=False):
+    """Runs a program against a level and determines the points it earns.
+
+    Raises SyntaxError if the program can't be parsed and a RuntimeError if it
+    fails while running, including a TimeoutError if timeout is given and the
+    run takes more than that many seconds. If profile, a profiler.Profile, is
+    given then the run is profiled into it. If record is True then the
+    judgement has a trace.Trace of the run.
+
+    The time spent in each phase and the events of the run are added to stats,
+    or a new instrumentation.Stats, which is published to the subscribed hooks
+    once the program is judged.
+    """
+    if stats is None:
+        stats = instrumentation.Stats()
+
+    with stats.phase('compile'):
+        program = cache.compile(source_code)
+
+    with stats.phase('setup'):
+        r = runner.Run(level, program, bytes=program.bytes, max_steps=max_steps, profile=profile, record=record, count=True)
+
+    with stats.phase('simulate'):
+        if timeout is None:
+            r.advance()
+        else:
+            deadline = time.monotonic() + timeout
+
+            while not r.advance(instructions=TIMEOUT_INSTRUCTIONS):
+                if time.monotonic() > deadline:
+                    raise TimeoutError('the program ran for more than %g seconds' % timeout)
+
+    return _finish(level, source_code, program, r, stats, record)
+
+
+def judge_all(submissions, *, max_steps=runner.DEFAULT_MAX_STEPS, timeout=None, scheduler=None):
+    """Judges many programs in one process, taking turns to run them with a
+    scheduler.Scheduler, by default a new one, so that short programs are
+    judged within a few turns however long the others run.
+
+    submissions are (level, source_code, priority) triples. Returns a list
+    with, for each submission in order, its Judgement or the error that
+    judge() would have raised for it. timeout bounds the seconds the turns
+    of each run may take.
+    """
+    if scheduler is None:
+        scheduler = Scheduler()
+
+    judged = []
+
+    for level, source_code, priority in submissions:
+        stats = instrumentation.Stats()
+
+        try:
+            with stats.phase('compile'):
+                program = cache.compile(source_code)
+
+            with stats.phase('setup'):
+                task = scheduler.submit(level, program, priority=priority, timeout=timeout, bytes=program.bytes, max_steps=max_steps, count=True)
+        except (HerbertError, ValueError) as e:
+            judged.append(e)
+        else:
+            judged.append((level, source_code, program, task, stats))
+
+    while scheduler.step() is not None:
+        pass
+
+    for i, job in enumerate(judged):
+        if isinstance(job, Exception):
+            continue
+
+        level, source_code, program, task, stats = job
+        stats.timings['simulate'] = task.elapsed
+
+        if task.error is not None:
+            judged[i] = task.error
+        else:
+            judged[i] = _finish(level, source_code, program, task.run, stats)
+
+    return judged
+
+
+def _finish(level, source_code, program, r, stats, record=False):
+    # Judges a run that has ended and publishes its stats
+    with stats.phase('hash'):
+        program_hash = hash_program(source_code)
+        judgement = Judgement(program_hash, program.bytes, r.result(), stats)
+
+    if record:
+        from .trace import hash_level
+
+        judgement.trace = r.trace(
+            level_name=getattr(level, 'name', None),
+            level_hash=hash_level(level),
+            program_hash=program_hash,
+            bytes=program.bytes
+        )
+
+    counter = r.counter
+    stats.count('commands', r.steps)
+    stats.count('blocked', counter.nblocked)
+    stats.count('white_presses', counter.nwhite_presses)
+    stats.count('gray_presses', counter.ngray_presses)
+
+    instrumentation.publish(stats)
+
+    return judgement
+
+
+def hash_program(source_code):
+    return hashlib.sha256(source_code.strip().encode('utf-8')).hexdigest()
+
+
+class Judgement:
+    def __init__(self, program_hash, bytes, result, stats=None):
+        self.program_hash = program_hash
+        self.bytes = bytes
+        self.result = result
+        self.stats = stats
+        self.trace = None
+
+    @property
+    def points(self):
+        return self.result.points
+
+    @property
+    def max_npressed(self):
+        return self.result.max_npressed
+
+    @property
+    def total_buttons(self):
+        return self.result.runtime.total_buttons
+
+    @property
+    def completed(self):
+        return self.result.completed
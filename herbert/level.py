@@ -59,7 +59,7 @@ class Level:
         self.ncols = ncols
         self._parse(field)
 
-    def __call__(self):
+    def __call__(self, bytes=None):
         white_buttons = {}
         for r, c in self.white_buttons:
             white_buttons[(r, c)] = WhiteButton(r, c)
@@ -70,7 +70,7 @@ class Level:
 
         robot = Robot(*self.robot)
 
-        return RuntimeEnvironment(self, robot, gray_buttons, white_buttons)
+        return RuntimeEnvironment(self, robot, gray_buttons, white_buttons, bytes)
 
     def _parse(self, field):
         # Step 1: Convert the field to a grid
@@ -277,7 +277,7 @@ class WhiteButton:
 
 
 class RuntimeEnvironment:
-    def __init__(self, level, robot, gray_buttons, white_buttons):
+    def __init__(self, level, robot, gray_buttons, white_buttons, bytes=None):
         self.level = level
         self.robot = robot
         self.gray_buttons = gray_buttons
@@ -286,6 +286,15 @@ class RuntimeEnvironment:
         self.npressed = 0       # the number of white buttons pressed
         self.max_npressed = 0   # the maximum number of white buttons pressed
         self.completed = False  # True iff all the white buttons have been pressed
+        self._shared_trail = False  # True iff a snapshot shares the robot's trail
+
+        # When the size of the program is known the points are kept up to date
+        # as buttons are pressed, otherwise they remain None
+        self.bytes = bytes
+        self.current_points = None
+        self.max_points = None
+        if bytes is not None:
+            self._update_points()
 
     def step(self, command):
         if command == 's':
@@ -297,7 +306,10 @@ class RuntimeEnvironment:
                 if pos in self.gray_buttons:
                     self.gray_buttons[pos].press()
                     self.npressed = 0
-                elif pos in self.white_buttons:
+
+                    if self.bytes is not None:
+                        self._update_points()
+                elif pos in self.white_buttons and not self.white_buttons[pos].pressed:
                     self.white_buttons[pos].press()
                     self.npressed += 1
                     if self.npressed > self.max_npressed:
@@ -305,6 +317,9 @@ class RuntimeEnvironment:
 
                     if not self.completed and self.white_buttons and self.npressed == self.total_buttons:
                         self.completed = True
+
+                    if self.bytes is not None:
+                        self._update_points()
         elif command == 'l':
             self.robot.turn_left()
         elif command == 'r':
@@ -312,9 +327,56 @@ class RuntimeEnvironment:
         else:
             raise ValueError('not a command: %s' % command)
 
+    def snapshot(self):
+        robot = self.robot
+        self._shared_trail = True
+
+        return (
+            robot.row, robot.col, robot.heading, robot.trail, len(robot.trail),
+            tuple(white_button.pressed for white_button in self.white_buttons.values()),
+            self.npressed, self.max_npressed, self.completed,
+            self.current_points, self.max_points
+        )
+
+    def restore(self, snapshot):
+        """Puts the runtime environment back in the state it was in when
+        snapshot was taken, earlier or later, in the same run.
+        """
+        robot = self.robot
+
+        (
+            robot.row, robot.col, robot.heading, trail, ntrail,
+            pressed,
+            self.npressed, self.max_npressed, self.completed,
+            self.current_points, self.max_points
+        ) = snapshot
+
+        # The trail is only ever appended to, so the snapshot shares it and
+        # restoring copies the part that was there at the time. Every trail of
+        # a run is a prefix of the same one, so once the robot has a trail that
+        # no snapshot shares it's cut back, or topped up, in place instead.
+        current = robot.trail
+
+        if self._shared_trail:
+            robot.trail = trail[:ntrail]
+            self._shared_trail = False
+        elif len(current) >= ntrail:
+            del current[ntrail:]
+        else:
+            current.extend(trail[len(current):ntrail])
+
+        for white_button, p in zip(self.white_buttons.values(), pressed):
+            white_button.pressed = p
+
     def score(self, bytes):
         return calculate_score(self.level.points, self.level.max_bytes, self.total_buttons, self.npressed, bytes)
 
+    def _update_points(self):
+        self.current_points = self.score(self.bytes)
+
+        if self.max_points is None or self.current_points > self.max_points:
+            self.max_points = self.current_points
+
     def grid(self):
         new_grid = []
 
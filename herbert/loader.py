@@ -0,0 +1,71 @@
+import os
+
+from . import cache
+from .error import LevelError, ProgramError, SyntaxError, TraceError
+from .level import Level
+from .machine import Machine
+from .util import cachedmethod
+
+
+SYNTAX_ERROR_MESSAGE = 'Sorry, we were unable to parse the program due to a syntax error.'
+
+
+def load_level(file):
+    try:
+        level = Level.fromfile(file)
+    except ValueError as e:
+        raise LevelError('Sorry, we were unable to parse the level: %s.' % e) from e
+    except OSError as e:
+        raise LevelError('Sorry, we were unable to operate on the level file.') from e
+    except:
+        raise LevelError('Sorry, an unexpected error occurred while accessing the level file.')
+    else:
+        level.name = os.path.splitext(os.path.basename(file.name))[0]
+        return level
+
+
+def load_program(file):
+    source_code = read_program(file)
+
+    try:
+        return Program(source_code)
+    except SyntaxError as e:
+        raise ProgramError(SYNTAX_ERROR_MESSAGE) from e
+
+
+def read_program(file):
+    try:
+        return file.read()
+    except OSError as e:
+        raise ProgramError('Sorry, we were unable to operate on the program file.') from e
+    except:
+        raise ProgramError('Sorry, an unexpected error occurred while accessing the program file.')
+
+
+def load_trace(file):
+    from .trace import Trace
+
+    try:
+        return Trace.fromfile(file)
+    except TraceError as e:
+        raise TraceError('Sorry, we were unable to read the trace: %s.' % e) from e
+    except OSError as e:
+        raise TraceError('Sorry, we were unable to operate on the trace file.') from e
+    except:
+        raise TraceError('Sorry, an unexpected error occurred while accessing the trace file.')
+
+
+class Program:
+    def __init__(self, source_code):
+        self.code = cache.compile(source_code)
+        self.source_code = source_code
+
+    def bytes(self):
+        return self.code.bytes
+
+    @cachedmethod
+    def lines(self):
+        return self.source_code.split('\n')
+
+    def commands(self):
+        return Machine(self.code)
@@ -0,0 +1,525 @@
+import numbers
+
+from .counter import count_bytes
+from .error import LookupError, RecursionError, TypeError
+from .interpreter import Deferred
+from .util import pluralize
+
+
+# The most instructions a machine runs without outputting a command, after
+# which it gives up with a RecursionError. The interpreter gave up on programs
+# like a(A):a(A+1) when Python ran out of stack but a machine never does.
+MAX_IDLE = 100000
+
+# Instructions
+
+COMMAND = 0
+PARAM = 1
+CALL = 2
+
+# Arguments
+
+VAR = 0
+SEXPR = 1
+EXPR = 2
+
+
+def compile(parse_tree):
+    """Compiles a parse tree into a Program that a Machine can execute.
+
+    A sequence is compiled into a tuple of instructions:
+
+    (COMMAND, 's' | 'l' | 'r')
+    (PARAM, name)
+    (CALL, name, (arg, ...))
+
+    where each arg is one of (VAR, name), (SEXPR, sequence) or (EXPR, terms)
+    and terms is a tuple of (sign, value) pairs whose value is either an int or
+    the name of a parameter.
+    """
+    assert parse_tree.data == 'h'
+
+    *pdefs, main = parse_tree.children
+
+    assert main.data == 'main'
+
+    procedures = {}
+    for pdef in pdefs:
+        procedure = _compile_pdef(pdef)
+        procedures.setdefault(procedure.name, procedure)
+
+    return Program(procedures, _compile_seq(main.children), count_bytes(parse_tree))
+
+
+def _compile_pdef(pdef):
+    assert pdef.data == 'pdef'
+
+    try:
+        name, params, body = pdef.children
+    except ValueError:
+        name, body = pdef.children
+        params = ()
+    else:
+        assert params.data == 'params'
+        params = tuple(map(str, params.children))
+
+    assert name.type == 'PNAME'
+    assert body.data == 'body'
+
+    return Procedure(str(name), params, _compile_seq(body.children))
+
+
+def _compile_seq(seq):
+    return tuple(map(_compile_instr, seq))
+
+
+def _compile_instr(x):
+    if hasattr(x, 'type'):
+        if x.type == 'PARAM':
+            return (PARAM, str(x))
+
+        assert x.type == 'COMMAND'
+        return (COMMAND, str(x))
+
+    assert x.data == 'pcall'
+
+    try:
+        name, args = x.children
+    except ValueError:
+        name = x.children[0]
+        args = ()
+    else:
+        assert args.data == 'args'
+        args = tuple(map(_compile_arg, args.children))
+
+    return (CALL, str(name), args)
+
+
+def _compile_arg(arg):
+    if arg.data == 'var':
+        return (VAR, str(arg.children[0]))
+
+    if arg.data == 'sexpr':
+        return (SEXPR, _compile_seq(arg.children))
+
+    assert arg.data == 'expr'
+
+    terms = []
+    sign = 1
+
+    for term in arg.children:
+        if term.type == 'NEG' or term.type == 'MINUS':
+            sign = -1
+        elif term.type == 'PLUS':
+            sign = 1
+        elif term.type == 'NUM':
+            terms.append((sign, int(str(term))))
+        else:
+            assert term.type == 'PARAM'
+            terms.append((sign, str(term)))
+
+    return (EXPR, tuple(terms))
+
+
+class Program:
+    def __init__(self, procedures, main, bytes):
+        self.procedures = procedures
+        self.main = main
+        self.bytes = bytes  # the size of the program, see counter.count_bytes
+
+
+class Procedure:
+    def __init__(self, name, params, body):
+        self.name = name
+        self.params = params
+        self.body = body
+
+
+class Machine:
+    """Executes a compiled Program one command at a time.
+
+    Unlike the Interpreter, the state of the computation is kept in an explicit
+    stack of frames, [sequence, pc, bindings], rather than in a chain of nested
+    generators. Calls and deferred arguments in tail position replace the
+    current frame so that programs like a:sa run in constant space and the
+    continuation can be inspected, see continuation().
+
+    on_call, if given, is called with the machine every time a procedure is
+    entered.
+
+    instructions counts the instructions run, every command, parameter and
+    call and every return from the end of a sequence. Running more than
+    max_idle of them without outputting a command raises a RecursionError, and
+    once instructions reaches pause_at, if it's set, next() raises Paused and
+    the machine can be resumed later.
+
+    peek() runs ahead to the next command and keeps it for next() to return.
+    """
+
+    def __init__(self, program, on_call=None, max_idle=MAX_IDLE):
+        self.program = program
+        self.on_call = on_call
+        self.max_idle = max_idle
+        self.instructions = 0
+        self.pause_at = None
+        self._last = 0  # the value of instructions when the last command was output
+        self._peeked = None  # the command peek() ran ahead to, if any
+        self._stack = [[program.main, 0, {}]]
+
+    @property
+    def depth(self):
+        return len(self._stack)
+
+    def continuation(self):
+        return Continuation(tuple((seq, pc, env) for seq, pc, env in self._stack))
+
+    def restore(self, continuation):
+        """Puts the machine back in the state it was in when continuation was
+        taken. Bindings are never mutated so they can be shared.
+        """
+        self._stack = [list(frame) for frame in continuation.frames]
+        self._last = self.instructions
+        self._peeked = None
+
+    def peek(self):
+        """Returns the command that next() will return, or None if the program
+        has ended, without returning it from next() yet.
+
+        Like next(), it raises a RuntimeError if the program fails or Paused.
+        """
+        if self._peeked is None:
+            try:
+                self._peeked = next(self)
+            except StopIteration:
+                return None
+
+        return self._peeked
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._peeked is not None:
+            command, self._peeked = self._peeked, None
+            return command
+
+        stack = self._stack
+        count = self.instructions
+
+        stop = self._last + self.max_idle
+        if self.pause_at is not None and self.pause_at < stop:
+            stop = self.pause_at
+
+        while stack:
+            if count >= stop:
+                self._stop(count)
+
+            count += 1
+            frame = stack[-1]
+            seq, pc, env = frame
+            n = len(seq)
+
+            if pc == n:
+                stack.pop()
+                continue
+
+            instr = seq[pc]
+            pc += 1
+            frame[1] = pc
+            kind = instr[0]
+
+            if kind == COMMAND:
+                self.instructions = self._last = count
+                return instr[1]
+
+            if kind == PARAM:
+                name = instr[1]
+                value = _lookup(env, name)
+
+                if isinstance(value, Deferred):
+                    if pc == n:
+                        stack.pop()
+                    stack.append([value.seq, 0, value.env])
+                else:
+                    assert isinstance(value, numbers.Integral)
+                    if n == 1:
+                        self.instructions = self._last = count
+                        return value
+                    raise TypeError('parameter %s does not evaluate to a command s, l or r or a procedure call: %d' % (name, value))
+            else:
+                assert kind == CALL
+
+                _, name, args = instr
+                procedure = self._procedure(name, args)
+                bindings = _bind(env, procedure.params, args)
+
+                if bindings is not None:
+                    if pc == n:
+                        stack.pop()
+                    stack.append([procedure.body, 0, bindings])
+
+                    if self.on_call is not None:
+                        self.on_call(self)
+
+        self.instructions = count
+        raise StopIteration
+
+    def _stop(self, count):
+        # Raises RecursionError or Paused once count reaches the limit
+        self.instructions = count
+
+        if count - self._last >= self.max_idle:
+            raise RecursionError('the program ran %d instructions without outputting a command' % (count - self._last))
+
+        raise Paused
+
+    def _procedure(self, name, args):
+        try:
+            procedure = self.program.procedures[name]
+        except KeyError:
+            raise LookupError('missing procedure: %s' % name)
+
+        nargs = len(args)
+        nparams = len(procedure.params)
+
+        if nargs != nparams:
+            argument = pluralize(nparams, 'argument', 'arguments')
+            was = pluralize(nargs, 'was', 'were')
+
+            raise TypeError('%s takes %d %s but %d %s given' % (name, nparams, argument, nargs, was))
+
+        return procedure
+
+
+class ObservedMachine(Machine):
+    """A Machine that tells an Observer about every frame pushed and popped,
+    every command output and every call.
+
+    It runs the same commands as a Machine but with its own loop, which
+    reports the events, so that a plain Machine does nothing for observers.
+    A command that peek() runs ahead to is only reported once next() returns
+    it.
+    """
+
+    def __init__(self, program, observer, on_call=None, max_idle=MAX_IDLE):
+        super().__init__(program, on_call, max_idle)
+        self.observer = observer
+        self._peeking = False
+        self._peeked_seq = None  # the sequence the peeked command is written in
+
+        observer.push(program.main)
+
+    def peek(self):
+        self._peeking = True
+        try:
+            return super().peek()
+        finally:
+            self._peeking = False
+
+    def __next__(self):
+        if self._peeked is not None:
+            command, self._peeked = self._peeked, None
+            self.observer.command(self._peeked_seq)
+            return command
+
+        stack = self._stack
+        observer = self.observer
+        count = self.instructions
+
+        stop = self._last + self.max_idle
+        if self.pause_at is not None and self.pause_at < stop:
+            stop = self.pause_at
+
+        while stack:
+            if count >= stop:
+                self._stop(count)
+
+            count += 1
+            frame = stack[-1]
+            seq, pc, env = frame
+            n = len(seq)
+
+            if pc == n:
+                stack.pop()
+                observer.pop(seq)
+                continue
+
+            instr = seq[pc]
+            pc += 1
+            frame[1] = pc
+            kind = instr[0]
+
+            if kind == COMMAND:
+                self.instructions = self._last = count
+                if self._peeking:
+                    self._peeked_seq = seq
+                else:
+                    observer.command(seq)
+                return instr[1]
+
+            if kind == PARAM:
+                name = instr[1]
+                value = _lookup(env, name)
+
+                if isinstance(value, Deferred):
+                    if pc == n:
+                        stack.pop()
+                        observer.pop(seq)
+                    stack.append([value.seq, 0, value.env])
+                    observer.push(value.seq)
+                else:
+                    assert isinstance(value, numbers.Integral)
+                    if n == 1:
+                        self.instructions = self._last = count
+                        if self._peeking:
+                            self._peeked_seq = seq
+                        else:
+                            observer.command(seq)
+                        return value
+                    raise TypeError('parameter %s does not evaluate to a command s, l or r or a procedure call: %d' % (name, value))
+            else:
+                assert kind == CALL
+
+                _, name, args = instr
+                procedure = self._procedure(name, args)
+                bindings = _bind(env, procedure.params, args)
+
+                observer.call(name, bindings is not None)
+
+                if bindings is not None:
+                    if pc == n:
+                        stack.pop()
+                        observer.pop(seq)
+                    stack.append([procedure.body, 0, bindings])
+                    observer.push(procedure.body)
+
+                    if self.on_call is not None:
+                        self.on_call(self)
+
+        self.instructions = count
+        raise StopIteration
+
+
+class Paused(Exception):
+    """Raised by a Machine that reached pause_at, see Machine."""
+
+
+class Observer:
+    """The events an ObservedMachine reports to its observer. Sequences are
+    those of the compiled program, so they can be told apart by identity.
+    """
+
+    def push(self, seq):
+        """A frame running seq was pushed: the main line, the body of a
+        procedure being entered or a deferred argument being evaluated.
+        """
+
+    def pop(self, seq):
+        """The frame running seq was popped, because it ran to its end or it
+        made a call in tail position.
+        """
+
+    def command(self, seq):
+        """A command written in seq was output."""
+
+    def call(self, name, entered):
+        """The procedure was called, and entered unless an argument was 0."""
+
+
+def _bind(env, params, args):
+    bindings = {}
+
+    for param, arg in zip(params, args):
+        value = _eval_arg(env, arg)
+
+        if value == 0:
+            return None
+
+        bindings[param] = value
+
+    return bindings
+
+
+def _eval_arg(env, arg):
+    kind = arg[0]
+
+    if kind == VAR:
+        return _lookup(env, arg[1])
+
+    if kind == SEXPR:
+        return Deferred(env, arg[1])
+
+    assert kind == EXPR
+
+    sum = 0
+    for sign, term in arg[1]:
+        if isinstance(term, str):
+            value = _lookup(env, term)
+
+            if isinstance(value, numbers.Integral):
+                sum += sign * value
+            else:
+                raise TypeError('parameter %s does not evaluate to a number: %s' % (term, value))
+        else:
+            sum += sign * term
+
+    return sum
+
+
+def _lookup(env, name):
+    try:
+        return env[name]
+    except KeyError:
+        raise LookupError('unbound parameter: %s' % name)
+
+
+class Continuation:
+    """A snapshot of a Machine's stack that can be compared for equality.
+
+    Two continuations are equal iff they produce the same commands from then on.
+    Bindings are compared structurally, but since they are never mutated once
+    created, shared bindings and deferred arguments are recognized by identity
+    first.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __eq__(self, other):
+        if not isinstance(other, Continuation):
+            return NotImplemented
+
+        if len(self.frames) != len(other.frames):
+            return False
+
+        pending = []
+        for (seq1, pc1, env1), (seq2, pc2, env2) in zip(self.frames, other.frames):
+            if seq1 is not seq2 or pc1 != pc2:
+                return False
+            pending.append((env1, env2))
+
+        while pending:
+            env1, env2 = pending.pop()
+
+            if env1 is env2:
+                continue
+
+            if env1.keys() != env2.keys():
+                return False
+
+            for name, value1 in env1.items():
+                value2 = env2[name]
+
+                if value1 is value2:
+                    continue
+
+                if isinstance(value1, Deferred):
+                    if not isinstance(value2, Deferred) or value1.seq is not value2.seq:
+                        return False
+                    pending.append((value1.env, value2.env))
+                elif isinstance(value2, Deferred) or value1 != value2:
+                    return False
+
+        return True
+
+    __hash__ = None
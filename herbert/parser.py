@@ -1,4 +1,6 @@
-from lark import Lark, LexError, ParseError
+import hashlib
+import os
+import pickle
 
 from .error import SyntaxError
 
@@ -39,11 +41,72 @@ GRAMMAR = """
 """
 
 
-parser = Lark(GRAMMAR, parser='lalr', start='h')
+# A pickled parser built from GRAMMAR, see save()
+PREBUILT_PATH = os.path.join(os.path.dirname(__file__), 'parser.pickle')
 
 
 def parse(text):
+    parser = get_parser()
+
+    from lark import LexError, ParseError
+
     try:
         return parser.parse(text.strip())
     except (LexError, ParseError) as e:
         raise SyntaxError from e
+
+
+_parser = None
+
+def get_parser():
+    """Returns the parser, creating it the first time it's needed.
+
+    Analysing the grammar and building the LALR tables takes a lot longer than
+    loading a prebuilt parser, so the prebuilt one is used unless it's missing
+    or was built from a different grammar or version of lark.
+    """
+    global _parser
+
+    if _parser is None:
+        _parser = load(PREBUILT_PATH) or build()
+
+    return _parser
+
+
+def build():
+    from lark import Lark
+
+    return Lark(GRAMMAR, parser='lalr', start='h')
+
+
+def save(path=PREBUILT_PATH):
+    with open(path, 'wb') as file:
+        pickle.dump(_prebuilt_key(), file)
+        pickle.dump(build(), file)
+
+
+def load(path=PREBUILT_PATH):
+    """Loads a parser saved by save() or returns None if it can't be used."""
+    try:
+        with open(path, 'rb') as file:
+            if pickle.load(file) != _prebuilt_key():
+                return None
+            parser = pickle.load(file)
+    except Exception:
+        return None
+
+    # lark compares parse actions by identity
+    from lark.parsers.lalr_analysis import Reduce, Shift
+    actions = {'Shift': Shift, 'Reduce': Reduce}
+
+    for state in parser.parser.parser.parser.states.values():
+        for token, (action, arg) in state.items():
+            state[token] = (actions[action.name], arg)
+
+    return parser
+
+
+def _prebuilt_key():
+    import lark
+
+    return (lark.__version__, hashlib.sha256(GRAMMAR.encode('utf-8')).hexdigest())
@@ -0,0 +1,159 @@
+from .machine import CALL, SEXPR, ObservedMachine, Observer
+from .util import pluralize
+
+
+MAIN = '(main)'
+
+# The columns of a report that it can be sorted by and their attributes
+SORT_KEYS = {
+    'calls': 'calls',
+    'ignored': 'ignored',
+    'deferred': 'deferred',
+    'self': 'self_commands',
+    'inclusive': 'inclusive_commands',
+    'depth': 'depth'
+}
+
+
+class Profile:
+    """Execution statistics per procedure, gathered by a ProfilingMachine.
+
+    Commands are attributed to the procedure, or the main line, in which they
+    are written. So the commands of a deferred argument count towards the
+    procedure whose call passed it, as do its evaluations.
+
+    A procedure is active while it has at least one frame on the stack and its
+    inclusive commands are the commands output while it's active. Since a call
+    in tail position replaces its caller's frame, the caller stops being active
+    when it makes such a call.
+    """
+
+    def __init__(self):
+        self.procedures = {}
+        self.commands = 0
+        self._owners = {}
+        self._deferred = set()
+
+    def __getitem__(self, name):
+        return self.procedures[name]
+
+    def report(self, sort='inclusive'):
+        if sort not in SORT_KEYS:
+            raise ValueError('unknown sort key: %s' % sort)
+
+        attr = SORT_KEYS[sort]
+        rows = sorted(self.procedures.values(), key=lambda stats: (-getattr(stats, attr), stats.name))
+        lines = ['%-10s %10s %10s %10s %12s %12s %8s' % ('procedure', 'calls', 'ignored', 'deferred', 'self', 'inclusive', 'depth')]
+
+        for stats in rows:
+            lines.append('%-10s %10d %10d %10d %12d %12d %8d' % (
+                stats.name, stats.calls, stats.ignored, stats.deferred, stats.self_commands, stats.inclusive_commands, stats.depth
+            ))
+
+        lines.append('%d %s' % (self.commands, pluralize(self.commands, 'command', 'commands')))
+
+        return '\n'.join(lines)
+
+    def _index(self, program):
+        self._stats(MAIN)
+        self._index_seq(program.main, MAIN)
+
+        for procedure in program.procedures.values():
+            self._stats(procedure.name)
+            self._index_seq(procedure.body, procedure.name)
+
+    def _index_seq(self, seq, owner):
+        self._owners[id(seq)] = owner
+
+        for instr in seq:
+            if instr[0] == CALL:
+                for arg in instr[2]:
+                    if arg[0] == SEXPR:
+                        self._deferred.add(id(arg[1]))
+                        self._index_seq(arg[1], owner)
+
+    def _stats(self, name):
+        try:
+            return self.procedures[name]
+        except KeyError:
+            stats = self.procedures[name] = ProcedureStats(name, self)
+            return stats
+
+
+class ProcedureStats:
+    def __init__(self, name, profile):
+        self.name = name
+        self.calls = 0          # the number of calls, including ignored ones
+        self.ignored = 0        # the number of calls ignored because an argument was 0
+        self.deferred = 0       # the number of evaluations of its deferred arguments
+        self.self_commands = 0  # the number of commands written in it that were output
+        self.depth = 0          # the maximum number of its frames on the stack at once
+        self._profile = profile
+        self._inclusive = 0
+        self._active = 0
+        self._since = 0
+
+    @property
+    def inclusive_commands(self):
+        if self._active:
+            return self._inclusive + self._profile.commands - self._since
+        return self._inclusive
+
+    def _enter(self):
+        if self._active == 0:
+            self._since = self._profile.commands
+
+        self._active += 1
+        if self._active > self.depth:
+            self.depth = self._active
+
+    def _leave(self):
+        self._active -= 1
+
+        if self._active == 0:
+            self._inclusive += self._profile.commands - self._since
+
+
+class ProfilingMachine(ObservedMachine):
+    """A Machine that records a Profile of the program as it runs.
+
+    It runs the same commands as a Machine, only slower, since it observes
+    every frame, command and call, so a plain Machine pays nothing for
+    profiling.
+    """
+
+    def __init__(self, program, profile=None, on_call=None):
+        self.profile = Profile() if profile is None else profile
+        self.profile._index(program)
+
+        super().__init__(program, _ProfileObserver(self.profile), on_call)
+
+
+class _ProfileObserver(Observer):
+    def __init__(self, profile):
+        self.profile = profile
+        self.frames = []
+
+    def push(self, seq):
+        profile = self.profile
+        stats = profile._stats(profile._owners[id(seq)])
+
+        if id(seq) in profile._deferred:
+            stats.deferred += 1
+
+        self.frames.append(stats)
+        stats._enter()
+
+    def pop(self, seq):
+        self.frames.pop()._leave()
+
+    def command(self, seq):
+        self.profile.commands += 1
+        self.frames[-1].self_commands += 1
+
+    def call(self, name, entered):
+        stats = self.profile.procedures[name]
+        stats.calls += 1
+
+        if not entered:
+            stats.ignored += 1
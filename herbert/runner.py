@@ -0,0 +1,193 @@
+from .constants import DEFAULT_MAX_STEPS
+from .error import RuntimeError
+from .instrumentation import Counter
+from .machine import Machine, Paused
+
+
+# The reasons a run can end
+HALTED = 'halted'       # the program ran out of commands
+EXHAUSTED = 'exhausted' # the program used up its budget of commands
+CYCLE = 'cycle'         # the program entered a cycle
+
+
+def run(level, program, *, bytes=None, max_steps=DEFAULT_MAX_STEPS, detect_cycles=True, profile=None):
+    """Runs a compiled program against a level, headlessly, for at most
+    max_steps commands.
+
+    If detect_cycles is True then the run ends as soon as the robot, the white
+    buttons and the program are found to be in a state they have been in
+    before. From then on the run would only repeat itself so the maximum number
+    of white buttons pressed can no longer change.
+
+    If bytes, the size of the program, is given then the result also has the
+    points earned.
+
+    If profile, a profiler.Profile, is given then the run is profiled into it.
+    """
+    r = Run(level, program, bytes=bytes, max_steps=max_steps, detect_cycles=detect_cycles, profile=profile)
+    r.advance()
+
+    return r.result()
+
+
+class Run:
+    """A run that can be advanced a few commands at a time."""
+
+    def __init__(self, level, program, *, bytes=None, max_steps=DEFAULT_MAX_STEPS, detect_cycles=True, profile=None, record=False, count=False):
+        self.runtime = level(bytes)
+
+        if profile is None:
+            self.machine = Machine(program)
+        else:
+            from .profiler import ProfilingMachine
+            self.machine = ProfilingMachine(program, profile)
+
+        self.max_steps = max_steps
+        self.steps = 0
+        self.reason = None
+
+        if detect_cycles:
+            self.machine.on_call = CycleDetector(self.runtime)
+
+        # The machine itself, before any wrapping, for pausing it
+        self._machine = self.machine
+
+        # If record is True then the commands are recorded for a trace
+        self.recorder = None
+        if record:
+            from .trace import Recorder
+            self.machine = self.recorder = Recorder(self.machine)
+
+        # If count is True then the blocked moves and button presses are counted
+        self.counter = None
+        if count:
+            self.counter = Counter(self.runtime)
+
+    @property
+    def done(self):
+        return self.reason is not None
+
+    def advance(self, n=None, *, instructions=None):
+        """Runs at most n more commands, or until the run ends if n is None, and
+        returns True iff the run has ended.
+
+        If instructions is given then the machine also runs at most that many
+        more instructions, so that a program that takes a long time between
+        commands, or never outputs one, can be stopped and resumed.
+
+        Raises a RuntimeError if the program fails, including a RecursionError
+        if it runs too many instructions without outputting a command, see
+        machine.MAX_IDLE.
+        """
+        if self.reason is not None:
+            return True
+
+        limit = self.max_steps if n is None else min(self.steps + n, self.max_steps)
+        step = self.runtime.step if self.counter is None else self.counter.step
+        machine = self.machine
+        steps = self.steps
+
+        if instructions is not None:
+            self._machine.pause_at = self._machine.instructions + instructions
+
+        try:
+            while steps < limit:
+                try:
+                    command = next(machine)
+                except StopIteration:
+                    self.reason = HALTED
+                    break
+
+                step(command)
+                steps += 1
+            else:
+                if steps == self.max_steps:
+                    # Whether the program would have gone on, without handing
+                    # the command it goes on with to the recorder. A program
+                    # that goes on to fail has run out of budget all the same.
+                    try:
+                        halted = self._machine.peek() is None
+                    except RuntimeError:
+                        halted = False
+
+                    self.reason = HALTED if halted else EXHAUSTED
+        except CycleFound:
+            self.reason = CYCLE
+        except Paused:
+            pass
+        finally:
+            self.steps = steps
+            self._machine.pause_at = None
+
+        return self.reason is not None
+
+    def result(self):
+        assert self.done
+        return Result(self.runtime, self.steps, self.reason)
+
+    def trace(self, **header):
+        """Returns a trace.Trace of the commands run, if it was recorded."""
+        assert self.done and self.recorder is not None
+        return self.recorder.trace(self.steps, reason=self.reason, **header)
+
+
+class Result:
+    def __init__(self, runtime, steps, reason):
+        self.runtime = runtime
+        self.steps = steps
+        self.reason = reason
+
+    @property
+    def npressed(self):
+        return self.runtime.npressed
+
+    @property
+    def max_npressed(self):
+        return self.runtime.max_npressed
+
+    @property
+    def completed(self):
+        return self.runtime.completed
+
+    @property
+    def points(self):
+        return self.runtime.max_points
+
+
+class CycleDetector:
+    """Detects when a run revisits a state using Brent's algorithm.
+
+    The state is sampled every time the machine enters a procedure. Any infinite
+    run must keep entering procedures so no cycle goes unnoticed. The cheap
+    parts of the state are compared first so that the continuation only has to
+    be compared when there is a good chance of a match.
+    """
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self._power = self._length = 1
+        self._saved = None
+
+    def __call__(self, machine):
+        re = self.runtime
+        robot = re.robot
+        key = (robot.row, robot.col, robot.heading, re.npressed, machine.depth)
+        saved = self._saved
+
+        if saved is not None and key == saved[0] and _pressed(re) == saved[1] and machine.continuation() == saved[2]:
+            raise CycleFound
+
+        if self._length == self._power:
+            self._saved = (key, _pressed(re), machine.continuation())
+            self._power *= 2
+            self._length = 0
+
+        self._length += 1
+
+
+class CycleFound(Exception):
+    pass
+
+
+def _pressed(re):
+    return tuple(white_button.pressed for white_button in re.white_buttons.values())
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+import time
+
+from .error import HerbertError, TimeoutError
+from .runner import Run
+
+
+DEFAULT_QUANTUM = 1000
+
+# By default a turn runs at most this many machine instructions per command
+# of the quantum
+INSTRUCTIONS_PER_COMMAND = 10
+
+
+class Scheduler:
+    """Interleaves many runs in a single process.
+
+    Runs take turns to execute a slice of at most quantum commands and at most
+    instructions machine instructions, by default INSTRUCTIONS_PER_COMMAND
+    times quantum, so that a run that takes a long time between commands, or
+    never outputs one, can't hold on to its turn. Turns are handed
+    out by stride scheduling: a run with priority p gets p times as many turns
+    as a run with priority 1, and a newly submitted run takes its first turn
+    before any run that has already had one more turn than it. So a short
+    program finishes within a few slices no matter how many long ones are
+    running.
+
+    A run can also be given a timeout, the number of seconds its turns may
+    take in all, after which it fails with a TimeoutError.
+    """
+
+    def __init__(self, quantum=DEFAULT_QUANTUM, instructions=None):
+        if quantum < 1:
+            raise ValueError('the quantum must be greater than or equal to 1: %s' % quantum)
+
+        if instructions is None:
+            instructions = INSTRUCTIONS_PER_COMMAND * quantum
+
+        if instructions < 1:
+            raise ValueError('the instructions must be greater than or equal to 1: %s' % instructions)
+
+        self.quantum = quantum
+        self.instructions = instructions
+        self._queue = []
+        self._counter = itertools.count()
+        self._pass = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def submit(self, level, program, *, priority=1, timeout=None, **kwargs):
+        """Schedules a run of a compiled program against a level and returns
+        its Task. The other keyword arguments are those of runner.Run, e.g.
+        max_steps is the budget of the run.
+        """
+        if priority < 1:
+            raise ValueError('the priority must be greater than or equal to 1: %s' % priority)
+
+        task = Task(Run(level, program, **kwargs), priority, timeout)
+        heapq.heappush(self._queue, (self._pass, next(self._counter), task))
+
+        return task
+
+    def step(self):
+        """Gives the next run its turn and returns its task, or None if there
+        are no runs left.
+        """
+        if not self._queue:
+            return None
+
+        pass_, _, task = heapq.heappop(self._queue)
+        self._pass = pass_
+
+        if not task.advance(self.quantum, self.instructions):
+            heapq.heappush(self._queue, (pass_ + 1 / task.priority, next(self._counter), task))
+
+        return task
+
+    def run(self):
+        """Runs until every run has ended, yielding each task as it ends."""
+        while self._queue:
+            task = self.step()
+
+            if task.done:
+                yield task
+
+
+class Task:
+    def __init__(self, run, priority, timeout=None):
+        self.run = run
+        self.priority = priority
+        self.timeout = timeout
+        self.error = None
+        self.turns = 0
+        self.elapsed = 0  # the number of seconds its turns took
+
+    @property
+    def done(self):
+        return self.error is not None or self.run.done
+
+    def advance(self, n, instructions=None):
+        self.turns += 1
+        start = time.perf_counter()
+
+        try:
+            done = self.run.advance(n, instructions=instructions)
+        except (HerbertError, ValueError) as e:
+            self.error = e
+            done = True
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+        if not done and self.timeout is not None and self.elapsed > self.timeout:
+            self.error = TimeoutError('the program ran for more than %g seconds' % self.timeout)
+            done = True
+
+        return done
+
+    def result(self):
+        """Returns the result of the run or raises the error that ended it."""
+        if self.error is not None:
+            raise self.error
+
+        return self.run.result()
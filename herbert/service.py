@@ -0,0 +1,286 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+
+from . import cache, judge
+from .constants import DEFAULT_BATCH_SIZE, DEFAULT_HOST, DEFAULT_MAX_STEPS, DEFAULT_PORT, DEFAULT_QUEUE_SIZE, DEFAULT_TIMEOUT
+from .error import HerbertError
+
+
+MAX_REQUEST_SIZE = 1 << 16
+
+HTTP_STATUSES = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable'
+}
+
+
+class Service:
+    """Judges submissions against a fixed set of levels.
+
+    Submissions wait in a queue of at most queue_size entries until one of the
+    workers is free to judge them. When the queue is full new submissions are
+    turned away with Busy instead of piling up.
+
+    By default the workers run in separate processes. Each process receives
+    the levels once, when it starts, so levels are never reloaded or sent
+    again while judging.
+
+    A free worker takes up to batch_size of the waiting submissions at once
+    and judges them together with judge.judge_all, which takes turns to run
+    them according to their priorities, rather than one process job per
+    submission.
+
+    A worker gives up on a program that runs for more than timeout seconds,
+    which fails its submission with a TimeoutError, so that programs that
+    run for a long time can't hold on to the workers.
+    """
+
+    def __init__(self, levels, *, workers=None, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE, max_steps=DEFAULT_MAX_STEPS, timeout=DEFAULT_TIMEOUT, cache_size=cache.DEFAULT_SIZE, store=None, executor=None):
+        self.levels = levels
+        self.batch_size = batch_size
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.store = store
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(levels, cache_size))
+
+        self.workers = workers
+        self._executor = executor
+        self._queue = asyncio.Queue(queue_size)
+        self._tasks = []
+
+    def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.ensure_future(self._work()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._executor.shutdown()
+
+    async def submit(self, level_name, source_code, user=None, priority=1):
+        if level_name not in self.levels:
+            raise UnknownLevel(level_name)
+
+        if not isinstance(priority, int) or priority < 1:
+            raise ValueError('the priority must be an integer greater than or equal to 1: %s' % priority)
+
+        future = asyncio.get_event_loop().create_future()
+
+        try:
+            self._queue.put_nowait((level_name, source_code, priority, future))
+        except asyncio.QueueFull:
+            raise Busy
+
+        report = await future
+
+        if self.store is not None and user is not None:
+            self.store.record(user, level_name, report['program_hash'], report['points'], report['bytes'])
+
+        return report
+
+    async def _work(self):
+        loop = asyncio.get_event_loop()
+
+        while True:
+            jobs = [await self._queue.get()]
+            while len(jobs) < self.batch_size and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+
+            jobs_taken = len(jobs)
+            jobs = [job for job in jobs if not job[-1].cancelled()]
+
+            try:
+                if jobs:
+                    submissions = [(level_name, source_code, priority) for level_name, source_code, priority, _ in jobs]
+                    reports = await loop.run_in_executor(self._executor, _judge_all, submissions, self.max_steps, self.timeout)
+
+                    for (*_, future), report in zip(jobs, reports):
+                        if future.cancelled():
+                            continue
+                        if isinstance(report, Exception):
+                            future.set_exception(report)
+                        else:
+                            future.set_result(report)
+            except asyncio.CancelledError:
+                for *_, future in jobs:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for *_, future in jobs:
+                    if not future.cancelled():
+                        future.set_exception(e)
+            finally:
+                for _ in range(jobs_taken):
+                    self._queue.task_done()
+
+class Busy(Exception):
+    pass
+
+
+class UnknownLevel(Exception):
+    pass
+
+
+_levels = None
+
+
+def _init_worker(levels, cache_size=cache.DEFAULT_SIZE):
+    global _levels
+    _levels = levels
+    cache.programs.resize(cache_size)
+
+
+def _judge_all(submissions, max_steps, timeout):
+    # Judges (level_name, source_code, priority) triples together and returns
+    # the report of each, or the error it failed with
+    judgements = judge.judge_all(
+        [(_levels[level_name], source_code, priority) for level_name, source_code, priority in submissions],
+        max_steps=max_steps,
+        timeout=timeout
+    )
+
+    return [
+        judgement if isinstance(judgement, Exception) else _report(level_name, _levels[level_name], judgement)
+        for (level_name, _, _), judgement in zip(submissions, judgements)
+    ]
+
+
+def _report(level_name, level, judgement):
+    return {
+        'level': level_name,
+        'program_hash': judgement.program_hash,
+        'points': judgement.points,
+        'total_points': level.points,
+        'bytes': judgement.bytes,
+        'max_bytes': level.max_bytes,
+        'buttons': judgement.max_npressed,
+        'total_buttons': judgement.total_buttons,
+        'completed': judgement.completed,
+        'steps': judgement.result.steps,
+        'reason': judgement.result.reason,
+        'stats': judgement.stats.asdict()
+    }
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Serves the service over HTTP.
+
+    GET /levels returns the names of the levels and POST /judge, with a JSON
+    object {"level": name, "program": source code, "user": optional name,
+    "priority": optional integer, 1 by default}, returns the judgement.
+    """
+    async def handle(reader, writer):
+        try:
+            status, body = await _handle_request(service, reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception:
+            logging.exception('Sorry, an unexpected error occurred.')
+            status, body = 500, {'error': 'internal error'}
+
+        payload = json.dumps(body).encode('utf-8')
+
+        writer.write(('HTTP/1.1 %d %s\r\n' % (status, HTTP_STATUSES[status])).encode('ascii'))
+        writer.write(b'Content-Type: application/json\r\n')
+        writer.write(('Content-Length: %d\r\n' % len(payload)).encode('ascii'))
+        if status == 503:
+            writer.write(b'Retry-After: 1\r\n')
+        writer.write(b'Connection: close\r\n\r\n')
+        writer.write(payload)
+
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _handle_request(service, reader):
+    request_line = await reader.readline()
+    try:
+        method, path, _ = request_line.decode('ascii').split()
+    except ValueError:
+        return 400, {'error': 'bad request'}
+
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                content_length = int(value)
+            except ValueError:
+                return 400, {'error': 'bad request'}
+
+    if content_length > MAX_REQUEST_SIZE:
+        return 413, {'error': 'request too large'}
+
+    if path == '/levels':
+        if method != 'GET':
+            return 405, {'error': 'method not allowed'}
+        return 200, {'levels': sorted(service.levels)}
+
+    if path != '/judge':
+        return 404, {'error': 'not found: %s' % path}
+
+    if method != 'POST':
+        return 405, {'error': 'method not allowed'}
+
+    try:
+        submission = json.loads((await reader.readexactly(content_length)).decode('utf-8'))
+        level_name = submission['level']
+        source_code = submission['program']
+        user = submission.get('user')
+        priority = submission.get('priority', 1)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return 400, {'error': 'expected a JSON object with a level and a program'}
+
+    try:
+        return 200, await service.submit(level_name, source_code, user, priority)
+    except UnknownLevel:
+        return 404, {'error': 'unknown level: %s' % level_name}
+    except Busy:
+        return 503, {'error': 'too many submissions, try again later'}
+    except concurrent.futures.BrokenExecutor:
+        logging.exception('The workers are unavailable.')
+        return 503, {'error': 'the workers are unavailable, try again later'}
+    except (HerbertError, ValueError) as e:
+        return 400, {'error': 'unable to judge the program: %s' % (str(e) or type(e).__name__)}
+
+
+def serve(levels, *, host=DEFAULT_HOST, port=DEFAULT_PORT, **kwargs):
+    async def run():
+        service = Service(levels, **kwargs)
+        service.start()
+        server = await start_server(service, host, port)
+
+        logging.info('Serving %d levels on http://%s:%d', len(levels), host, port)
+
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+            await service.close()
+
+    asyncio.run(run())
@@ -0,0 +1,146 @@
+"""Steps a level through a long string of commands, with NumPy if it's there.
+
+Between the spots where something happens, walls, edges and buttons, a run is
+only turns and moves: the heading after each command is a cumulative sum of
+the turns, mod 4, and the spot after each move a cumulative sum of the moves.
+So the commands are processed in blocks, as arrays, up to the first move onto
+one of those spots, which is stepped by the runtime environment itself.
+
+Without NumPy, or for short strings, every command is stepped.
+"""
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Shorter strings are stepped, since the arrays don't pay for themselves
+MIN_LENGTH = 256
+
+# The number of commands looked at as arrays at a time, which grows while
+# nothing happens and shrinks when something does
+MIN_BLOCK = 64
+MAX_BLOCK = 1 << 16
+
+# The number of commands stepped when something happens soon after the last
+# time, which grows while that keeps up
+MIN_WINDOW = 64
+MAX_WINDOW = 4096
+
+
+def simulate(level, commands, *, bytes=None):
+    """Returns a runtime environment of level, for a program of the given
+    size, in the state that stepping it through the string of commands leaves
+    it in.
+    """
+    re = level(bytes)
+    advance(re, commands)
+    return re
+
+
+def advance(re, commands):
+    """Steps a runtime environment through a string of commands."""
+    if np is None or len(commands) < MIN_LENGTH:
+        step = re.step
+        for command in commands:
+            step(command)
+    else:
+        _advance(re, commands)
+
+
+def _advance(re, commands):
+    from .batch import BLOCKED, CODES, OPEN, TURNS, deltas, encode
+
+    robot = re.robot
+    trail = robot.trail
+    step = re.step
+    spots, width, spot_coordinates = _layout(re.level)
+    delta = deltas(width)
+
+    for start in range(0, len(commands), MAX_BLOCK):
+        chunk = commands[start:start + MAX_BLOCK]
+        codes = encode(chunk)
+        n = len(codes)
+        move = codes == CODES['s']
+
+        # The heading after each command, which nothing can get in the way of,
+        # and the change in spot after each command as if nothing were in the
+        # way. A move that's blocked shifts the spots after it back.
+        heading = (robot.heading + np.cumsum(TURNS[codes], dtype=np.int64)) & 3
+        moves = np.where(move, delta[heading], 0)
+        offsets = np.cumsum(moves)
+        shift = (robot.row + 1) * width + robot.col + 1
+
+        i = 0
+        block = MIN_BLOCK
+        window = MIN_WINDOW
+
+        while i < n:
+            j = min(i + block, n)
+            positions = offsets[i:j] + shift
+
+            # Spots off the level are only reached after passing its border,
+            # so clipping them doesn't matter
+            spot = spots.take(positions, mode='clip')
+            events = move[i:j] & (spot != OPEN)
+            e = int(np.argmax(events))
+            if not events[e]:
+                e = j - i
+
+            moved = positions[:e][move[i:i + e]].tolist()
+            if moved:
+                trail.extend(map(spot_coordinates.__getitem__, moved))
+                robot.row, robot.col = trail[-1]
+
+            i += e
+
+            if i < j:
+                # A move onto a wall, an edge or a button
+                robot.heading = int(heading[i])
+                step('s')
+
+                if spot[e] == BLOCKED:
+                    shift -= int(moves[i])
+
+                i += 1
+                block = max(MIN_BLOCK, 2 * e)
+
+                if e < MIN_BLOCK:
+                    # Something happened soon after the last time, so step
+                    # through a window of commands, which grows for as long as
+                    # that keeps up
+                    for command in chunk[i:i + window]:
+                        step(command)
+
+                    i = min(i + window, n)
+                    shift = (robot.row + 1) * width + robot.col + 1 - int(offsets[i - 1])
+                    window = min(2 * window, MAX_WINDOW)
+                else:
+                    window = MIN_WINDOW
+            else:
+                block = min(2 * block, MAX_BLOCK)
+                window = MIN_WINDOW
+
+        robot.heading = int(heading[-1])
+
+
+def _layout(level):
+    # Returns what each spot of level holds, the width of a row and the row
+    # and column of each spot, border included
+    try:
+        return _layouts[level]
+    except KeyError:
+        from .batch import layout
+
+        spots, _, width = layout(level)
+        coordinates = [(p // width - 1, p % width - 1) for p in range(len(spots))]
+        result = _layouts[level] = (spots, width, coordinates)
+        return result
+
+
+# The layouts of the levels simulated, for as long as they're around, so that
+# stepping a level through a long string a chunk at a time only works them
+# out once
+_layouts = weakref.WeakKeyDictionary()
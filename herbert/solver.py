@@ -0,0 +1,307 @@
+"""Searches for the shortest programs that solve a level.
+
+Programs are enumerated by their size in bytes, as the compiler counts them,
+from the smallest up, and each is run against the level until one presses all
+its white buttons. The search space is programs made of commands and of up to
+a few procedures, each either without parameters, optionally ending in a call
+of itself so that it repeats forever, or with one parameter counting down the
+calls of itself, like
+
+    a(A):sa(A-1)
+
+which the main line and earlier procedures call with a number.
+
+Programs that can only behave like another program of the space of the same
+size or smaller are skipped:
+
+- turns are written canonically, r for a right turn, l for a left turn and rr
+  for a U-turn, so that lr, rl, ll, lll and rrr never appear;
+- the main line doesn't end in a turn, since nothing would come after it;
+- procedures only call procedures defined after them, or themselves, every
+  procedure is called and they're named in the order of their first calls, so
+  that renaming them gives nothing new.
+
+Each candidate is run with cycle detection for at most max_steps commands, in
+batches spread over a pool of processes.
+"""
+import collections
+import concurrent.futures
+import itertools
+import os
+
+from . import compiler, constants, runner
+from .error import RuntimeError
+from .level import calculate_score
+
+
+DEFAULT_MAX_PROCEDURES = constants.DEFAULT_SOLVE_MAX_PROCEDURES
+DEFAULT_COUNTS = range(2, 13)
+DEFAULT_MAX_STEPS = constants.DEFAULT_SOLVE_MAX_STEPS
+
+# The number of programs a worker runs at a time
+BATCH_SIZE = 2000
+
+# The number of commands run between checks of whether a level is solved
+SOLVES_STEPS = 1000
+
+# The kinds of procedures and the bytes their headers take: a: and a(A):
+PLAIN = 'plain'
+COUNTER = 'counter'
+HEADER_BYTES = {PLAIN: 1, COUNTER: 2}
+
+# The fewest bytes of a body: two commands for a plain procedure, and a command
+# and the call of itself for a counter
+MIN_BODY_BYTES = {PLAIN: 2, COUNTER: 4}
+
+NAMES = sorted(compiler.PNAMES)
+
+
+def solve(level, *, max_bytes=None, max_procedures=DEFAULT_MAX_PROCEDURES, counts=DEFAULT_COUNTS, max_steps=DEFAULT_MAX_STEPS, workers=None, progress=None):
+    """Returns a Solution with one of the smallest programs that solves level,
+    or None if none of at most max_bytes bytes, by default the level's maximum,
+    does.
+
+    If workers is 1 then the programs are run in this process, otherwise in a
+    pool of that many processes, by default one per CPU. progress, if given, is
+    called with the number of bytes and the number of programs of that size
+    run once they have all been run.
+    """
+    if max_bytes is None:
+        max_bytes = level.max_bytes
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    executor = None
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(level, max_steps))
+
+    try:
+        total = 0
+
+        for nbytes in range(1, max_bytes + 1):
+            candidates = programs(nbytes, max_procedures=max_procedures, counts=counts)
+
+            if executor is None:
+                source_code, searched = _search(level, candidates, max_steps)
+            else:
+                source_code, searched = _search_in_parallel(executor, 2 * workers, candidates)
+
+            total += searched
+
+            if progress is not None:
+                progress(nbytes, searched)
+
+            if source_code is not None:
+                points = calculate_score(level.points, level.max_bytes, len(level.white_buttons), len(level.white_buttons), nbytes)
+                return Solution(source_code, nbytes, points, total)
+
+        return None
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+class Solution:
+    def __init__(self, source_code, bytes, points, searched):
+        self.source_code = source_code
+        self.bytes = bytes
+        self.points = points
+        self.searched = searched    # the number of programs run to find it
+
+
+def programs(nbytes, *, max_procedures=DEFAULT_MAX_PROCEDURES, counts=DEFAULT_COUNTS):
+    """Yields the source code of every program of the search space that's
+    nbytes bytes long.
+    """
+    for k in range(max_procedures + 1):
+        for kinds in itertools.product((PLAIN, COUNTER), repeat=k):
+            rest = nbytes - sum(HEADER_BYTES[kind] for kind in kinds)
+            mins = [MIN_BODY_BYTES[kind] for kind in kinds] + [1]
+
+            for sizes in _compositions(rest, mins):
+                yield from _programs(kinds, sizes, counts)
+
+
+def _compositions(total, mins):
+    # Yields the ways of splitting total into parts of at least the minimums
+    if len(mins) == 1:
+        if total >= mins[0]:
+            yield (total,)
+        return
+
+    for first in range(mins[0], total - sum(mins[1:]) + 1):
+        for rest in _compositions(total - first, mins[1:]):
+            yield (first,) + rest
+
+
+def _programs(kinds, sizes, counts):
+    k = len(kinds)
+    calls = [_call_atoms(kinds, j, counts) for j in range(k)]
+
+    bodies = []
+    for i, kind in enumerate(kinds):
+        atoms = [a for j in range(i + 1, k) for a in calls[j]]
+
+        if kind == PLAIN:
+            body = list(_sequences(sizes[i], atoms, tail=(NAMES[i], 1, i)))
+        else:
+            body = [seq for seq in _sequences(sizes[i], atoms + [('%s(A-1)' % NAMES[i], 3, i)]) if _count(seq, i) == 1]
+
+        if not body:
+            return
+        bodies.append(body)
+
+    main_atoms = [a for j in range(k) for a in calls[j]]
+
+    for main in _sequences(sizes[-1], main_atoms):
+        if main[-1][0] in 'lr':
+            continue
+
+        for chosen in itertools.product(*bodies):
+            if _canonical(main, chosen):
+                yield _format(kinds, chosen, main)
+
+
+def _call_atoms(kinds, j, counts):
+    # The ways of calling the j-th procedure, as (text, bytes, procedure)
+    if kinds[j] == PLAIN:
+        return [(NAMES[j], 1, j)]
+    return [('%s(%d)' % (NAMES[j], n), 2, j) for n in counts]
+
+
+_COMMAND_ATOMS = [('s', 1, None), ('l', 1, None), ('r', 1, None)]
+
+
+def _sequences(nbytes, atoms, tail=None, turns=''):
+    # Yields the sequences of commands and the given atoms of exactly nbytes
+    # bytes, with turns written canonically. turns are the turns just before
+    # and tail an atom that can only come last.
+    if nbytes == 0:
+        yield ()
+        return
+
+    if tail is not None and tail[1] == nbytes:
+        yield (tail,)
+
+    for atom in itertools.chain(_COMMAND_ATOMS, atoms):
+        text, cost, _ = atom
+
+        if cost > nbytes:
+            continue
+
+        if text == 'l':
+            if turns:
+                continue
+            after = 'l'
+        elif text == 'r':
+            if turns in ('l', 'rr'):
+                continue
+            after = turns + 'r'
+        else:
+            after = ''
+
+        for rest in _sequences(nbytes - cost, atoms, tail, after):
+            yield (atom,) + rest
+
+
+def _count(seq, i):
+    return sum(1 for _, _, j in seq if j == i)
+
+
+def _canonical(main, bodies):
+    # Every procedure must be called, other than by itself, and they must be
+    # first called in the order they're defined
+    order = []
+
+    for i, seq in itertools.chain([(None, main)], enumerate(bodies)):
+        for _, _, j in seq:
+            if j is not None and j != i and j not in order:
+                order.append(j)
+
+    return order == list(range(len(bodies)))
+
+
+def _format(kinds, bodies, main):
+    lines = []
+
+    for i, (kind, body) in enumerate(zip(kinds, bodies)):
+        header = NAMES[i] if kind == PLAIN else '%s(A)' % NAMES[i]
+        lines.append('%s:%s' % (header, ''.join(text for text, _, _ in body)))
+
+    lines.append(''.join(text for text, _, _ in main))
+
+    return '\n'.join(lines)
+
+
+def solves(level, source_code, max_steps=DEFAULT_MAX_STEPS):
+    """Returns True iff the program presses all of level's white buttons in at
+    most max_steps commands.
+    """
+    r = runner.Run(level, compiler.compile(source_code), max_steps=max_steps)
+
+    try:
+        # Once solved a level stays solved, so there's no need to run on
+        while not r.advance(SOLVES_STEPS):
+            if r.runtime.completed:
+                return True
+    except (RuntimeError, ValueError):
+        # A call with the wrong kind of argument, say, or a number output as
+        # a command
+        return False
+
+    return r.runtime.completed
+
+
+def _search(level, candidates, max_steps):
+    # Returns the first candidate that solves level, or None, and the number
+    # of candidates run
+    searched = 0
+
+    for source_code in candidates:
+        searched += 1
+
+        if solves(level, source_code, max_steps):
+            return source_code, searched
+
+    return None, searched
+
+
+def _search_in_parallel(executor, limit, candidates):
+    # Like _search, with batches of candidates run by the executor, at most
+    # limit at a time. The results are taken in order so that the same
+    # candidate is found as by _search.
+    candidates = iter(candidates)
+    pending = collections.deque()
+    searched = 0
+
+    def submit():
+        batch = list(itertools.islice(candidates, BATCH_SIZE))
+        if batch:
+            pending.append(executor.submit(_run_batch, batch))
+
+    for _ in range(limit):
+        submit()
+
+    while pending:
+        source_code, n = pending.popleft().result()
+        searched += n
+
+        if source_code is not None:
+            for future in pending:
+                future.cancel()
+            return source_code, searched
+
+        submit()
+
+    return None, searched
+
+
+def _init_worker(level, max_steps):
+    global _level, _max_steps
+    _level = level
+    _max_steps = max_steps
+
+
+def _run_batch(batch):
+    return _search(_level, batch, _max_steps)
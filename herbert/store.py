@@ -0,0 +1,193 @@
+import sqlite3
+import time
+
+
+# INSERT ... ON CONFLICT DO UPDATE needs SQLite 3.24 or later, older versions
+# update the totals and insert them when there was nothing to update
+UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS solutions (
+        id           INTEGER PRIMARY KEY,
+        user         TEXT NOT NULL,
+        level        TEXT NOT NULL,
+        program_hash TEXT NOT NULL,
+        score        INTEGER NOT NULL,
+        bytes        INTEGER NOT NULL,
+        judged_at    REAL NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS solutions_by_user_and_level
+        ON solutions (user, level, id);
+
+    -- The best solution to date of each user for each level
+    CREATE TABLE IF NOT EXISTS best (
+        user        TEXT NOT NULL,
+        level       TEXT NOT NULL,
+        solution_id INTEGER NOT NULL REFERENCES solutions (id),
+        score       INTEGER NOT NULL,
+        bytes       INTEGER NOT NULL,
+        PRIMARY KEY (user, level)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS best_by_level_and_score
+        ON best (level, score DESC, bytes, solution_id);
+
+    -- The sum of the best scores of each user
+    CREATE TABLE IF NOT EXISTS totals (
+        user  TEXT PRIMARY KEY,
+        total INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS totals_by_total
+        ON totals (total DESC, user);
+"""
+
+
+class Store:
+    """A persistent record of judged solutions.
+
+    Only the best solution to date of a user for a level counts towards their
+    total. A solution is better than another if it has a higher score or, for
+    the same score, fewer bytes. The best solutions and the totals are updated
+    as each solution is recorded so that queries never have to scan the full
+    history.
+    """
+
+    def __init__(self, path=':memory:'):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, user, level, program_hash, score, bytes, judged_at=None):
+        """Records a judged solution and returns True iff it is the user's new
+        best solution for the level.
+        """
+        if judged_at is None:
+            judged_at = time.time()
+
+        with self._connection as c:
+            solution_id = c.execute(
+                'INSERT INTO solutions (user, level, program_hash, score, bytes, judged_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (user, level, program_hash, score, bytes, judged_at)
+            ).lastrowid
+
+            row = c.execute(
+                'SELECT score, bytes FROM best WHERE user = ? AND level = ?',
+                (user, level)
+            ).fetchone()
+
+            if row is None:
+                c.execute(
+                    'INSERT INTO best (user, level, solution_id, score, bytes) VALUES (?, ?, ?, ?, ?)',
+                    (user, level, solution_id, score, bytes)
+                )
+                delta = score
+            elif (score, -bytes) > (row[0], -row[1]):
+                c.execute(
+                    'UPDATE best SET solution_id = ?, score = ?, bytes = ? WHERE user = ? AND level = ?',
+                    (solution_id, score, bytes, user, level)
+                )
+                delta = score - row[0]
+            else:
+                return False
+
+            if UPSERT:
+                c.execute(
+                    'INSERT INTO totals (user, total) VALUES (?, ?) ON CONFLICT (user) DO UPDATE SET total = total + excluded.total',
+                    (user, delta)
+                )
+            elif c.execute('UPDATE totals SET total = total + ? WHERE user = ?', (delta, user)).rowcount == 0:
+                c.execute('INSERT INTO totals (user, total) VALUES (?, ?)', (user, delta))
+
+        return True
+
+    def best(self, user, level):
+        row = self._connection.execute(
+            'SELECT s.* FROM best b JOIN solutions s ON s.id = b.solution_id WHERE b.user = ? AND b.level = ?',
+            (user, level)
+        ).fetchone()
+
+        return None if row is None else Solution(*row)
+
+    def best_per_level(self, user):
+        rows = self._connection.execute(
+            'SELECT s.* FROM best b JOIN solutions s ON s.id = b.solution_id WHERE b.user = ? ORDER BY b.level',
+            (user,)
+        )
+
+        return [Solution(*row) for row in rows]
+
+    def history(self, user, level):
+        rows = self._connection.execute(
+            'SELECT * FROM solutions WHERE user = ? AND level = ? ORDER BY id',
+            (user, level)
+        )
+
+        return [Solution(*row) for row in rows]
+
+    def total(self, user):
+        row = self._connection.execute(
+            'SELECT total FROM totals WHERE user = ?',
+            (user,)
+        ).fetchone()
+
+        return 0 if row is None else row[0]
+
+    def rank(self, user):
+        """Returns the user's position on the leaderboard, or None if they
+        haven't recorded any solutions. Users with the same total share a rank.
+        """
+        row = self._connection.execute(
+            'SELECT 1 + (SELECT COUNT(*) FROM totals WHERE total > t.total) FROM totals t WHERE user = ?',
+            (user,)
+        ).fetchone()
+
+        return None if row is None else row[0]
+
+    def leaderboard(self, limit=10, offset=0):
+        """Returns a list of (rank, user, total) ordered by rank."""
+        rows = self._connection.execute(
+            'SELECT user, total FROM totals ORDER BY total DESC, user LIMIT ? OFFSET ?',
+            (limit, offset)
+        ).fetchall()
+
+        leaderboard = []
+        for i, (user, total) in enumerate(rows):
+            if leaderboard and leaderboard[-1][2] == total:
+                rank = leaderboard[-1][0]
+            elif i == 0:
+                rank = self.rank(user)
+            else:
+                rank = offset + i + 1
+            leaderboard.append((rank, user, total))
+
+        return leaderboard
+
+    def level_leaderboard(self, level, limit=10):
+        """Returns the best solutions for a level ordered by score."""
+        rows = self._connection.execute(
+            'SELECT s.* FROM best b JOIN solutions s ON s.id = b.solution_id WHERE b.level = ? ORDER BY b.score DESC, b.bytes, b.solution_id LIMIT ?',
+            (level, limit)
+        )
+
+        return [Solution(*row) for row in rows]
+
+
+class Solution:
+    def __init__(self, id, user, level, program_hash, score, bytes, judged_at):
+        self.id = id
+        self.user = user
+        self.level = level
+        self.program_hash = program_hash
+        self.score = score
+        self.bytes = bytes
+        self.judged_at = judged_at
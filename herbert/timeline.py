@@ -0,0 +1,94 @@
+from . import constants
+
+
+DEFAULT_INTERVAL = constants.DEFAULT_CHECKPOINT_INTERVAL
+DEFAULT_BUDGET = constants.DEFAULT_CHECKPOINT_BUDGET
+
+
+class Timeline:
+    """A run that can seek to any step, backward or forward.
+
+    A checkpoint of the runtime environment and the machine is taken every
+    interval commands. Seeking restores the last checkpoint at or before the
+    step, unless the run is already between them, and runs forward from there,
+    so it never runs more than interval commands.
+
+    At most budget checkpoints are kept. When there would be more, every other
+    one is dropped and the interval doubles.
+    """
+
+    def __init__(self, runtime, machine, *, interval=DEFAULT_INTERVAL, budget=DEFAULT_BUDGET):
+        if interval < 1:
+            raise ValueError('the interval must be at least 1: %d' % interval)
+
+        if budget < 2:
+            raise ValueError('the budget must be at least 2: %d' % budget)
+
+        self.runtime = runtime
+        self.machine = machine
+        self.interval = interval
+        self.budget = budget
+        self.steps = 0
+        self.end = None     # the number of commands the program runs, once known
+        self._checkpoints = []
+        self._checkpoint()
+
+    @property
+    def finished(self):
+        return self.steps == self.end
+
+    @property
+    def checkpoints(self):
+        return [steps for steps, _, _ in self._checkpoints]
+
+    def step(self):
+        """Runs the next command and returns True, or returns False if the
+        program has ended.
+        """
+        if self.steps == self.end:
+            return False
+
+        try:
+            command = next(self.machine)
+        except StopIteration:
+            self.end = self.steps
+            return False
+
+        self.runtime.step(command)
+        self.steps += 1
+
+        if self.steps % self.interval == 0 and self.steps > self._checkpoints[-1][0]:
+            self._checkpoint()
+
+        return True
+
+    def seek(self, steps):
+        """Goes to the given step, or as close to it as the program runs, and
+        returns the step it's at.
+        """
+        steps = max(steps, 0)
+        if self.end is not None:
+            steps = min(steps, self.end)
+
+        checkpoint = None
+        for c in reversed(self._checkpoints):
+            if c[0] <= steps:
+                checkpoint = c
+                break
+
+        if not checkpoint[0] <= self.steps <= steps:
+            self.steps, snapshot, continuation = checkpoint
+            self.runtime.restore(snapshot)
+            self.machine.restore(continuation)
+
+        while self.steps < steps and self.step():
+            pass
+
+        return self.steps
+
+    def _checkpoint(self):
+        self._checkpoints.append((self.steps, self.runtime.snapshot(), self.machine.continuation()))
+
+        if len(self._checkpoints) > self.budget:
+            self.interval *= 2
+            self._checkpoints = [c for c in self._checkpoints if c[0] % self.interval == 0]
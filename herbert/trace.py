@@ -0,0 +1,227 @@
+"""Compact recordings of the commands a run outputs.
+
+A trace packs each command into 2 bits, 4 to a byte, behind a header that
+identifies the level and the program it was recorded from, so a run of 100
+million commands takes 25MB. Replaying a trace steps the level through the
+recorded commands without running the program.
+
+The file starts with MAGIC, then the header as a line of JSON and then the
+packed commands. Command i is in byte i // 4, at bit 2 * (i % 4).
+"""
+import hashlib
+import itertools
+import json
+
+from .error import TraceError
+
+
+MAGIC = b'herbert-trace\n'
+VERSION = 1
+
+# The code of each command, 3 is unused
+CODES = {'s': 0, 'l': 1, 'r': 2}
+
+# The number of commands packed or unpacked at a time, a multiple of 4
+CHUNK = 1 << 16
+
+# Every 4 commands -> their byte, and every byte -> its 4 commands or None if
+# it has an unused code
+_PACK = {}
+_UNPACK = [None] * 256
+
+for _commands in itertools.product(CODES, repeat=4):
+    _byte = sum(CODES[command] << 2 * i for i, command in enumerate(_commands))
+    _PACK[''.join(_commands)] = _byte
+    _UNPACK[_byte] = ''.join(_commands)
+
+
+def pack(commands):
+    """Packs a string of commands. The last byte is padded with s's."""
+    commands += 's' * (-len(commands) % 4)
+    return bytes(_PACK[commands[i:i + 4]] for i in range(0, len(commands), 4))
+
+
+def unpack(data):
+    """Returns the string of commands in data, including any padding."""
+    try:
+        return ''.join(map(_UNPACK.__getitem__, data))
+    except TypeError:
+        raise TraceError('the trace has an unknown command') from None
+
+
+def hash_level(level):
+    """Returns a hash of the layout, points and maximum bytes of a level."""
+    text = '\n'.join(''.join(row) for row in level.grid) + '\n%d\n%d' % (level.points, level.max_bytes)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class Trace:
+    """The commands of a run along with what they were recorded from.
+
+    count is the number of commands and reason the reason the run ended, one
+    of runner.HALTED, EXHAUSTED or CYCLE.
+    """
+
+    def __init__(self, data, count, *, level_name, level_hash, program_hash, bytes, reason):
+        if len(data) != (count + 3) // 4:
+            raise TraceError('expected %d bytes of commands but got %d' % ((count + 3) // 4, len(data)))
+
+        self.data = data
+        self.count = count
+        self.level_name = level_name
+        self.level_hash = level_hash
+        self.program_hash = program_hash
+        self.bytes = bytes
+        self.reason = reason
+
+    @classmethod
+    def fromfile(cls, file):
+        """Reads a trace from a binary file."""
+        if file.readline() != MAGIC:
+            raise TraceError('not a trace')
+
+        try:
+            header = json.loads(file.readline().decode('utf-8'))
+            version = header.pop('version')
+            count = header.pop('count')
+        except (ValueError, KeyError, AttributeError):
+            raise TraceError('the header is malformed') from None
+
+        if version != VERSION:
+            raise TraceError('unsupported version: %s' % version)
+
+        try:
+            return cls(file.read(), count, **header)
+        except TypeError:
+            raise TraceError('the header is malformed') from None
+
+    def tofile(self, file):
+        """Writes the trace to a binary file."""
+        header = {
+            'version': VERSION,
+            'count': self.count,
+            'level_name': self.level_name,
+            'level_hash': self.level_hash,
+            'program_hash': self.program_hash,
+            'bytes': self.bytes,
+            'reason': self.reason
+        }
+
+        file.write(MAGIC)
+        file.write(json.dumps(header, sort_keys=True).encode('utf-8') + b'\n')
+        file.write(self.data)
+
+    def check(self, level):
+        """Raises TraceError unless the trace was recorded on level."""
+        if hash_level(level) != self.level_hash:
+            raise TraceError('the trace was recorded on a different level')
+
+    def decode(self, start, n):
+        """Returns the string of at most n commands from the start-th one."""
+        stop = min(start + n, self.count)
+        if start >= stop:
+            return ''
+
+        lo = start // 4
+        return unpack(self.data[lo:(stop + 3) // 4])[start - 4 * lo:stop - 4 * lo]
+
+    def chunks(self):
+        """Yields the commands as strings of at most CHUNK commands."""
+        for start in range(0, self.count, CHUNK):
+            yield self.decode(start, CHUNK)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def player(self):
+        return Player(self)
+
+
+class Player:
+    """Outputs the commands of a trace like a machine, so that a Timeline can
+    seek through a replay.
+    """
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.restore(0)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        offset = self.position - self._start
+
+        if offset == len(self._chunk):
+            if self.position >= self.trace.count:
+                raise StopIteration
+
+            self._start = self.position
+            self._chunk = self.trace.decode(self.position, CHUNK)
+            offset = 0
+
+        self.position += 1
+        return self._chunk[offset]
+
+    def continuation(self):
+        return self.position
+
+    def restore(self, position):
+        self.position = self._start = position
+        self._chunk = ''
+
+
+class Recorder:
+    """Wraps a machine and packs the commands it outputs."""
+
+    def __init__(self, machine):
+        self.machine = machine
+        self._data = bytearray()
+        self._pending = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        command = next(self.machine)
+        pending = self._pending
+
+        # Packing before appending leaves a command that isn't one, and that
+        # the runtime environment will reject, unpacked
+        if len(pending) == CHUNK:
+            self._data += pack(''.join(pending))
+            pending.clear()
+
+        pending.append(command)
+        return command
+
+    def trace(self, count, **header):
+        """Returns a Trace of the first count commands output. There may be one
+        more, since a run peeks at the next command when it uses up its budget.
+        """
+        data = self._data + pack(''.join(self._pending))
+        del data[(count + 3) // 4:]
+
+        if count % 4:
+            # Clear the bits of the command peeked at
+            data[-1] &= (1 << 2 * (count % 4)) - 1
+
+        return Trace(bytes(data), count, **header)
+
+
+def replay(level, trace):
+    """Steps level through the commands of trace and returns a runner.Result,
+    as if the program the trace was recorded from had been run.
+    """
+    from .runner import Result
+    from .simulation import advance
+
+    trace.check(level)
+
+    runtime = level(trace.bytes)
+
+    for chunk in trace.chunks():
+        advance(runtime, chunk)
+
+    return Result(runtime, trace.count, trace.reason)
@@ -1,76 +1,68 @@
 import curses
-import os
+import math
 import time
 
-from . import constants, counter, interpreter, parser
-from .error import LevelError, ProgramError, SyntaxError
-from .level import Level
-from .util import cachedmethod
+from . import constants
+from .level import EMPTY, ROBOT_DIRECTIONS, WHITE_BUTTON
+from .loader import load_level, load_program
+from .timeline import DEFAULT_BUDGET, DEFAULT_INTERVAL, Timeline
 
 
-def main(level_file, program_file, fps):
-    curses.wrapper(UI(load(level_file, program_file, fps)))
+def main(level_file, program_file, fps, **kwargs):
+    curses.wrapper(UI(load(level_file, program_file, fps, **kwargs)))
 
 
-def load(level_file, program_file, fps):
+def load(level_file, program_file, fps, **kwargs):
     level = load_level(level_file)
     program = load_program(program_file)
 
-    return Context(level, program, fps)
-
-
-def load_level(file):
-    try:
-        level = Level.fromfile(file)
-    except ValueError as e:
-        raise LevelError('Sorry, we were unable to parse the level: %s.' % e) from e
-    except OSError as e:
-        raise LevelError('Sorry, we were unable to operate on the level file.') from e
-    except:
-        raise LevelError('Sorry, an unexpected error occurred while accessing the level file.')
-    else:
-        level.name = os.path.splitext(os.path.basename(file.name))[0]
-        return level
-
-
-def load_program(file):
-    try:
-        source_code = file.read()
-    except OSError as e:
-        raise ProgramError('Sorry, we were unable to operate on the program file.') from e
-    except:
-        raise ProgramError('Sorry, an unexpected error occurred while accessing the program file.')
-    else:
-        try:
-            return Program(source_code)
-        except SyntaxError as e:
-            raise ProgramError('Sorry, we were unable to parse the program due to a syntax error.') from e
-
-
-class Program:
-    def __init__(self, source_code):
-        self.ast = parser.parse(source_code)
-        self.source_code = source_code
-
-    @cachedmethod
+    return Context(level, program, fps, **kwargs)
+
+
+def replay(level, trace, fps, **kwargs):
+    curses.wrapper(UI(Context(level, Replay(trace), fps, **kwargs)))
+
+
+class Replay:
+    """Plays a trace.Trace in place of a Program."""
+
+    def __init__(self, trace):
+        self.trace = trace
+
     def bytes(self):
-        return counter.count_bytes(self.ast)
+        return self.trace.bytes
 
-    @cachedmethod
     def lines(self):
-        return self.source_code.split('\n')
+        return [
+            'Replaying a trace of %d commands' % self.trace.count,
+            'Program %s' % self.trace.program_hash[:16]
+        ]
 
     def commands(self):
-        return interpreter.interp(self.ast)
+        return self.trace.player()
+
+
+# Beyond MAX_FPS frames per second, speeding up runs more commands per frame
+MAX_FPS = 32
+MIN_SPEED = 0.25
+MAX_SPEED = 1 << 20
+
+# The most commands run at full speed in one go, see run_to_end
+MAX_STEPS = constants.DEFAULT_MAX_STEPS
+
+# Jumping backward or forward skips this many seconds of playback
+JUMP_SECONDS = 10
 
 
 class Context:
-    def __init__(self, level, program, fps):
+    def __init__(self, level, program, fps, clock=time.perf_counter, *, checkpoint_interval=DEFAULT_INTERVAL, checkpoint_budget=DEFAULT_BUDGET):
         self.level = level
         self.program = program
         self.draw_callback = None
-        self.fps = fps
-        self._spf = 1 / fps
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_budget = checkpoint_budget
+        self._clock = clock
+        self._set_speed(fps)
 
     @property
     def total_points(self):
@@ -96,17 +88,35 @@ class Context:
     def completed(self):
         return self._re.completed
 
+    @property
+    def current_points(self):
+        return self._re.current_points
+
+    @property
+    def max_points(self):
+        return self._re.max_points
+
     @property
     def grid(self):
         return self._re.grid()
 
+    @property
+    def runtime(self):
+        return self._re
+
+    @property
+    def finished(self):
+        return self._timeline.finished
+
+    @property
+    def steps(self):
+        return self._timeline.steps
+
     def reset(self, draw_callback=None):
         self.running = False
-        self.max_points = self.current_points = 0
-        self._re = self.level()
-        self._commands = self.program.commands()
-        self._start_time = None
-        self._run_now = False
+        self._re = self.level(self.bytes)
+        self._timeline = Timeline(self._re, self.program.commands(), interval=self.checkpoint_interval, budget=self.checkpoint_budget)
+        self._deadline = None
 
         if draw_callback is None:
             self._draw()
@@ -114,52 +124,123 @@ class Context:
             draw_callback()
 
     def start(self):
-        if not self.running and self._commands:
+        if not self.running and not self.finished:
             self.running = True
-            self._start_time = time.perf_counter()
-            self._run_now = True
+            self._deadline = self._clock()
             self._draw()
 
     def stop(self):
         if self.running:
             self.running = False
-            self._start_time = None
-            self._run_now = False
+            self._deadline = None
             self._draw()
 
     def step(self):
         if not self.running:
-            if self._move():
+            if self._advance(1):
                 self._draw()
 
+    def seek(self, steps):
+        """Goes backward or forward to the given step."""
+        self._timeline.seek(steps)
+
+        if self.finished:
+            self.running = False
+
+        self._draw()
+
+    def back(self):
+        self.seek(self.steps - 1)
+
+    def jump_back(self):
+        self.seek(self.steps - self._jump())
+
+    def jump_forward(self):
+        self.seek(self.steps + self._jump())
+
+    def faster(self):
+        self._set_speed(self.speed * 2)
+        self._draw()
+
+    def slower(self):
+        self._set_speed(self.speed / 2)
+        self._draw()
+
+    def run_to_end(self):
+        """Runs the program, at full speed, until it ends or MAX_STEPS commands
+        have run and only then draws.
+        """
+        self.running = False
+
+        if self._advance(MAX_STEPS):
+            self._draw()
+
+    def run_to_button(self):
+        """Like run_to_end but stops as soon as the robot steps on a button."""
+        self.running = False
+
+        re = self._re
+        robot = re.robot
+        position = robot.row, robot.col
+
+        def pressed():
+            # The robot only ever lands on a button by moving onto it
+            nonlocal position
+            previous, position = position, (robot.row, robot.col)
+            return position != previous and (position in re.white_buttons or position in re.gray_buttons)
+
+        if self._advance(MAX_STEPS, pressed):
+            self._draw()
+
     def update(self):
         if self.running:
-            end_time = time.perf_counter()
-            elapsed_time = end_time - self._start_time
+            now = self._clock()
 
-            if self._run_now or elapsed_time > self._spf:
-                self._run_now = False
-                if self._move():
+            if now >= self._deadline:
+                self._deadline += self._spf
+                if self._deadline <= now:
+                    # Frames were missed, skip them rather than catch up
+                    self._deadline = now + self._spf
+
+                if self._advance(self._commands_per_frame):
                     self._draw()
 
-            if elapsed_time > self._spf:
-                self._start_time = end_time
+    def timeout(self):
+        """Returns the number of seconds until the next frame is due, or None if
+        no frame is due until the user does something.
+        """
+        if not self.running:
+            return None
+
+        return max(0, self._deadline - self._clock())
+
+    def _set_speed(self, speed):
+        # speed is in commands per second
+        self.speed = min(max(speed, MIN_SPEED), MAX_SPEED)
+        self._commands_per_frame = math.ceil(self.speed / MAX_FPS)
+        self.fps = self.speed / self._commands_per_frame
+        self._spf = 1 / self.fps
+
+    def _jump(self):
+        return max(1, round(JUMP_SECONDS * self.speed))
+
+    def _advance(self, n, stop=None):
+        # Runs at most n commands, or until stop() is true after one of them,
+        # and returns False iff the program had already ended
+        if self.finished:
+            return False
 
-    def _move(self):
-        if self._commands:
-            try:
-                command = next(self._commands)
-            except StopIteration:
-                self._commands = None
+        step = self._timeline.step
+
+        for _ in range(n):
+            if not step():
                 self.running = False
-            else:
-                self._re.step(command)
-                self.current_points = self._re.score(self.bytes)
-                self.max_points = max(self.max_points, self.current_points)
+                break
 
-            return True
+            if stop is not None and stop():
+                break
 
-        return False
+        return True
 
     def _draw(self):
         if self.draw_callback is not None:
@@ -173,7 +254,6 @@ class UI:
 
     def __call__(self, stdscr):
         curses.curs_set(0)
-        stdscr.nodelay(True)
 
         self.stdscr = stdscr
         self.windows = windows = []
@@ -192,6 +272,11 @@ class UI:
         ctx.reset(self.draw)
 
         while True:
+            # Wait for a key until the next frame is due, or indefinitely when
+            # the program isn't running
+            timeout = ctx.timeout()
+            stdscr.timeout(-1 if timeout is None else math.ceil(1000 * timeout))
+
             c = stdscr.getch()
 
             if c == ord('g'):
@@ -202,6 +287,20 @@ class UI:
                 ctx.step()
             elif c == ord('r'):
                 ctx.reset()
+            elif c in (ord('+'), ord('=')):
+                ctx.faster()
+            elif c == ord('-'):
+                ctx.slower()
+            elif c == ord('e'):
+                ctx.run_to_end()
+            elif c == ord('b'):
+                ctx.run_to_button()
+            elif c == ord('p'):
+                ctx.back()
+            elif c == ord('['):
+                ctx.jump_back()
+            elif c == ord(']'):
+                ctx.jump_forward()
             elif c == ord('q'):
                 break
 
@@ -238,8 +337,9 @@ class Window:
     def add_string(self, x, y, s):
         self._actions.append(AddString(x, y, s))
 
-    def draw(self):
-        self._handle.clear()
+    def draw(self, erase=True):
+        if erase:
+            self._handle.erase()
 
         for action in self._actions:
             action(self._handle)
@@ -255,10 +355,11 @@ class WindowWithBorders(Window):
         self._parent = self._handle
         self._handle = curses.newwin(height-2, width-2, y+1, x+1)
 
-    def draw(self):
-        self._parent.box()
-        self._parent.noutrefresh()
-        super().draw()
+    def draw(self, erase=True):
+        if erase:
+            self._parent.box()
+            self._parent.noutrefresh()
+        super().draw(erase)
 
 
 class Title(Window):
@@ -274,6 +375,7 @@ class Status(Window):
     def __init__(self, context):
         super().__init__(0, 1, curses.COLS, 1)
         self.context = context
+        self._text = None
 
     def draw(self):
         max_points = self.context.max_points
@@ -284,8 +386,14 @@ class Status(Window):
         level_name = self.context.level_name
         solved_status = '(' + ('Solved' if self.context.completed else 'Unsolved') + ')'
 
-        self.add_string(1, 0, 'Points %d/%d    (%d now)    Bytes: %d    (Max %d)    %s    %s' % (max_points, total_points, current_points, bytes, max_bytes, level_name, solved_status))
-        super().draw()
+        steps = self.context.steps
+
+        text = 'Points %d/%d    (%d now)    Bytes: %d    (Max %d)    %s    %s    Steps: %d' % (max_points, total_points, current_points, bytes, max_bytes, level_name, solved_status, steps)
+
+        if text != self._text:
+            self._text = text
+            self.add_string(1, 0, text)
+            super().draw()
 
 
 _WIDTH = 1+1+25+24+1+1
@@ -293,14 +401,63 @@ _HEIGHT = 1+25+1
 
 
 class Runtime(WindowWithBorders):
+    """Draws the whole grid only when the runtime environment changes, on a
+    reset, and otherwise only the spots that changed since the last draw.
+    """
+
     def __init__(self, context):
         super().__init__(0, 2, _WIDTH, _HEIGHT)
         self.context = context
+        self._re = None
+        self._cells = None
 
     def draw(self):
-        for r, row in enumerate(self.context.grid):
-            self.add_string(1, r, ' '.join(row))
-        super().draw()
+        re = self.context.runtime
+
+        if re is not self._re:
+            self._re = re
+            self._cells = cells(re)
+
+            for r, row in enumerate(re.grid()):
+                self.add_string(1, r, ' '.join(row))
+            super().draw()
+        else:
+            changes, self._cells = changed_cells(re, self._cells)
+
+            for (r, c), ch in changes:
+                self.add_string(1 + 2*c, r, ch)
+            super().draw(erase=False)
+
+
+def cells(re):
+    """Returns the symbols at the spots of a runtime environment's grid that
+    can change, its white buttons and its robot, by spot.
+    """
+    result = {}
+
+    for pos, white_button in re.white_buttons.items():
+        result[pos] = 'b' if white_button.pressed else WHITE_BUTTON
+
+    robot = re.robot
+    result[(robot.row, robot.col)] = ROBOT_DIRECTIONS[robot.heading]
+
+    return result
+
+
+def changed_cells(re, drawn):
+    """Returns the spots whose symbols differ from those drawn, as given by
+    cells, with their new symbols, and the cells now drawn.
+    """
+    now = cells(re)
+    changes = [(pos, ch) for pos, ch in now.items() if drawn.get(pos) != ch]
+
+    for pos in drawn.keys() - now.keys():
+        # The robot left a spot without a white button
+        r, c = pos
+        ch = re.level.grid[r][c]
+        changes.append((pos, EMPTY if ch in ROBOT_DIRECTIONS else ch))
+
+    return changes, now
 
 
 class SourceCode(WindowWithBorders):
@@ -318,9 +475,14 @@ class Footer(WindowWithBorders):
     def __init__(self, context):
         super().__init__(0, 2+_HEIGHT, 2*_WIDTH, 3)
         self.context = context
+        self._text = None
 
     def draw(self):
         go_stop_msg = '(s) STOP' if self.context.running else '(g) GO'
 
-        self.add_string(1, 0, '%s, (n) STEP, (r) RESET, (q) QUIT' % go_stop_msg)
-        super().draw()
+        text = '%s, (n) STEP, (p) BACK, ([/]) JUMP, (+/-) %g/s, (b) BUTTON, (e) END, (r) RESET, (q) QUIT' % (go_stop_msg, self.context.speed)
+
+        if text != self._text:
+            self._text = text
+            self.add_string(1, 0, text)
+            super().draw()
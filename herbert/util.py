@@ -6,18 +6,16 @@ def pluralize(n, singular, plural):
     return singular if n == 1 else plural
 
 
-_SENTINEL = object()
-
 def cachedmethod(method):
-    cached_result = _SENTINEL
+    # The result is cached on the instance, the first time the method is called
+    name = '_cached_' + method.__name__
 
     @wraps(method)
-    def wrapper(*args, **kwargs):
-        nonlocal cached_result
-
-        if cached_result is _SENTINEL:
-            cached_result = method(*args, **kwargs)
-
-        return cached_result
+    def wrapper(self, *args, **kwargs):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            result = self.__dict__[name] = method(self, *args, **kwargs)
+            return result
 
     return wrapper
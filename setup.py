@@ -3,6 +3,9 @@ from setuptools import setup
 
 setup(
     install_requires=['lark-parser==0.6.4'],
+    extras_require={
+        'numpy': ['numpy']
+    },
     entry_points={
         'console_scripts': [
             'herbert=herbert.cli:main'
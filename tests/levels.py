@@ -0,0 +1,21 @@
+import io
+
+from herbert.level import Level
+
+
+# A 5x10 level with two white buttons and a gray one,
+# which "sslsrssssrs" completes in 11 bytes
+SIMPLE = '''
+..........
+.***......
+.*r.w.g.w.
+.***......
+..........
+'''
+
+
+def make_level(text=SIMPLE, points=50, max_bytes=11):
+    rows = text.split()
+    file = io.StringIO('%s\n%d\n%d' % ('\n'.join(rows), points, max_bytes))
+
+    return Level.fromfile(file, nrows=len(rows), ncols=len(rows[0]))
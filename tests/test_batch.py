@@ -0,0 +1,75 @@
+import io
+import random
+import unittest
+
+from herbert.generator import generate_level
+from herbert.instrumentation import Counter
+from herbert.level import Level
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+else:
+    from herbert.batch import Batch, simulate
+
+
+def random_streams(n, length, seed):
+    rng = random.Random(seed)
+    # Mostly moves, so that the robots get around, of different lengths
+    return [''.join(rng.choice('sssslr') for _ in range(rng.randint(0, length))) for _ in range(n)]
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class BatchTestCase(unittest.TestCase):
+    def assertSameRuns(self, level, streams, bytes=10):
+        batch = simulate(level, streams)
+        points = batch.points(bytes)
+
+        for i, stream in enumerate(streams):
+            re = level(bytes)
+            counter = Counter(re)
+            for command in stream:
+                counter.step(command)
+
+            with self.subTest(i=i):
+                self.assertEqual((batch.row[i], batch.col[i], batch.heading[i]), (re.robot.row, re.robot.col, re.robot.heading))
+                self.assertEqual(batch.pressed_buttons(i), tuple(b.pressed for b in re.white_buttons.values()))
+                self.assertEqual(batch.npressed[i], re.npressed)
+                self.assertEqual(batch.max_npressed[i], re.max_npressed)
+                self.assertEqual(batch.completed[i], re.completed)
+                self.assertEqual(batch.nblocked[i], counter.nblocked)
+                self.assertEqual(batch.nwhite_presses[i], counter.nwhite_presses)
+                self.assertEqual(batch.ngray_presses[i], counter.ngray_presses)
+                self.assertEqual(batch.steps[i], len(stream))
+                self.assertEqual(points[i], re.max_points)
+
+    def test_generated_levels(self):
+        for seed in range(3):
+            text = generate_level(12, 15, white_buttons=70, gray_buttons=4, walls=0.15, seed=seed)
+            level = Level.fromfile(io.StringIO(text), nrows=12, ncols=15)
+
+            with self.subTest(seed=seed):
+                self.assertSameRuns(level, random_streams(50, 600, seed))
+
+    def test_completed(self):
+        level = Level.fromfile(io.StringIO('r.w.w.g\n100\n10'), nrows=1, ncols=7)
+
+        self.assertSameRuns(level, ['ssss', 'ssssss', 'ssssssllss', 'ss', '', 'lsrss'], bytes=8)
+
+    def test_blocks(self):
+        level = Level.fromfile(io.StringIO(generate_level(8, 8, seed=5)), nrows=8, ncols=8)
+        streams = random_streams(10, 50, 5)
+
+        a = simulate(level, streams)
+        b = Batch(level, len(streams))
+        b.run(streams, block=7)
+
+        self.assertEqual(a.position.tolist(), b.position.tolist())
+        self.assertEqual(a.pressed.tolist(), b.pressed.tolist())
+
+    def test_not_a_command(self):
+        level = Level.fromfile(io.StringIO('r.\n10\n10'), nrows=1, ncols=2)
+
+        with self.assertRaises(ValueError):
+            simulate(level, ['ssx'])
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from benchmarks import baseline
+from benchmarks.suite import Benchmark, Measurement, main
+
+
+def measurement(name, timings):
+    return Measurement(Benchmark(name, 'commands', None), 1000, timings, 1024)
+
+
+class BaselineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.baseline = baseline.dump([
+            measurement('a', [1.0, 1.1, 0.9, 1.0, 1.05]),
+            measurement('b', [2.0, 2.1, 1.9, 2.0, 2.05])
+        ])
+
+    def compare(self, *measurements, threshold=baseline.DEFAULT_THRESHOLD):
+        return {c.name: c.outcome for c in baseline.compare(self.baseline, measurements, threshold)}
+
+    def test_slower(self):
+        self.assertEqual(self.compare(measurement('a', [1.2, 1.3, 1.25, 1.2, 1.3])), {'a': baseline.SLOWER})
+
+    def test_faster(self):
+        self.assertEqual(self.compare(measurement('a', [0.5, 0.6, 0.55, 0.5, 0.6])), {'a': baseline.FASTER})
+
+    def test_noise_is_unchanged(self):
+        # The median is 20% slower but one timing is as fast as the baseline
+        self.assertEqual(self.compare(measurement('b', [2.4, 2.5, 1.9, 2.4, 2.45])), {'b': baseline.UNCHANGED})
+
+    def test_threshold(self):
+        a = measurement('a', [1.12, 1.13, 1.12, 1.12, 1.13])
+
+        self.assertEqual(self.compare(a), {'a': baseline.SLOWER})
+        self.assertEqual(self.compare(a, threshold=0.2), {'a': baseline.UNCHANGED})
+
+    def test_new(self):
+        self.assertEqual(self.compare(measurement('c', [1.0])), {'c': baseline.NEW})
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            baseline.save([measurement('a', [1.0, 2.0])], path)
+
+            self.assertEqual(baseline.load(path)['benchmarks']['a']['timings'], [1.0, 2.0])
+
+
+class SuiteTestCase(unittest.TestCase):
+    def test_cache_report(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(main(['sol3c', '--repeat', '2']), 0)
+
+        # Compiled once, then found in the cache on each of the other runs
+        self.assertIn('program cache: 3 hits, 1 misses, 0 evictions, 1 of', output.getvalue())
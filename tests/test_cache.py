@@ -0,0 +1,75 @@
+import unittest
+
+from herbert.cache import ProgramCache
+from herbert.error import SyntaxError
+
+
+class ProgramCacheTestCase(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = ProgramCache(2)
+
+        first = cache.compile('a:sa\na')
+        second = cache.compile('a:sa\na\n')
+        cache.compile('slr')
+
+        self.assertIs(first, second)
+        self.assertEqual(first.bytes, 4)
+
+        info = cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 2)
+        self.assertEqual(info.evictions, 0)
+        self.assertEqual(info.currsize, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ProgramCache(2)
+
+        a = cache.compile('a:sa\na')
+        cache.compile('slr')
+        cache.compile('a:sa\na')
+        cache.compile('rrr')
+
+        self.assertIs(cache.compile('a:sa\na'), a)
+        self.assertEqual(cache.info().evictions, 1)
+
+        cache.compile('slr')
+        self.assertEqual(cache.info().misses, 4)
+
+    def test_resize(self):
+        cache = ProgramCache(3)
+
+        for source_code in ('s', 'l', 'r'):
+            cache.compile(source_code)
+
+        cache.resize(1)
+
+        self.assertEqual(cache.info().currsize, 1)
+        self.assertEqual(cache.info().evictions, 2)
+
+        cache.resize(0)
+        cache.compile('s')
+        cache.compile('s')
+
+        self.assertEqual(cache.info().currsize, 0)
+        self.assertEqual(cache.info().hits, 0)
+
+        with self.assertRaises(ValueError):
+            cache.resize(-1)
+
+    def test_clear(self):
+        cache = ProgramCache()
+
+        cache.compile('s')
+        cache.compile('s')
+        cache.clear()
+
+        self.assertEqual(cache.info(), (0, 0, 0, cache.maxsize, 0))
+
+    def test_syntax_errors_are_not_cached(self):
+        cache = ProgramCache()
+
+        for _ in range(2):
+            with self.assertRaises(SyntaxError):
+                cache.compile('a:\na')
+
+        self.assertEqual(cache.info().currsize, 0)
@@ -0,0 +1,133 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from herbert import cli
+
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+LEVEL = os.path.join(DATA, 'example', 'level3.txt')
+PROGRAM = os.path.join(DATA, 'example', 'sol3a.h')
+
+
+class ImportsTestCase(unittest.TestCase):
+    def test_import(self):
+        modules = self.imported()
+
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('asyncio', modules)
+        self.assertNotIn('sqlite3', modules)
+        self.assertNotIn('herbert.ui', modules)
+        self.assertNotIn('herbert.service', modules)
+
+    def test_help(self):
+        modules = self.imported('--help')
+
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('herbert.loader', modules)
+
+    def test_check(self):
+        modules = self.imported('check', LEVEL)
+
+        self.assertIn('herbert.level', modules)
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('herbert.parser', modules)
+
+    def test_judge(self):
+        modules = self.imported('judge', LEVEL, PROGRAM)
+
+        self.assertIn('herbert.judge', modules)
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('asyncio', modules)
+        self.assertNotIn('sqlite3', modules)
+
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sol3a.trace')
+            self.imported('judge', LEVEL, PROGRAM, '--record', path)
+            modules = self.imported('replay', LEVEL, path)
+
+        self.assertIn('herbert.trace', modules)
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('herbert.parser', modules)
+
+    def test_solve(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'level.txt')
+            with open(path, 'w') as file:
+                file.write('.' * 25 + '\n' + 'r...w' + '.' * 20 + '\n' + ('.' * 25 + '\n') * 23 + '100\n13')
+
+            modules = self.imported('solve', path, '--workers', '1', '--quiet')
+
+        self.assertIn('herbert.solver', modules)
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('herbert.parser', modules)
+
+    def test_golf(self):
+        modules = self.imported('golf', LEVEL, PROGRAM, '--workers', '1', '--quiet')
+
+        self.assertIn('herbert.golf', modules)
+        self.assertNotIn('curses', modules)
+        self.assertNotIn('lark', modules)
+        self.assertNotIn('herbert.parser', modules)
+
+    def imported(self, *args):
+        code = textwrap.dedent('''
+            import json, sys
+            from herbert import cli
+            if len(sys.argv) > 1:
+                try:
+                    cli.main(sys.argv[1:])
+                except SystemExit:
+                    pass
+            print(json.dumps(sorted(sys.modules)))
+        ''')
+
+        output = subprocess.run(
+            [sys.executable, '-c', code] + list(args),
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True
+        ).stdout
+
+        return set(json.loads(output.splitlines()[-1]))
+
+
+class ArgumentsTestCase(unittest.TestCase):
+    def assertRejected(self, *args):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli._argument_parser().parse_args(args)
+
+    def test_max_steps(self):
+        self.assertRejected('judge', LEVEL, PROGRAM, '--max-steps', '-1')
+        self.assertRejected('solve', LEVEL, '--max-steps', '-1')
+
+        ns = cli._argument_parser().parse_args(['judge', LEVEL, PROGRAM, '--max-steps', '0'])
+        ns.level.close()
+        ns.program.close()
+
+        self.assertEqual(ns.max_steps, 0)
+
+    def test_serve(self):
+        self.assertRejected('serve', LEVEL, '--workers', '0')
+        self.assertRejected('serve', LEVEL, '--queue-size', '0')
+        self.assertRejected('serve', LEVEL, '--batch-size', '0')
+        self.assertRejected('serve', LEVEL, '--cache-size', '-1')
+
+        ns = cli._argument_parser().parse_args(['serve', LEVEL, '--cache-size', '0'])
+        ns.levels[0].close()
+
+        self.assertEqual(ns.cache_size, 0)
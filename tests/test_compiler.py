@@ -0,0 +1,176 @@
+import random
+import unittest
+
+from herbert import machine
+from herbert.compiler import compile
+from herbert.error import SyntaxError
+from herbert.parser import parse
+
+
+def normalize(program):
+    procedures = sorted((p.name, p.params, p.body) for p in program.procedures.values())
+    return (procedures, program.main, program.bytes)
+
+
+def compile_with_lark(text):
+    try:
+        return normalize(machine.compile(parse(text)))
+    except SyntaxError:
+        return None
+
+
+def compile_by_hand(text):
+    try:
+        return normalize(compile(text))
+    except SyntaxError:
+        return None
+
+
+class ProgramGenerator:
+    PNAMES = 'abcfz'
+    PARAMS = 'ABCZ'
+    ALPHABET = 'slrabzABZ0129-+,():\n '
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def program(self):
+        r = self.random
+        lines = [self.pdef() for _ in range(r.randint(0, 3))]
+        lines.append(self.seq(r.randint(1, 4), params=''))
+        return '\n'.join(lines)
+
+    def pdef(self):
+        r = self.random
+        name = r.choice(self.PNAMES)
+        params = ''.join(r.sample(self.PARAMS, r.randint(0, 3)))
+        head = name + ('(%s)' % ','.join(params) if params else '')
+        return head + ':' + self.seq(r.randint(1, 5), params)
+
+    def seq(self, n, params, depth=0):
+        return ''.join(self.item(params, depth) for _ in range(n))
+
+    def item(self, params, depth):
+        r = self.random
+        x = r.random()
+
+        if params and x < 0.25:
+            return r.choice(params)
+        if x < 0.6 or depth > 2:
+            return r.choice('slr')
+
+        name = r.choice(self.PNAMES)
+        if r.random() < 0.4:
+            return name
+
+        args = [self.arg(params, depth + 1) for _ in range(r.randint(1, 3))]
+        return '%s(%s)' % (name, ','.join(args))
+
+    def arg(self, params, depth):
+        r = self.random
+        x = r.random()
+        param = r.choice(params or self.PARAMS)
+
+        if x < 0.2:
+            return param
+        if x < 0.5:
+            return self.seq(r.randint(1, 3), params, depth)
+
+        terms = [r.choice([param, str(r.randint(0, 12))]) for _ in range(r.randint(1, 3))]
+        expr = terms[0]
+        for term in terms[1:]:
+            expr += r.choice('+-') + term
+        return ('-' if r.random() < 0.3 else '') + expr
+
+    def mutate(self, text):
+        r = self.random
+        i = r.randrange(len(text) + 1)
+        x = r.random()
+
+        if x < 0.4 and i < len(text):
+            return text[:i] + text[i+1:]
+        if x < 0.7 and i < len(text):
+            return text[:i] + r.choice(self.ALPHABET) + text[i+1:]
+        return text[:i] + r.choice(self.ALPHABET) + text[i:]
+
+
+class CompileTestCase(unittest.TestCase):
+    def test_same_as_compiling_the_parse_tree(self):
+        programs = [
+            'slr',
+            'a:ssra\na',
+            'a(A):sa(A-1)\na(4)',
+            'a(A,B,C):f(B)Ca(A-1,B,C)\nf(A):sf(A-1)\na(4,5,rslsr)',
+            'f(A,B,C,D,E,F):sAf(AA,B,F-C+D+2,-D+1,E-1,sFl)\nf(sl,5,-1,100,10,r)',
+            'a:s\na:r\naa',
+            '  a:sa\na\n\n'
+        ]
+
+        for program in programs:
+            with self.subTest(program=program):
+                self.assertIsNotNone(compile_by_hand(program))
+                self.assertEqual(compile_by_hand(program), compile_with_lark(program))
+
+    def test_syntax_errors(self):
+        programs = [
+            '',
+            ':ssra\na',
+            'a:\na',
+            'a:ssra\n',
+            'a:s\n\na',
+            'a: s\na',
+            'a()',
+            'a(s,)',
+            'a(--1)',
+            'a(-s)',
+            'a(1A)',
+            'sA',
+            'l:s\nl',
+            # Always read as the start of a procedure definition
+            'a(A)',
+            'a(A,B)',
+            'a(A):s\na(A)s'
+        ]
+
+        for program in programs:
+            with self.subTest(program=program):
+                with self.assertRaises(SyntaxError):
+                    compile(program)
+
+                with self.assertRaises(SyntaxError):
+                    parse(program)
+
+    def test_error_message(self):
+        with self.assertRaisesRegex(SyntaxError, "unexpected character ' ' at line 2, column 3"):
+            compile('a:s\nb: s\nb')
+
+        with self.assertRaisesRegex(SyntaxError, 'unexpected end of program at line 1, column 6'):
+            compile('a:ssr')
+
+    def test_deep_nesting(self):
+        self.assertEqual(compile('a(' * 100 + 's' + ')' * 100).bytes, 101)
+
+        with self.assertRaisesRegex(SyntaxError, 'nested too deeply at line 2, column'):
+            compile('a(A):A\n' + 'a(' * 3000 + 's' + ')' * 3000)
+
+
+class DifferentialFuzzTestCase(unittest.TestCase):
+    def test_generated_programs(self):
+        generator = ProgramGenerator(seed=26)
+
+        for _ in range(1000):
+            program = generator.program()
+
+            with self.subTest(program=program):
+                self.assertEqual(compile_by_hand(program), compile_with_lark(program))
+
+    def test_mutated_programs(self):
+        generator = ProgramGenerator(seed=32)
+
+        for _ in range(3000):
+            program = generator.program()
+            for _ in range(generator.random.randint(1, 3)):
+                program = generator.mutate(program)
+
+            with self.subTest(program=program):
+                self.assertEqual(compile_by_hand(program), compile_with_lark(program))
@@ -1,11 +1,15 @@
 import unittest
 
+from herbert.compiler import compile
 from herbert.counter import count_bytes
 from herbert.parser import parse
 
 
 def count(program):
-    return count_bytes(parse(program))
+    bytes = count_bytes(parse(program))
+    assert compile(program).bytes == bytes
+
+    return bytes
 
 
 class CountBytesTestCase(unittest.TestCase):
@@ -0,0 +1,64 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from herbert.error import TraceError
+from herbert.export import frames, render, size, write_asciicast, write_frames
+from herbert.judge import judge
+from herbert.level import Level
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = Level.fromfile(io.StringIO('r...w\n10\n10'), nrows=1, ncols=5)
+        self.level.name = 'test'
+        self.trace = judge(self.level, 'ssss', record=True).trace
+
+    def test_frames(self):
+        result = list(frames(self.level, self.trace, speed=2, fps=4))
+
+        # At 2 commands per second every other frame is skipped
+        self.assertEqual([seconds for seconds, _ in result], [0, 0.5, 1.0, 1.5, 2.0])
+        self.assertEqual(result[0][1][-1], 'r . . . w')
+        self.assertEqual(result[2][1][-1], '. . r . w')
+        self.assertEqual(result[-1][1][-1], '. . . . r')
+        self.assertEqual(result[-1][1][0], 'test    Solved    Steps 4')
+
+    def test_skipping(self):
+        result = list(frames(self.level, self.trace, speed=1000, fps=1))
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[-1][1], render(judge(self.level, 'ssss').result.runtime, 'test', 4))
+
+    def test_asciicast(self):
+        file = io.StringIO()
+        width, height = size(self.level)
+        n = write_asciicast(file, frames(self.level, self.trace, speed=4, fps=4), width=width, height=height, title='test')
+
+        lines = file.getvalue().splitlines()
+        header = json.loads(lines[0])
+        events = [json.loads(line) for line in lines[1:]]
+
+        self.assertEqual(n, 5)
+        self.assertEqual(header, {'version': 2, 'width': width, 'height': height, 'title': 'test'})
+        self.assertEqual([event[0] for event in events], [0, 0.25, 0.5, 0.75, 1.0])
+        self.assertTrue(all(event[1] == 'o' for event in events))
+        self.assertTrue(events[-1][2].endswith('. . . . r'))
+
+    def test_frame_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            n = write_frames(directory, frames(self.level, self.trace, speed=1, fps=2), fps=2)
+
+            self.assertEqual(n, 5)
+            self.assertEqual(sorted(os.listdir(directory)), ['%08d.txt' % k for k in (0, 2, 4, 6, 8)])
+
+            with open(os.path.join(directory, '00000008.txt')) as file:
+                self.assertEqual(file.read().splitlines()[-1], '. . . . r')
+
+    def test_different_level(self):
+        level = Level.fromfile(io.StringIO('l...w\n10\n10'), nrows=1, ncols=5)
+
+        with self.assertRaises(TraceError):
+            next(frames(level, self.trace, speed=1))
@@ -0,0 +1,65 @@
+import io
+import unittest
+
+from herbert.compiler import compile
+from herbert.generator import generate_level, generate_program
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.parser import parse
+
+
+class GenerateLevelTestCase(unittest.TestCase):
+    def test_valid(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                text = generate_level(30, 40, white_buttons=25, gray_buttons=3, walls=0.3, seed=seed)
+                level = Level.fromfile(io.StringIO(text), nrows=30, ncols=40)
+
+                self.assertEqual(len(level.white_buttons), 25)
+                self.assertEqual(len(level.gray_buttons), 3)
+                self.assertTrue(level.walls)
+
+    def test_seeded(self):
+        self.assertEqual(generate_level(seed=1), generate_level(seed=1))
+        self.assertNotEqual(generate_level(seed=1), generate_level(seed=2))
+
+    def test_narrow(self):
+        text = generate_level(1, 10, white_buttons=2, walls=0.5, seed=0)
+        Level.fromfile(io.StringIO(text), nrows=1, ncols=10)
+
+        text = generate_level(1, 1, white_buttons=0, walls=0.5, seed=0)
+        Level.fromfile(io.StringIO(text), nrows=1, ncols=1)
+
+    def test_no_room(self):
+        with self.assertRaises(ValueError):
+            generate_level(2, 2, white_buttons=4)
+
+
+class GenerateProgramTestCase(unittest.TestCase):
+    def test_length(self):
+        for seed, (length, depth, nesting) in enumerate([(10, 1, 0), (100, 3, 0), (1000, 10, 1), (5000, 20, 4)]):
+            with self.subTest(length=length, depth=depth, nesting=nesting):
+                source_code = generate_program(length, depth=depth, nesting=nesting, seed=seed)
+
+                self.assertEqual(len(list(Machine(compile(source_code)))), length)
+
+    def test_depth(self):
+        machine = Machine(compile(generate_program(1000, depth=10, seed=0)))
+        depth = 0
+        for _ in machine:
+            depth = max(depth, machine.depth)
+
+        self.assertGreaterEqual(depth, 10)
+
+    def test_parses(self):
+        for seed in range(5):
+            source_code = generate_program(500, depth=5, nesting=seed, seed=seed)
+            parse(source_code)
+
+    def test_seeded(self):
+        self.assertEqual(generate_program(seed=1), generate_program(seed=1))
+        self.assertNotEqual(generate_program(seed=1), generate_program(seed=2))
+
+    def test_too_deep(self):
+        with self.assertRaises(ValueError):
+            generate_program(10, depth=100)
@@ -0,0 +1,116 @@
+import unittest
+
+from herbert import compiler, golf
+from herbert.generator import generate_program
+
+from . import levels
+
+
+def make_level(text):
+    return levels.make_level(text, points=100, max_bytes=30)
+
+
+LEVEL = '''
+r...w.....
+..........
+....w.....
+'''
+
+
+def rewritten(source_code):
+    return {golf.format(rewrite) for rewrite in golf.rewrites(golf.parse(compiler.compile(source_code)))}
+
+
+class FormatTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        for source_code in ('a:sa\na', 'a(A,B):AB\na(ss,ss)s', 'a(A):sa(A-1)\nb(A,B):a(A+B-2)r\nb(-3,2)'):
+            with self.subTest(source_code=source_code):
+                self.assertEqual(golf.format(golf.parse(compiler.compile(source_code))), source_code)
+
+    def test_size(self):
+        for seed in range(10):
+            source_code = generate_program(60, depth=3, nesting=2, seed=seed)
+
+            for rewrite in golf.rewrites(golf.parse(compiler.compile(source_code))):
+                with self.subTest(seed=seed, rewrite=golf.format(rewrite)):
+                    self.assertEqual(golf.size(rewrite), compiler.compile(golf.format(rewrite)).bytes)
+
+
+class RewritesTestCase(unittest.TestCase):
+    def test_delete(self):
+        rewrites = rewritten('srlls')
+
+        self.assertIn('rlls', rewrites)
+        self.assertIn('sls', rewrites)
+        self.assertIn('srs', rewrites)
+
+    def test_inline(self):
+        self.assertIn('sssss', rewritten('a:ss\naas'))
+        self.assertIn('ssss', rewritten('a(A):sa(A-1)\na(4)'))
+
+    def test_outline(self):
+        self.assertIn('a:srs\naaal', rewritten('srssrssrsl'))
+        self.assertIn('a:sl\naasaa', rewritten('a:sl\naasslsl'))
+
+    def test_merge(self):
+        self.assertIn('a(A):sa(A-1)\na(5)', rewritten('a(A):sa(A-1)\na(2)a(3)'))
+        self.assertIn('a:sla\naa', rewritten('a:sla\nb:slb\nab'))
+        self.assertIn('a:sa\nra', rewritten('a(A):sa(A-1)\nra(9)'))
+
+    def test_parameterise(self):
+        self.assertIn('a(A):sla(A-1)\nra(5)s', rewritten('rslslslslsls'))
+        self.assertIn('a(A):sla(A-1)\nsra(2)', rewritten('a(A):sla(A-1)\nsrslsl'))
+        self.assertIn('a:sla\nra', rewritten('rslslslslsl'))
+
+
+class GolfTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level(LEVEL)
+
+    def test_golf(self):
+        for source_code in ('ssssrrrrrss', 'a:ss\nb:rrrr\naabrss', 'a(A):sa(A-1)\na(2)a(2)rss', 'a:s\nb:s\naaabrab'):
+            with self.subTest(source_code=source_code):
+                solution = golf.golf(self.level, source_code, workers=1)
+
+                self.assertEqual(solution.source_code, 'ssssrss')
+                self.assertEqual(solution.bytes, 7)
+                self.assertEqual(solution.points, 428)
+
+    def test_loop(self):
+        solution = golf.golf(make_level('r.........w'), 'ssssssssss', workers=1)
+
+        self.assertEqual(solution.source_code, 'a:sa\na')
+
+    def test_candidates_without_commands(self):
+        # Deleting the s leaves a candidate that recurses forever
+        # without a command, which must count as not solving
+        level = levels.make_level(levels.SIMPLE.replace('g', '.'))
+        solution = golf.golf(level, 'a(A):sa(A+1)\na(1)', workers=1, max_steps=100000)
+
+        self.assertEqual(solution.bytes, 8)
+        self.assertGreater(solution.searched, 0)
+
+    def test_unsolved(self):
+        self.assertIsNone(golf.golf(self.level, 'ssss', workers=1))
+
+    def test_cache(self):
+        cache = {}
+        first = golf.golf(self.level, 'sssslllss', workers=1, cache=cache)
+        second = golf.golf(self.level, 'sssslllss', workers=1, cache=cache)
+
+        self.assertEqual(first.source_code, second.source_code)
+        self.assertGreater(first.searched, 0)
+        self.assertEqual(second.searched, 0)
+        self.assertTrue(cache['ssssrss'])
+
+    def test_progress(self):
+        progress = []
+        golf.golf(self.level, 'a:s\nb:s\naaabrab', workers=1, progress=lambda nbytes, searched: progress.append(nbytes))
+
+        self.assertEqual(progress, sorted(progress, reverse=True))
+        self.assertEqual(progress[-1], 7)
+
+    def test_pool(self):
+        source_code = 'a:ss\nb:rrrr\naabrss'
+
+        self.assertEqual(golf.golf(self.level, source_code, workers=2).source_code, golf.golf(self.level, source_code, workers=1).source_code)
@@ -0,0 +1,99 @@
+import unittest
+
+from herbert import instrumentation
+from herbert.judge import judge
+
+from .levels import make_level
+
+
+class StatsTestCase(unittest.TestCase):
+    def test_phase(self):
+        stats = instrumentation.Stats()
+
+        with stats.phase('compile'):
+            pass
+        with stats.phase('compile'):
+            pass
+
+        self.assertEqual(list(stats.timings), ['compile'])
+        self.assertGreaterEqual(stats.timings['compile'], 0)
+
+    def test_phase_with_error(self):
+        stats = instrumentation.Stats()
+
+        with self.assertRaises(ValueError):
+            with stats.phase('load'):
+                raise ValueError
+
+        self.assertIn('load', stats.timings)
+
+    def test_count(self):
+        stats = instrumentation.Stats()
+        stats.count('commands', 10)
+        stats.count('commands')
+
+        self.assertEqual(stats.counters, {'commands': 11})
+
+    def test_asdict(self):
+        stats = instrumentation.Stats({'simulate': 0.5, 'compile': 0.25}, {'blocked': 2})
+        copy = instrumentation.Stats.fromdict(stats.asdict())
+
+        self.assertEqual(copy.timings, stats.timings)
+        self.assertEqual(copy.counters, stats.counters)
+        self.assertEqual(copy.total_time, 0.75)
+
+    def test_report(self):
+        stats = instrumentation.Stats({'simulate': 0.5, 'compile': 0.25, 'other': 0.25}, {'blocked': 2, 'commands': 5})
+        names = [line.split()[0] for line in stats.report().splitlines()]
+
+        self.assertEqual(names, ['compile', 'simulate', 'other', 'total', 'commands', 'blocked'])
+
+
+class CounterTestCase(unittest.TestCase):
+    def test_step(self):
+        re = make_level()()
+        counter = instrumentation.Counter(re)
+
+        for command in 'llsrrssssllss':
+            counter.step(command)
+
+        self.assertEqual((counter.nblocked, counter.nwhite_presses, counter.ngray_presses), (1, 2, 1))
+        self.assertEqual((re.npressed, re.max_npressed), (1, 1))
+
+
+class JudgeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+
+    def test_counters(self):
+        # Blocked once by the wall behind the robot, then it presses the white
+        # button, the gray button and the white button again
+        judgement = judge(self.level, 'llsrrssssllss')
+        stats = judgement.stats
+
+        self.assertEqual(stats.counters, {'commands': 13, 'blocked': 1, 'white_presses': 2, 'gray_presses': 1})
+        self.assertEqual(set(stats.timings), {'compile', 'setup', 'simulate', 'hash'})
+
+    def test_hooks(self):
+        published = []
+        hook = instrumentation.subscribe(published.append)
+
+        try:
+            judgement = judge(self.level, 'sslsrssssrs')
+        finally:
+            instrumentation.unsubscribe(hook)
+
+        judge(self.level, 'sslsrssssrs')
+
+        self.assertEqual(published, [judgement.stats])
+
+    def test_given_stats(self):
+        stats = instrumentation.Stats()
+
+        with stats.phase('load'):
+            pass
+
+        judgement = judge(self.level, 's', stats=stats)
+
+        self.assertIs(judgement.stats, stats)
+        self.assertEqual(list(stats.timings), ['load', 'compile', 'setup', 'simulate', 'hash'])
@@ -101,6 +101,11 @@ class ExamplesTestCase(unittest.TestCase):
 
         self.assertEqual(run(program, 40), 'sssssrslsrsssssrslsrsssssrslsrsssssrslsr')
 
+    def test_example12(self):
+        program = 'a(A,B):sa(A-1,-B)\na(-1+4,-2)'
+
+        self.assertEqual(run(program), 'sss')
+
 
 class InfiniteRecursionTestCase(unittest.TestCase):
     """These test cases illustrate that some programs that should be able to run
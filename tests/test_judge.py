@@ -0,0 +1,76 @@
+import unittest
+
+from herbert.error import LookupError, SyntaxError, TimeoutError
+from herbert.judge import hash_program, judge, judge_all
+
+from .levels import make_level
+
+
+class JudgeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+
+    def test_solved(self):
+        judgement = judge(self.level, 'sslsrssssrs\n')
+
+        self.assertEqual(judgement.bytes, 11)
+        self.assertEqual(judgement.points, 50)
+        self.assertEqual(judgement.max_npressed, 2)
+        self.assertEqual(judgement.total_buttons, 2)
+        self.assertTrue(judgement.completed)
+        self.assertEqual(judgement.program_hash, hash_program('sslsrssssrs'))
+
+    def test_infinite_program(self):
+        judgement = judge(self.level, 'a:sa\na')
+
+        self.assertEqual(judgement.bytes, 4)
+        self.assertEqual(judgement.points, 12)
+        self.assertFalse(judgement.completed)
+
+    def test_syntax_error(self):
+        with self.assertRaises(SyntaxError):
+            judge(self.level, 'a:\na')
+
+    def test_timeout(self):
+        # Never repeats a state, so only the time limit ends it
+        with self.assertRaisesRegex(TimeoutError, 'the program ran for more than 0.01 seconds'):
+            judge(self.level, 'a(A):lra(A+1)\na(1)', max_steps=10 ** 12, timeout=0.01)
+
+    def test_timeout_without_commands(self):
+        with self.assertRaises(TimeoutError):
+            judge(self.level, 'a(A):a(A+1)\na(1)', timeout=0.001)
+
+    def test_within_timeout(self):
+        self.assertEqual(judge(self.level, 'sslsrssssrs\n', timeout=10).points, 50)
+
+
+class JudgeAllTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+
+    def test_same_judgements(self):
+        programs = ['sslsrssssrs', 'a:sa\na', 'a(A):sa(A-1)\na(100)']
+        judgements = judge_all([(self.level, p, 1) for p in programs], max_steps=500)
+
+        for program, judgement in zip(programs, judgements):
+            with self.subTest(program=program):
+                expected = judge(self.level, program, max_steps=500)
+
+                self.assertEqual(judgement.program_hash, expected.program_hash)
+                self.assertEqual(judgement.points, expected.points)
+                self.assertEqual(judgement.result.steps, expected.result.steps)
+                self.assertEqual(judgement.result.reason, expected.result.reason)
+                self.assertEqual(judgement.stats.counters, expected.stats.counters)
+
+    def test_errors(self):
+        syntax_error, runtime_error, timeout, solved = judge_all([
+            (self.level, 'a:\na', 1),
+            (self.level, 'ssf', 1),
+            (self.level, 'a(A):lra(A+1)\na(1)', 1),
+            (self.level, 'sslsrssssrs', 1)
+        ], max_steps=10 ** 12, timeout=0.01)
+
+        self.assertIsInstance(syntax_error, SyntaxError)
+        self.assertIsInstance(runtime_error, LookupError)
+        self.assertIsInstance(timeout, TimeoutError)
+        self.assertEqual(solved.points, 50)
@@ -0,0 +1,205 @@
+import itertools
+import unittest
+
+from herbert.error import LookupError, RecursionError, TypeError
+from herbert.interpreter import interp
+from herbert.machine import Machine, ObservedMachine, Observer, Paused, compile
+from herbert.parser import parse
+
+
+def run(program, upper_bound=None):
+    commands = Machine(compile(parse(program)))
+
+    if upper_bound:
+        commands = itertools.islice(commands, upper_bound)
+
+    return ''.join(map(str, commands))
+
+
+def interp_run(program, upper_bound=None):
+    commands = interp(parse(program))
+
+    if upper_bound:
+        commands = itertools.islice(commands, upper_bound)
+
+    return ''.join(map(str, commands))
+
+
+class SameAsInterpreterTestCase(unittest.TestCase):
+    PROGRAMS = [
+        ('sssssrsssssrsssssrsssssr', None),
+        ('a:sssssr\naaaa', None),
+        ('a:sssssra\na', 24),
+        ('a(A):sssssra(A-1)\na(4)', None),
+        ('a(A,B):f(B)ra(A-1,B)\nf(A):sf(A-1)\na(4,5)', None),
+        ('a(A,B,C):f(B)Ca(A-1,B,C)\nf(A):sf(A-1)\na(4,5,r)', None),
+        ('a(A):ArAa(AA)\na(s)', 17),
+        ('a(A,B,C):f(B)Ca(A-1,B,C)\nb(A):a(4,5,r)lb(A-1)\nf(A):sf(A-1)\nb(4)', 100),
+        ('a(A,B,C):f(B)Ca(A-1,B,C)\nb(A):a(4,A,r)b(A-1)\nf(A):sf(A-1)\nb(10)', 260),
+        ('a(A,B,C):f(B)Ca(A-1,B,C)\nb(A):a(2,11-A,r)b(A-1)\nf(A):sf(A-1)\nb(10)', 130),
+        ('a(A,B,C):f(B)Ca(A-1,B,C)\nf(A):sf(A-1)\na(4,5,rslsr)', 40),
+        ('a(A,B):sa(A-1,-B+A)r\na(5,-2)', None),
+        ('a(A):A\na(7)', None),
+        ('a:s\na:r\naa', None),
+    ]
+
+    def test_programs(self):
+        for program, upper_bound in self.PROGRAMS:
+            with self.subTest(program=program):
+                self.assertEqual(run(program, upper_bound), interp_run(program, upper_bound))
+
+
+class TailCallTestCase(unittest.TestCase):
+    def test_tail_recursion(self):
+        program = 'a:sa\na'
+
+        self.assertEqual(run(program, 10000), 's' * 10000)
+
+    def test_tail_recursion_through_a_parameter(self):
+        program = 'a(A):Aa(A)\na(sl)'
+
+        self.assertEqual(run(program, 10000), 'sl' * 5000)
+
+    def test_depth_is_constant(self):
+        machine = Machine(compile(parse('a(A):sa(A+1)\na(1)')))
+
+        for command in itertools.islice(machine, 1000):
+            pass
+
+        self.assertEqual(machine.depth, 1)
+
+
+class ContinuationTestCase(unittest.TestCase):
+    def test_same_state(self):
+        machine = Machine(compile(parse('a(A,B):sa(B,A)\na(1,2)')))
+
+        next(machine)
+        first = machine.continuation()
+        next(machine)
+        second = machine.continuation()
+        next(machine)
+        third = machine.continuation()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, third)
+
+    def test_deferred_arguments(self):
+        machine = Machine(compile(parse('a(A):Aa(A)\na(sl)')))
+
+        next(machine)
+        first = machine.continuation()
+        next(machine)
+        next(machine)
+
+        self.assertEqual(first, machine.continuation())
+
+    def test_growing_deferred_arguments(self):
+        machine = Machine(compile(parse('a(A):Aa(AA)\na(s)')))
+
+        next(machine)
+        first = machine.continuation()
+        next(machine)
+
+        self.assertNotEqual(first, machine.continuation())
+
+
+class EventLog(Observer):
+    def __init__(self):
+        self.events = []
+        self.depth = 0
+
+    def push(self, seq):
+        self.depth += 1
+        self.events.append('push')
+
+    def pop(self, seq):
+        self.depth -= 1
+        self.events.append('pop')
+
+    def command(self, seq):
+        self.events.append('command')
+
+    def call(self, name, entered):
+        self.events.append('call %s%s' % (name, '' if entered else ' ignored'))
+
+
+class ObserverTestCase(unittest.TestCase):
+    def test_events(self):
+        log = EventLog()
+        commands = ''.join(ObservedMachine(compile(parse('a(A,B):Ba(A-1,B)\na(2,s)r')), log))
+
+        self.assertEqual(commands, 'ssr')
+        self.assertEqual(log.events, [
+            'push', 'call a', 'push', 'push', 'command', 'pop', 'call a', 'pop', 'push', 'push', 'command', 'pop', 'call a ignored', 'pop', 'command', 'pop'
+        ])
+        self.assertEqual(log.depth, 0)
+
+
+class InstructionsTestCase(unittest.TestCase):
+    def test_max_idle(self):
+        machine = Machine(compile(parse('a(A):b(A)sa(A-1)\nb(A):b(A-1)\na(3)')), max_idle=100)
+
+        self.assertEqual(''.join(machine), 'sss')
+
+        machine = Machine(compile(parse('a(A):b(A)sa(A-1)\nb(A):b(A-1)\na(300)')), max_idle=100)
+
+        with self.assertRaisesRegex(RecursionError, 'the program ran 100 instructions without outputting a command'):
+            ''.join(machine)
+
+    def test_pause(self):
+        source_code = 'a(A,B):Ba(A-1,Bs)\na(20,r)'
+        machine = Machine(compile(parse(source_code)))
+        commands = ''
+
+        while True:
+            machine.pause_at = machine.instructions + 7
+
+            try:
+                commands += next(machine)
+            except Paused:
+                self.assertEqual(machine.instructions, machine.pause_at)
+            except StopIteration:
+                break
+
+        self.assertEqual(commands, run(source_code))
+
+
+class PeekTestCase(unittest.TestCase):
+    def test_peek(self):
+        machine = Machine(compile(parse('a(A):A\na(2)sl')))
+
+        self.assertEqual(machine.peek(), 2)
+        self.assertEqual(machine.peek(), 2)
+        self.assertEqual(next(machine), 2)
+        self.assertEqual(list(machine), ['s', 'l'])
+        self.assertIsNone(machine.peek())
+
+
+class RuntimeErrorTestCase(unittest.TestCase):
+    def test_missing_procedure(self):
+        with self.assertRaisesRegex(LookupError, 'missing procedure: f'):
+            run('f')
+
+    def test_unbound_parameter(self):
+        with self.assertRaisesRegex(LookupError, 'unbound parameter: A'):
+            run('a:Aa\na')
+
+    def test_too_few_arguments(self):
+        with self.assertRaisesRegex(TypeError, 'a takes 1 argument but 0 were given'):
+            run('a(A):Aa\na(s)')
+
+    def test_too_many_arguments(self):
+        with self.assertRaisesRegex(TypeError, 'a takes 2 arguments but 3 were given'):
+            run('a(A,B):ABa(A,B,B)\na(s,r)')
+
+    def test_expected_command_or_procedure_call(self):
+        with self.assertRaisesRegex(TypeError, 'parameter A does not evaluate to a command .* or a procedure call: 1'):
+            run('a(A):Aa(A)\na(1)')
+
+    def test_expected_number(self):
+        with self.assertRaisesRegex(TypeError, 'parameter A does not evaluate to a number'):
+            run('a(A):sa(A-1)\na(r)')
+
+    def test_no_commands(self):
+        with self.assertRaises(RecursionError):
+            run('a(A):a(A+1)\na(1)')
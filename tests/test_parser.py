@@ -1,5 +1,9 @@
+import os
+import pickle
+import tempfile
 import unittest
 
+from herbert import parser
 from herbert.error import SyntaxError
 from herbert.parser import parse
 
@@ -128,3 +132,37 @@ class SyntaxErrorTestCase(unittest.TestCase):
     def test_missing_main(self):
         with self.assertRaises(SyntaxError) as ctx:
             parse('a:ssra\n')
+
+
+class PrebuiltParserTestCase(unittest.TestCase):
+    PROGRAMS = [
+        'slr',
+        'a:ssra\na',
+        'a(A):sa(A-1)\na(4)',
+        'a(A,B,C):f(B)Ca(A-1,B,C)\nf(A):sf(A-1)\na(4,5,rslsr)',
+        'f(A,B,C,D,E,F):sAf(AA,B,F-C+D+2,-D+1,E-1,sFl)\nf(sl,5,-1,100,10,r)'
+    ]
+
+    def test_up_to_date(self):
+        prebuilt = parser.load()
+        built = parser.build()
+
+        self.assertIsNotNone(prebuilt, 'run parser.save() to rebuild %s' % parser.PREBUILT_PATH)
+
+        for program in self.PROGRAMS:
+            with self.subTest(program=program):
+                self.assertEqual(prebuilt.parse(program), built.parse(program))
+
+    def test_missing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(parser.load(os.path.join(directory, 'parser.pickle')))
+
+    def test_different_grammar(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'parser.pickle')
+
+            with open(path, 'wb') as file:
+                pickle.dump(('0.0.0', 'grammar'), file)
+                pickle.dump(parser.build(), file)
+
+            self.assertIsNone(parser.load(path))
@@ -0,0 +1,99 @@
+import io
+import unittest
+
+from herbert.compiler import compile
+from herbert.error import LookupError, TypeError
+from herbert.generator import generate_program
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.profiler import MAIN, Profile, ProfilingMachine
+from herbert.runner import EXHAUSTED, run
+
+
+def profile(source_code):
+    machine = ProfilingMachine(compile(source_code))
+    commands = ''.join(map(str, machine))
+
+    return commands, machine.profile
+
+
+class ProfilingMachineTestCase(unittest.TestCase):
+    def test_same_commands(self):
+        for seed in range(10):
+            source_code = generate_program(2000, depth=10, nesting=seed % 4, seed=seed)
+
+            with self.subTest(seed=seed):
+                commands, p = profile(source_code)
+
+                self.assertEqual(commands, ''.join(Machine(compile(source_code))))
+                self.assertEqual(p.commands, 2000)
+                self.assertEqual(sum(stats.self_commands for stats in p.procedures.values()), 2000)
+
+    def test_same_errors(self):
+        for source_code, error in [('a', LookupError), ('a(A):sA\na(2)', TypeError), ('a(A):s\na', TypeError)]:
+            with self.subTest(source_code=source_code):
+                with self.assertRaises(error):
+                    profile(source_code)
+
+    def test_counting(self):
+        commands, p = profile('a(A):sa(A-1)\na(4)')
+
+        self.assertEqual(commands, 'ssss')
+        self.assertEqual(p['a'].calls, 5)
+        self.assertEqual(p['a'].ignored, 1)
+        self.assertEqual(p['a'].self_commands, 4)
+        self.assertEqual(p['a'].inclusive_commands, 4)
+        self.assertEqual(p['a'].depth, 1)  # tail calls replace the frame
+
+    def test_peek(self):
+        machine = ProfilingMachine(compile('a:s\nal'))
+
+        self.assertEqual(machine.peek(), 's')
+        self.assertEqual(machine.profile.commands, 0)
+        self.assertEqual(next(machine), 's')
+        self.assertEqual(machine.profile['a'].self_commands, 1)
+        self.assertEqual(machine.peek(), 'l')
+        self.assertEqual(machine.profile[MAIN].self_commands, 0)
+        self.assertEqual(''.join(machine), 'l')
+        self.assertEqual(machine.profile[MAIN].self_commands, 1)
+
+    def test_recursion(self):
+        commands, p = profile('a(A):a(A-1)s\na(4)r')
+
+        self.assertEqual(commands, 'ssssr')
+        self.assertEqual(p['a'].depth, 4)
+        self.assertEqual(p['a'].inclusive_commands, 4)
+        self.assertEqual(p[MAIN].self_commands, 1)
+        self.assertEqual(p[MAIN].inclusive_commands, 5)
+
+    def test_deferred(self):
+        commands, p = profile('a(A):AA\nb(A):a(lA)\nb(s)')
+
+        self.assertEqual(commands, 'lsls')
+        self.assertEqual(p['b'].deferred, 2)
+        self.assertEqual(p['b'].self_commands, 2)
+        self.assertEqual(p[MAIN].deferred, 2)
+        self.assertEqual(p[MAIN].self_commands, 2)
+        self.assertEqual(p['a'].self_commands, 0)
+        self.assertEqual(p['a'].inclusive_commands, 2)  # the second A is in tail position
+
+    def test_report(self):
+        _, p = profile('a(A):a(A-1)s\nb:l\na(4)b')
+        lines = p.report('calls').splitlines()
+
+        self.assertEqual([line.split()[0] for line in lines[1:-1]], ['a', 'b', MAIN])
+        self.assertEqual(lines[-1], '5 commands')
+
+        with self.assertRaises(ValueError):
+            p.report('time')
+
+
+class RunTestCase(unittest.TestCase):
+    def test_profile(self):
+        level = Level.fromfile(io.StringIO('r...\n10\n10'), nrows=1, ncols=4)
+        p = Profile()
+        result = run(level, compile('a(A):sa(A+1)\na(1)'), max_steps=100, profile=p)
+
+        self.assertEqual(result.reason, EXHAUSTED)
+        self.assertEqual(p['a'].self_commands, 100)
+        self.assertEqual(p.commands, result.steps)
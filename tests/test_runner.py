@@ -0,0 +1,124 @@
+import unittest
+
+from herbert.error import RecursionError
+from herbert.machine import compile
+from herbert.parser import parse
+from herbert.runner import CYCLE, EXHAUSTED, HALTED, Run, run
+
+from .levels import make_level
+
+
+class RunTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+
+    def run_program(self, program, **kwargs):
+        return run(self.level, compile(parse(program)), **kwargs)
+
+    def test_halted(self):
+        result = self.run_program('sslsrssssrs')
+
+        self.assertEqual(result.reason, HALTED)
+        self.assertEqual(result.steps, 11)
+        self.assertEqual(result.max_npressed, 2)
+        self.assertTrue(result.completed)
+        self.assertIsNone(result.points)
+
+    def test_points(self):
+        result = self.run_program('sslsrssssrs', bytes=11)
+
+        self.assertEqual(result.points, 50)
+
+    def test_exhausted(self):
+        result = self.run_program('a(A):srra(A+1)\na(1)', max_steps=100)
+
+        self.assertEqual(result.reason, EXHAUSTED)
+        self.assertEqual(result.steps, 100)
+
+    def test_exhausted_before_a_failure(self):
+        # The budget runs out before the program gives up without a command
+        result = self.run_program('a(A):a(A+1)\nssa(1)', max_steps=2)
+
+        self.assertEqual(result.reason, EXHAUSTED)
+        self.assertEqual(result.steps, 2)
+
+    def test_exhausted_is_not_recorded_past_the_budget(self):
+        # The command after the budget is a number, which a trace can't hold
+        r = Run(self.level, compile(parse('a(A):A\nssa(2)')), max_steps=2, record=True)
+        r.advance()
+
+        self.assertEqual(r.reason, EXHAUSTED)
+        trace = r.trace(level_name=None, level_hash='', program_hash='', bytes=0)
+        self.assertEqual(trace.decode(0, 10), 'ss')
+
+    def test_exhausted_without_cycle_detection(self):
+        result = self.run_program('a:sa\na', max_steps=1000, detect_cycles=False)
+
+        self.assertEqual(result.reason, EXHAUSTED)
+        self.assertEqual(result.steps, 1000)
+        self.assertEqual(result.max_npressed, 1)
+
+    def test_cycle(self):
+        result = self.run_program('a:sa\na')
+
+        self.assertEqual(result.reason, CYCLE)
+        self.assertLess(result.steps, 100)
+        self.assertEqual(result.max_npressed, 1)
+        self.assertFalse(result.completed)
+
+    def test_cycle_after_completion(self):
+        result = self.run_program('b:lrb\nsslsrssssrsb')
+
+        self.assertEqual(result.reason, CYCLE)
+        self.assertEqual(result.max_npressed, 2)
+        self.assertTrue(result.completed)
+
+    def test_cycle_with_deferred_arguments(self):
+        result = self.run_program('a(A):Aa(A)\na(ssrssrssrssr)')
+
+        self.assertEqual(result.reason, CYCLE)
+        self.assertLess(result.steps, 1000)
+
+    def test_same_outcome_as_exhausting_the_budget(self):
+        programs = [
+            'a:sa\na',
+            'a:sslsrssssrsa\na',
+            'a(A,B):Aa(B,A)\na(sr,ssrs)',
+            'a(A):sAa(A)\nb:ssb\na(r)',
+            'a(A):Aa(AA)\na(s)'
+        ]
+
+        for program in programs:
+            with self.subTest(program=program):
+                detected = self.run_program(program, max_steps=5000)
+                exhausted = self.run_program(program, max_steps=5000, detect_cycles=False)
+
+                self.assertEqual(detected.max_npressed, exhausted.max_npressed)
+                self.assertEqual(detected.completed, exhausted.completed)
+                self.assertLessEqual(detected.steps, exhausted.steps)
+
+    def test_no_commands(self):
+        # The budget only counts commands so the machine has to give up
+        with self.assertRaisesRegex(RecursionError, 'without outputting a command'):
+            self.run_program('a(A):a(A+1)\na(1)', max_steps=100)
+
+    def test_advance_instructions(self):
+        program = compile(parse('a(A):b(A)sa(A-1)\nb(A):b(A-1)\na(5)'))
+        r = Run(self.level, program)
+        turns = 0
+
+        while not r.advance(instructions=3):
+            turns += 1
+            self.assertLessEqual(r._machine.instructions, 3 * turns)
+
+        self.assertEqual(r.reason, HALTED)
+        self.assertEqual(r.steps, 5)
+        self.assertGreater(turns, 10)
+
+    def test_advance_instructions_without_commands(self):
+        r = Run(self.level, compile(parse('a(A):a(A+1)\na(1)')))
+
+        for _ in range(10):
+            self.assertFalse(r.advance(instructions=1000))
+
+        self.assertEqual(r.steps, 0)
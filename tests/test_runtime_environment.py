@@ -3,27 +3,14 @@ import unittest
 
 from herbert.level import Level
 
+from .levels import make_level
+
 
 class StepTestCase(unittest.TestCase):
     def setUp(self):
-        file = self.file = io.StringIO()
-        file.write('..........\n')
-        file.write('.***......\n')
-        file.write('.*r.w.g.w.\n')
-        file.write('.***......\n')
-        file.write('..........\n')
-        file.write('50\n')
-        file.write('11')
-        file.seek(0)
-
-        level = Level.fromfile(file, nrows=5, ncols=10)
-
         # N.B. The sequence of commands "sslsrssssrs"
         # can be used to complete the level.
-        self.re = level()
-
-    def tearDown(self):
-        self.file.close()
+        self.re = make_level()()
 
     def test_lss(self):
         self.re.step('l')
@@ -108,6 +95,20 @@ class StepTestCase(unittest.TestCase):
         self.assertEqual(self.re.max_npressed, 2)
         self.assertTrue(self.re.completed)
 
+    def test_sslsrrss(self):
+        self.re.step('s')
+        self.re.step('s')
+        self.re.step('l')
+        self.re.step('s')
+        self.re.step('r')
+        self.re.step('r')
+        self.re.step('s')
+
+        self.assertEqual(self.re.robot.row, 2)
+        self.assertEqual(self.re.robot.col, 4)
+        self.assertEqual(self.re.npressed, 1)
+        self.assertEqual(self.re.max_npressed, 1)
+
     def test_sslsrssssrsrss(self):
         self.re.step('s')
         self.re.step('s')
@@ -163,3 +164,42 @@ class ScoreTestCase(unittest.TestCase):
         self.assertEqual(re.score(15), 20)
 
         file.close()
+
+
+class PointsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+
+    def test_without_bytes(self):
+        re = self.level()
+
+        re.step('s')
+        re.step('s')
+
+        self.assertIsNone(re.current_points)
+        self.assertIsNone(re.max_points)
+
+    def test_same_as_score(self):
+        re = self.level(11)
+        max_points = 0
+
+        for command in 'sslsrssssrsrrssss':
+            re.step(command)
+            max_points = max(max_points, re.score(11))
+
+            self.assertEqual(re.current_points, re.score(11))
+            self.assertEqual(re.max_points, max_points)
+
+        self.assertEqual(re.max_points, 50)
+
+    def test_white_button_pressed_again(self):
+        re = self.level(11)
+
+        for command in 'ssrrsrrs':
+            re.step(command)
+
+        # Back on the first white button, which doesn't count twice
+        self.assertEqual((re.robot.row, re.robot.col), (2, 4))
+        self.assertEqual(re.npressed, 1)
+        self.assertFalse(re.completed)
+        self.assertEqual(re.current_points, re.score(11))
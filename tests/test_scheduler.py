@@ -0,0 +1,111 @@
+import unittest
+
+from herbert.error import LookupError, RecursionError, TimeoutError
+from herbert.machine import MAX_IDLE, compile
+from herbert.parser import parse
+from herbert.runner import CYCLE, EXHAUSTED, HALTED, run
+from herbert.scheduler import Scheduler
+
+from .levels import make_level
+
+
+# Keeps changing its argument so it never cycles
+MONSTER = compile(parse('a(A):lra(A+1)\na(1)'))
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = make_level()
+        self.scheduler = Scheduler(quantum=10)
+
+    def test_same_results_as_running_alone(self):
+        programs = ['sslsrssssrs', 'a:sa\na', 'a(A):sa(A-1)\na(100)', 'a(A):Aa(AA)\na(s)']
+        tasks = [self.scheduler.submit(self.level, compile(parse(p)), bytes=11, max_steps=500) for p in programs]
+
+        finished = list(self.scheduler.run())
+
+        self.assertEqual(len(finished), len(programs))
+        self.assertEqual(len(self.scheduler), 0)
+
+        for program, task in zip(programs, tasks):
+            with self.subTest(program=program):
+                expected = run(self.level, compile(parse(program)), bytes=11, max_steps=500)
+                actual = task.result()
+
+                self.assertEqual(actual.steps, expected.steps)
+                self.assertEqual(actual.reason, expected.reason)
+                self.assertEqual(actual.max_npressed, expected.max_npressed)
+                self.assertEqual(actual.points, expected.points)
+
+    def test_short_runs_finish_first(self):
+        for _ in range(5):
+            self.scheduler.submit(self.level, MONSTER, max_steps=10000)
+
+        for _ in range(20):
+            self.scheduler.step()
+
+        short = self.scheduler.submit(self.level, compile(parse('a(A):sa(A-1)\na(5)')))
+        finished = next(self.scheduler.run())
+
+        self.assertIs(finished, short)
+        self.assertEqual(short.turns, 1)
+        self.assertEqual(short.result().reason, HALTED)
+
+    def test_priorities(self):
+        low = self.scheduler.submit(self.level, MONSTER, max_steps=10000)
+        high = self.scheduler.submit(self.level, MONSTER, max_steps=10000, priority=3)
+
+        for _ in range(40):
+            self.scheduler.step()
+
+        self.assertEqual(low.turns, 10)
+        self.assertEqual(high.turns, 30)
+
+    def test_budgets(self):
+        task = self.scheduler.submit(self.level, MONSTER, max_steps=25)
+
+        list(self.scheduler.run())
+
+        self.assertEqual(task.turns, 3)
+        self.assertEqual(task.result().reason, EXHAUSTED)
+        self.assertEqual(task.result().steps, 25)
+
+    def test_runs_without_commands_take_turns(self):
+        # Never outputs a command, so only the instructions end its turns
+        idle = self.scheduler.submit(self.level, compile(parse('a(A):a(A+1)\na(1)')))
+        short = self.scheduler.submit(self.level, compile(parse('a(A):sa(A-1)\na(25)')))
+
+        for _ in range(10):
+            self.scheduler.step()
+
+        self.assertTrue(short.done)
+        self.assertEqual(short.result().reason, HALTED)
+        self.assertFalse(idle.done)
+        self.assertEqual(idle.turns, 7)
+
+        list(self.scheduler.run())
+
+        with self.assertRaises(RecursionError):
+            idle.result()
+        self.assertEqual(idle.turns, MAX_IDLE // self.scheduler.instructions)
+
+    def test_errors(self):
+        task = self.scheduler.submit(self.level, compile(parse('ssf')))
+        other = self.scheduler.submit(self.level, compile(parse('a:sa\na')))
+
+        list(self.scheduler.run())
+
+        with self.assertRaisesRegex(LookupError, 'missing procedure: f'):
+            task.result()
+        self.assertEqual(other.result().reason, CYCLE)
+
+    def test_timeouts(self):
+        slow = self.scheduler.submit(self.level, MONSTER, max_steps=10 ** 12, timeout=0.01)
+        short = self.scheduler.submit(self.level, compile(parse('a(A):sa(A-1)\na(25)')), timeout=0.01)
+
+        list(self.scheduler.run())
+
+        with self.assertRaisesRegex(TimeoutError, 'the program ran for more than 0.01 seconds'):
+            slow.result()
+        self.assertGreater(slow.elapsed, 0.01)
+        self.assertEqual(short.result().reason, HALTED)
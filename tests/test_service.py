@@ -0,0 +1,237 @@
+import asyncio
+import concurrent.futures
+import json
+import unittest
+
+from herbert.error import TimeoutError
+from herbert.service import Busy, Service, UnknownLevel, _init_worker, start_server
+
+from .levels import make_level
+
+
+def load_levels():
+    level = make_level()
+    level.name = 'simple'
+
+    return {level.name: level}
+
+
+class FailingExecutor(concurrent.futures.Executor):
+    def __init__(self, error):
+        self.error = error
+
+    def submit(self, fn, *args, **kwargs):
+        raise self.error
+
+
+def make_service(levels, **kwargs):
+    executor = concurrent.futures.ThreadPoolExecutor(1, initializer=_init_worker, initargs=(levels,))
+
+    return Service(levels, workers=1, executor=executor, **kwargs)
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    payload = b'' if body is None else json.dumps(body).encode('utf-8')
+    writer.write(('%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n' % (method, path, len(payload))).encode('ascii'))
+    writer.write(payload)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+
+    return status, json.loads(body.decode('utf-8'))
+
+
+class ServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.levels = load_levels()
+
+    def test_submit(self):
+        async def test():
+            service = make_service(self.levels)
+            service.start()
+            try:
+                return await service.submit('simple', 'sslsrssssrs')
+            finally:
+                await service.close()
+
+        report = asyncio.run(test())
+
+        self.assertEqual(report['points'], 50)
+        self.assertEqual(report['bytes'], 11)
+        self.assertTrue(report['completed'])
+        self.assertEqual(report['stats']['counters']['commands'], 11)
+
+    def test_unknown_level(self):
+        async def test():
+            service = make_service(self.levels)
+            try:
+                await service.submit('missing', 's')
+            finally:
+                await service.close()
+
+        with self.assertRaises(UnknownLevel):
+            asyncio.run(test())
+
+    def test_backpressure(self):
+        async def test():
+            service = make_service(self.levels, queue_size=1)
+            try:
+                # Nothing is taken off the queue until the workers are started
+                first = asyncio.ensure_future(service.submit('simple', 's'))
+                await asyncio.sleep(0)
+
+                with self.assertRaises(Busy):
+                    await service.submit('simple', 'ss')
+
+                service.start()
+                return await first
+            finally:
+                await service.close()
+
+        report = asyncio.run(test())
+
+        self.assertEqual(report['points'], 0)
+
+    def test_batches(self):
+        async def test():
+            service = make_service(self.levels, batch_size=2, max_steps=1000)
+            try:
+                # Queued before the workers start, so the first two are judged together
+                submissions = [
+                    service.submit('simple', 'a(A):lra(A+1)\na(1)', priority=3),
+                    service.submit('simple', 'sslsrssssrs'),
+                    service.submit('simple', 's')
+                ]
+                futures = [asyncio.ensure_future(s) for s in submissions]
+                await asyncio.sleep(0)
+
+                service.start()
+                return await asyncio.gather(*futures)
+            finally:
+                await service.close()
+
+        exhausted, solved, other = asyncio.run(test())
+
+        self.assertEqual(exhausted['reason'], 'exhausted')
+        self.assertEqual(solved['points'], 50)
+        self.assertEqual(other['steps'], 1)
+
+    def test_priority(self):
+        async def test():
+            service = make_service(self.levels)
+            try:
+                await service.submit('simple', 's', priority=0)
+            finally:
+                await service.close()
+
+        with self.assertRaisesRegex(ValueError, 'priority'):
+            asyncio.run(test())
+
+    def test_worker_processes(self):
+        async def test():
+            service = Service(self.levels, workers=1)
+            service.start()
+            try:
+                return await asyncio.gather(
+                    service.submit('simple', 'sslsrssssrs'),
+                    service.submit('simple', 'a:sa\na')
+                )
+            finally:
+                await service.close()
+
+        solved, infinite = asyncio.run(test())
+
+        self.assertEqual(solved['points'], 50)
+        self.assertEqual(infinite['reason'], 'cycle')
+
+    def test_timeout(self):
+        async def test():
+            service = make_service(self.levels, max_steps=10 ** 12, timeout=0.05)
+            service.start()
+            try:
+                # Never repeats a state and never runs out of budget
+                slow = service.submit('simple', 'a(A):lra(A+1)\na(1)')
+                solved = service.submit('simple', 'sslsrssssrs')
+                return await asyncio.gather(slow, solved, return_exceptions=True)
+            finally:
+                await service.close()
+
+        slow, solved = asyncio.run(test())
+
+        self.assertIsInstance(slow, TimeoutError)
+        self.assertEqual(solved['points'], 50)
+
+
+class ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.levels = load_levels()
+
+    def serve(self, *requests, executor=None):
+        async def test():
+            if executor is None:
+                service = make_service(self.levels)
+            else:
+                service = Service(self.levels, workers=1, executor=executor)
+            service.start()
+            server = await start_server(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+
+            try:
+                return [await request(port, *r) for r in requests]
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.close()
+
+        return asyncio.run(test())
+
+    def test_levels(self):
+        [(status, body)] = self.serve(('GET', '/levels'))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {'levels': ['simple']})
+
+    def test_judge(self):
+        [(status, body)] = self.serve(('POST', '/judge', {'level': 'simple', 'program': 'sslsrssssrs'}))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['points'], 50)
+        self.assertEqual(body['buttons'], 2)
+
+    def test_errors(self):
+        responses = self.serve(
+            ('POST', '/judge', {'level': 'missing', 'program': 's'}),
+            ('POST', '/judge', {'level': 'simple', 'program': 'a:\na'}),
+            ('POST', '/judge', {'level': 'simple', 'program': 'f'}),
+            ('POST', '/judge', {'level': 'simple', 'program': 's', 'priority': 'high'}),
+            ('POST', '/judge', ['simple', 's']),
+            ('GET', '/judge'),
+            ('GET', '/missing')
+        )
+
+        self.assertEqual([status for status, _ in responses], [404, 400, 400, 400, 400, 405, 404])
+        self.assertIn('missing procedure: f', responses[2][1]['error'])
+
+    def test_broken_workers(self):
+        executor = FailingExecutor(concurrent.futures.BrokenExecutor('a worker died'))
+
+        with self.assertLogs(level='ERROR'):
+            [(status, body)] = self.serve(('POST', '/judge', {'level': 'simple', 'program': 's'}), executor=executor)
+
+        self.assertEqual(status, 503)
+        self.assertIn('unavailable', body['error'])
+
+    def test_internal_error(self):
+        executor = FailingExecutor(OSError('out of file descriptors'))
+
+        with self.assertLogs(level='ERROR'):
+            [(status, body)] = self.serve(('POST', '/judge', {'level': 'simple', 'program': 's'}), executor=executor)
+
+        self.assertEqual(status, 500)
+        self.assertEqual(body, {'error': 'internal error'})
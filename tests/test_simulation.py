@@ -0,0 +1,67 @@
+import io
+import random
+import unittest
+from unittest import mock
+
+from herbert import simulation
+from herbert.compiler import compile
+from herbert.generator import generate_level, generate_program
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.simulation import simulate
+
+
+def state(re):
+    robot = re.robot
+
+    return (
+        robot.row, robot.col, robot.heading, robot.trail,
+        tuple(white_button.pressed for white_button in re.white_buttons.values()),
+        re.npressed, re.max_npressed, re.completed,
+        re.current_points, re.max_points
+    )
+
+
+def stepped(level, commands, bytes):
+    re = level(bytes)
+    for command in commands:
+        re.step(command)
+    return re
+
+
+class SimulateTestCase(unittest.TestCase):
+    def assertSameState(self, level, commands, bytes=10):
+        self.assertEqual(state(simulate(level, commands, bytes=bytes)), state(stepped(level, commands, bytes)))
+
+    def test_generated(self):
+        for seed in range(4):
+            text = generate_level(30, 30, white_buttons=40, gray_buttons=seed, walls=0.05 * seed, seed=seed)
+            level = Level.fromfile(io.StringIO(text), nrows=30, ncols=30)
+            commands = ''.join(Machine(compile(generate_program(20000, depth=8, nesting=2, seed=seed))))
+
+            with self.subTest(seed=seed):
+                self.assertSameState(level, commands)
+
+    def test_random(self):
+        level = Level.fromfile(io.StringIO(generate_level(10, 10, gray_buttons=2, walls=0.2, seed=7)), nrows=10, ncols=10)
+        rng = random.Random(7)
+
+        self.assertSameState(level, ''.join(rng.choice('ssslr') for _ in range(20000)))
+
+    def test_open(self):
+        # Long stretches without walls, edges or buttons
+        level = Level.fromfile(io.StringIO(generate_level(50, 50, white_buttons=1, walls=0, seed=1)), nrows=50, ncols=50)
+
+        self.assertSameState(level, 'srsrsrsl' * 3000 + 's' * 100 + 'lr' * 5000)
+
+    def test_completed(self):
+        level = Level.fromfile(io.StringIO('r' + '.' * 298 + 'w\n1000\n10'), nrows=1, ncols=300)
+
+        self.assertSameState(level, 'lr' * 200 + 's' * 400, bytes=5)
+
+    def test_without_numpy(self):
+        level = Level.fromfile(io.StringIO(generate_level(10, 10, seed=3)), nrows=10, ncols=10)
+        commands = 'ssrsl' * 1000
+
+        with mock.patch.object(simulation, 'np', None):
+            self.assertSameState(level, commands)
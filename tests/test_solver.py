@@ -0,0 +1,90 @@
+import unittest
+
+from herbert import compiler, solver
+
+from . import levels
+
+
+def make_level(row):
+    return levels.make_level(row, points=100, max_bytes=13)
+
+
+class ProgramsTestCase(unittest.TestCase):
+    def test_sizes(self):
+        for nbytes in range(1, 9):
+            programs = list(solver.programs(nbytes))
+
+            with self.subTest(nbytes=nbytes):
+                self.assertEqual(len(programs), len(set(programs)))
+
+                for source_code in programs:
+                    self.assertEqual(compiler.compile(source_code).bytes, nbytes, source_code)
+
+    def test_counts(self):
+        self.assertEqual(len(list(solver.programs(1))), 1)
+        self.assertEqual(len(list(solver.programs(4))), 22)
+
+    def test_canonical_turns(self):
+        for source_code in solver.programs(6, max_procedures=0):
+            for turns in ('lr', 'rl', 'll', 'rrr'):
+                self.assertNotIn(turns, source_code)
+
+            self.assertNotIn(source_code[-1], 'lr')
+
+    def test_procedures_are_called(self):
+        for source_code in solver.programs(8):
+            *procedures, main = source_code.splitlines()
+
+            for i, procedure in enumerate(procedures):
+                name = solver.NAMES[i]
+                others = procedures[:i] + procedures[i + 1:] + [main]
+
+                with self.subTest(source_code=source_code):
+                    self.assertTrue(procedure.startswith(name))
+                    self.assertTrue(any(name in other for other in others))
+
+    def test_no_procedures(self):
+        self.assertEqual(list(solver.programs(3, max_procedures=0)), ['sss', 'sls', 'srs', 'lss', 'rss', 'rrs'])
+
+
+class SolveTestCase(unittest.TestCase):
+    def test_commands(self):
+        solution = solver.solve(make_level('r...w'), workers=1)
+
+        self.assertEqual(solution.source_code, 'ssss')
+        self.assertEqual(solution.bytes, 4)
+        self.assertEqual(solution.points, 325)
+
+    def test_procedure(self):
+        solution = solver.solve(make_level('r.........w'), workers=1)
+
+        self.assertEqual(solution.source_code, 'a:sa\na')
+        self.assertEqual(solution.bytes, 4)
+
+    def test_too_few_bytes(self):
+        self.assertIsNone(solver.solve(make_level('r...w'), max_bytes=3, workers=1))
+
+    def test_pool(self):
+        level = make_level('r.........w')
+
+        self.assertEqual(solver.solve(level, workers=2).source_code, solver.solve(level, workers=1).source_code)
+
+    def test_progress(self):
+        progress = []
+        solver.solve(make_level('r...w'), workers=1, progress=lambda nbytes, searched: progress.append(nbytes))
+
+        self.assertEqual(progress, [1, 2, 3, 4])
+
+    def test_solves(self):
+        level = make_level('r...w')
+
+        self.assertTrue(solver.solves(level, 'ssss'))
+        self.assertFalse(solver.solves(level, 'sss'))
+        self.assertFalse(solver.solves(level, 'a:sa\na', max_steps=3))
+
+    def test_solves_with_a_number_as_a_command(self):
+        self.assertFalse(solver.solves(make_level('r...w'), 'b(A):A\nb(2)'))
+
+    def test_solves_stops_once_solved(self):
+        # The run would never end, nor cycle, since A keeps growing
+        self.assertTrue(solver.solves(make_level('r...w'), 'a(A):sa(A+1)\na(1)', max_steps=10 ** 12))
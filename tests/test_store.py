@@ -0,0 +1,86 @@
+import unittest
+from unittest import mock
+
+from herbert import store
+from herbert.store import Store
+
+
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = Store()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_empty(self):
+        self.assertIsNone(self.store.best('ann', 'level1'))
+        self.assertEqual(self.store.history('ann', 'level1'), [])
+        self.assertEqual(self.store.total('ann'), 0)
+        self.assertIsNone(self.store.rank('ann'))
+        self.assertEqual(self.store.leaderboard(), [])
+
+    def test_only_the_best_solution_counts(self):
+        self.assertTrue(self.store.record('ann', 'level1', 'h1', 100, 20))
+        self.assertFalse(self.store.record('ann', 'level1', 'h2', 50, 10))
+        self.assertTrue(self.store.record('ann', 'level1', 'h3', 200, 10))
+        self.assertFalse(self.store.record('ann', 'level1', 'h4', 200, 12))
+
+        best = self.store.best('ann', 'level1')
+        self.assertEqual(best.program_hash, 'h3')
+        self.assertEqual(best.score, 200)
+        self.assertEqual(best.bytes, 10)
+
+        self.assertEqual(self.store.total('ann'), 200)
+        self.assertEqual([s.program_hash for s in self.store.history('ann', 'level1')], ['h1', 'h2', 'h3', 'h4'])
+
+    def test_fewer_bytes_breaks_ties(self):
+        self.store.record('ann', 'level1', 'h1', 100, 20)
+
+        self.assertTrue(self.store.record('ann', 'level1', 'h2', 100, 19))
+        self.assertEqual(self.store.best('ann', 'level1').program_hash, 'h2')
+        self.assertEqual(self.store.total('ann'), 100)
+
+    def test_totals_are_summed_over_levels(self):
+        self.store.record('ann', 'level1', 'h1', 100, 20)
+        self.store.record('ann', 'level2', 'h2', 30, 20)
+        self.store.record('ann', 'level2', 'h3', 60, 20)
+
+        self.assertEqual(self.store.total('ann'), 160)
+        self.assertEqual([s.level for s in self.store.best_per_level('ann')], ['level1', 'level2'])
+
+    def test_totals_without_upsert(self):
+        with mock.patch.object(store, 'UPSERT', False):
+            self.store.record('ann', 'level1', 'h1', 100, 20)
+            self.store.record('ann', 'level2', 'h2', 30, 20)
+            self.store.record('ann', 'level2', 'h3', 60, 20)
+
+        self.assertEqual(self.store.total('ann'), 160)
+
+    def test_rank_uses_the_totals_index(self):
+        plan = self.store._connection.execute(
+            'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM totals WHERE total > ?',
+            (0,)
+        ).fetchall()
+
+        self.assertTrue(any('totals_by_total' in row[-1] for row in plan), plan)
+
+    def test_leaderboard(self):
+        self.store.record('ann', 'level1', 'h1', 100, 20)
+        self.store.record('bob', 'level1', 'h2', 300, 20)
+        self.store.record('cat', 'level1', 'h3', 100, 10)
+        self.store.record('dan', 'level1', 'h4', 50, 10)
+
+        self.assertEqual(self.store.leaderboard(), [
+            (1, 'bob', 300),
+            (2, 'ann', 100),
+            (2, 'cat', 100),
+            (4, 'dan', 50)
+        ])
+        self.assertEqual(self.store.leaderboard(limit=2, offset=2), [
+            (2, 'cat', 100),
+            (4, 'dan', 50)
+        ])
+        self.assertEqual(self.store.rank('cat'), 2)
+        self.assertEqual(self.store.rank('dan'), 4)
+
+        self.assertEqual([s.user for s in self.store.level_leaderboard('level1', limit=3)], ['bob', 'cat', 'ann'])
@@ -0,0 +1,97 @@
+import io
+import random
+import unittest
+
+from herbert.compiler import compile
+from herbert.generator import generate_level, generate_program
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.timeline import Timeline
+
+
+class TimelineTestCase(unittest.TestCase):
+    def setUp(self):
+        text = generate_level(10, 10, white_buttons=15, gray_buttons=2, walls=0.2, seed=0)
+        self.level = Level.fromfile(io.StringIO(text), nrows=10, ncols=10)
+        self.program = compile(generate_program(5000, depth=8, nesting=2, seed=0))
+
+    def timeline(self, **kwargs):
+        return Timeline(self.level(10), Machine(self.program), **kwargs)
+
+    def state_at(self, steps):
+        t = self.timeline()
+        for _ in range(steps):
+            t.step()
+        return snapshot(t)
+
+    def trail_at(self, steps):
+        t = self.timeline()
+        for _ in range(steps):
+            t.step()
+        return t.runtime.robot.trail
+
+    def test_seek(self):
+        t = self.timeline(interval=100)
+        rng = random.Random(0)
+
+        for steps in [1234, 50, 0, 4999, 300, 300, 5000, 2500] + [rng.randrange(5001) for _ in range(10)]:
+            with self.subTest(steps=steps):
+                self.assertEqual(t.seek(steps), steps)
+                self.assertEqual(snapshot(t), self.state_at(steps))
+
+    def test_seek_past_the_end(self):
+        t = self.timeline()
+
+        self.assertEqual(t.seek(10000), 5000)
+        self.assertTrue(t.finished)
+        self.assertEqual(t.end, 5000)
+        self.assertFalse(t.step())
+
+        self.assertEqual(t.seek(10000), 5000)
+        self.assertEqual(t.seek(-1), 0)
+        self.assertFalse(t.finished)
+
+    def test_seek_cost(self):
+        t = self.timeline(interval=100)
+        t.seek(5000)
+
+        steps = []
+        step = t.step
+        t.step = lambda: steps.append(None) or step()
+
+        for target in [4999, 17, 3333, 2500, 4321]:
+            del steps[:]
+            t.seek(target)
+
+            self.assertLessEqual(len(steps), 100)
+
+    def test_seek_keeps_the_trail(self):
+        t = self.timeline(interval=100)
+        t.seek(5000)
+        t.seek(2500)
+        trail = t.runtime.robot.trail
+
+        # Cut back and topped up in place, without copying it again
+        for steps in [1000, 4000, 50, 3210]:
+            t.seek(steps)
+
+            with self.subTest(steps=steps):
+                self.assertTrue(t.runtime.robot.trail is trail)
+                self.assertEqual(trail, self.trail_at(steps))
+
+    def test_budget(self):
+        t = self.timeline(interval=100, budget=8)
+        t.seek(5000)
+
+        self.assertLessEqual(len(t.checkpoints), 8)
+        self.assertEqual(t.interval, 800)
+        self.assertEqual(t.checkpoints, [0, 800, 1600, 2400, 3200, 4000, 4800])
+
+        t.seek(1000)
+
+        self.assertEqual(snapshot(t), self.state_at(1000))
+
+
+def snapshot(t):
+    s = t.runtime.snapshot()
+    return s[:3] + tuple(t.runtime.robot.trail) + s[5:]
@@ -0,0 +1,114 @@
+import io
+import unittest
+
+from herbert.compiler import compile
+from herbert.error import TraceError
+from herbert.generator import generate_level, generate_program
+from herbert.judge import judge
+from herbert.level import Level
+from herbert.machine import Machine
+from herbert.runner import CYCLE, EXHAUSTED, HALTED
+from herbert.timeline import Timeline
+from herbert.trace import Trace, pack, replay, unpack
+
+
+def level(text, nrows, ncols):
+    return Level.fromfile(io.StringIO(text), nrows=nrows, ncols=ncols)
+
+
+class PackTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        for commands in ['', 's', 'lr', 'rls', 'srlr', 'srlrl', 'r' * 1001]:
+            with self.subTest(commands=commands):
+                data = pack(commands)
+
+                self.assertEqual(len(data), (len(commands) + 3) // 4)
+                self.assertEqual(unpack(data)[:len(commands)], commands)
+
+    def test_layout(self):
+        self.assertEqual(pack('lrss'), bytes([0b1001]))
+        self.assertEqual(pack('sssr'), bytes([0b10000000]))
+
+    def test_unknown_command(self):
+        with self.assertRaises(TraceError):
+            unpack(bytes([0b11]))
+
+
+class RecordTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = level(generate_level(20, 20, white_buttons=20, gray_buttons=3, seed=1), 20, 20)
+
+    def record(self, source_code, **kwargs):
+        judgement = judge(self.level, source_code, record=True, **kwargs)
+        file = io.BytesIO()
+        judgement.trace.tofile(file)
+        file.seek(0)
+
+        return judgement, Trace.fromfile(file)
+
+    def test_replay(self):
+        for seed in range(5):
+            source_code = generate_program(3000 + seed, depth=5, nesting=seed % 3, seed=seed)
+
+            with self.subTest(seed=seed):
+                judgement, trace = self.record(source_code)
+                result = replay(self.level, trace)
+
+                self.assertEqual(trace.count, 3000 + seed)
+                self.assertEqual(trace.reason, HALTED)
+                self.assertEqual(''.join(trace), ''.join(Machine(compile(source_code))))
+                self.assertEqual(result.points, judgement.points)
+                self.assertEqual(result.max_npressed, judgement.max_npressed)
+                self.assertEqual(result.runtime.grid(), judgement.result.runtime.grid())
+
+    def test_exhausted(self):
+        for max_steps in range(8, 13):
+            with self.subTest(max_steps=max_steps):
+                judgement, trace = self.record('a(A):rsa(A+1)\na(1)', max_steps=max_steps)
+
+                self.assertEqual(trace.reason, EXHAUSTED)
+                self.assertEqual(trace.count, max_steps)
+                self.assertEqual(''.join(trace), 'rs' * (max_steps // 2) + 'r' * (max_steps % 2))
+                self.assertEqual(trace.data, pack(''.join(trace)))
+
+    def test_cycle(self):
+        judgement, trace = self.record('a:sa\na')
+
+        self.assertEqual(trace.reason, CYCLE)
+        self.assertEqual(replay(self.level, trace).points, judgement.points)
+
+    def test_header(self):
+        judgement, trace = self.record('ssl')
+
+        self.assertEqual(trace.program_hash, judgement.program_hash)
+        self.assertEqual(trace.bytes, 3)
+        self.assertEqual(trace.count, 3)
+
+    def test_different_level(self):
+        _, trace = self.record('ssl')
+
+        with self.assertRaises(TraceError):
+            replay(level('r.\n10\n10', 1, 2), trace)
+
+    def test_malformed(self):
+        for data in [b'', b'herbert-trace\n{', b'herbert-trace\n{"version": 2, "count": 0}\n',
+                     b'herbert-trace\n{"version": 1, "count": 5}\n\x00']:
+            with self.subTest(data=data):
+                with self.assertRaises(TraceError):
+                    Trace.fromfile(io.BytesIO(data))
+
+
+class PlayerTestCase(unittest.TestCase):
+    def test_seek(self):
+        l = level(generate_level(10, 10, seed=2), 10, 10)
+        source_code = generate_program(1000, depth=4, seed=2)
+        trace = judge(l, source_code, record=True).trace
+
+        played = Timeline(l(), trace.player(), interval=64)
+        ran = Timeline(l(), Machine(compile(source_code)), interval=64)
+
+        for steps in [999, 10, 500, 1000, 0, 1500, 250]:
+            with self.subTest(steps=steps):
+                self.assertEqual(played.seek(steps), ran.seek(steps))
+                self.assertEqual(played.runtime.snapshot()[:3], ran.runtime.snapshot()[:3])
+                self.assertEqual(played.runtime.grid(), ran.runtime.grid())
@@ -0,0 +1,216 @@
+import io
+import random
+import unittest
+
+from herbert.generator import generate_level
+from herbert.level import Level
+from herbert.loader import Program
+from herbert.ui import Context, cells, changed_cells
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ContextTestCase(unittest.TestCase):
+    def setUp(self):
+        file = io.StringIO('r....\n10\n10')
+        level = Level.fromfile(file, nrows=1, ncols=5)
+        level.name = 'test'
+
+        self.clock = Clock()
+        self.context = Context(level, Program('ssss'), 4, self.clock)
+        self.context.reset()
+
+    def test_idle(self):
+        self.assertIsNone(self.context.timeout())
+
+        self.context.update()
+
+        self.assertEqual(self.context._re.robot.col, 0)
+
+    def test_frames(self):
+        ctx = self.context
+        ctx.start()
+
+        self.assertEqual(ctx.timeout(), 0)
+
+        ctx.update()
+
+        self.assertEqual(ctx._re.robot.col, 1)
+        self.assertEqual(ctx.timeout(), 0.25)
+
+        self.clock.now = 0.1
+        ctx.update()
+
+        self.assertEqual(ctx._re.robot.col, 1)
+        self.assertAlmostEqual(ctx.timeout(), 0.15)
+
+        self.clock.now = 0.25
+        ctx.update()
+
+        self.assertEqual(ctx._re.robot.col, 2)
+        self.assertEqual(ctx.timeout(), 0.25)
+
+    def test_missed_frames(self):
+        ctx = self.context
+        ctx.start()
+        ctx.update()
+
+        self.clock.now = 10
+        ctx.update()
+
+        self.assertEqual(ctx._re.robot.col, 2)
+        self.assertEqual(ctx.timeout(), 0.25)
+
+    def test_finished(self):
+        ctx = self.context
+        ctx.start()
+
+        for _ in range(5):
+            ctx.update()
+            self.clock.now += 0.25
+
+        self.assertFalse(ctx.running)
+        self.assertIsNone(ctx.timeout())
+
+    def test_back(self):
+        ctx = self.context
+        ctx.run_to_end()
+
+        self.assertTrue(ctx.finished)
+        self.assertEqual(ctx._re.robot.col, 4)
+
+        ctx.back()
+
+        self.assertFalse(ctx.finished)
+        self.assertEqual(ctx.steps, 3)
+        self.assertEqual(ctx._re.robot.col, 3)
+        self.assertEqual(ctx._re.robot.trail, [(0, 0), (0, 1), (0, 2), (0, 3)])
+
+        ctx.step()
+
+        self.assertEqual(ctx._re.robot.col, 4)
+
+    def test_jump(self):
+        ctx = self.context
+        ctx.jump_forward()
+
+        self.assertTrue(ctx.finished)
+        self.assertEqual(ctx._re.robot.col, 4)
+
+        ctx.jump_back()
+
+        self.assertEqual(ctx.steps, 0)
+        self.assertEqual(ctx._re.robot.col, 0)
+
+    def test_stop(self):
+        ctx = self.context
+        ctx.start()
+        ctx.stop()
+
+        self.assertIsNone(ctx.timeout())
+
+
+class SpeedTestCase(unittest.TestCase):
+    def setUp(self):
+        file = io.StringIO('r...w....g\n10\n10')
+        level = Level.fromfile(file, nrows=1, ncols=10)
+        level.name = 'test'
+
+        self.clock = Clock()
+        self.context = Context(level, Program('a(A):sa(A-1)\na(100)'), 4, self.clock)
+        self.context.reset()
+
+    def test_faster(self):
+        ctx = self.context
+
+        for speed, fps in [(8, 8), (16, 16), (32, 32), (64, 32), (128, 32)]:
+            ctx.faster()
+            self.assertEqual((ctx.speed, ctx.fps), (speed, fps))
+
+        ctx.start()
+        ctx.update()
+
+        self.assertEqual(ctx.steps, 4)
+        self.assertEqual(ctx.timeout(), 1 / 32)
+
+    def test_slower(self):
+        ctx = self.context
+
+        for _ in range(5):
+            ctx.slower()
+
+        self.assertEqual(ctx.speed, 0.25)
+        self.assertEqual(ctx.fps, 0.25)
+
+    def test_draws_once_per_frame(self):
+        draws = []
+        ctx = self.context
+        ctx.draw_callback = lambda: draws.append(ctx.steps)
+
+        ctx.faster()
+        ctx.faster()
+        ctx.faster()
+        ctx.faster()
+        del draws[:]
+
+        ctx.start()
+        ctx.update()
+
+        self.assertEqual(draws, [0, 2])
+
+    def test_run_to_button(self):
+        ctx = self.context
+
+        ctx.run_to_button()
+        self.assertEqual(ctx.steps, 4)
+        self.assertEqual(ctx._re.npressed, 1)
+
+        ctx.run_to_button()
+        self.assertEqual(ctx.steps, 9)
+        self.assertEqual(ctx._re.npressed, 0)
+
+    def test_run_to_end(self):
+        ctx = self.context
+        ctx.start()
+        ctx.run_to_end()
+
+        self.assertEqual(ctx.steps, 100)
+        self.assertFalse(ctx.running)
+        self.assertTrue(ctx.finished)
+
+
+class ChangedCellsTestCase(unittest.TestCase):
+    def test_changes_reproduce_the_grid(self):
+        for seed in range(5):
+            text = generate_level(15, 15, white_buttons=20, gray_buttons=3, walls=0.2, seed=seed)
+            re = Level.fromfile(io.StringIO(text), nrows=15, ncols=15)()
+
+            grid = re.grid()
+            drawn = cells(re)
+            rng = random.Random(seed)
+
+            for _ in range(200):
+                for command in rng.choices('sssslr', k=rng.randint(1, 5)):
+                    re.step(command)
+
+                changes, drawn = changed_cells(re, drawn)
+                for (r, c), ch in changes:
+                    grid[r][c] = ch
+
+                self.assertEqual(grid, re.grid())
+
+    def test_unchanged(self):
+        re = Level.fromfile(io.StringIO('r.w\n10\n10'), nrows=1, ncols=3)()
+        drawn = cells(re)
+
+        self.assertEqual(changed_cells(re, drawn)[0], [])
+
+        re.step('s')
+
+        self.assertEqual(sorted(changed_cells(re, drawn)[0]), [((0, 0), '.'), ((0, 1), 'r')])